@@ -19,8 +19,18 @@
 from __future__ import nested_scopes
 from __future__ import print_function
 
+import hashlib
+import keyword
+import os
+import pickle
 import re
 import sys
+from optparse import OptionParser
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
 
 sys.path.append("../rabbitmq_codegen")  # in case we're next to an experimental revision
 sys.path.append("codegen")              # in case we're building from a distribution package
@@ -33,6 +43,24 @@ class BogusDefaultValue(Exception):
     def __str__(self):
         return repr(self.value)
 
+class BogusFrameTemplate(Exception):
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+class BogusDecodingHint(Exception):
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
+class BogusProfile(Exception):
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
+
 
 def java_constant_name(c):
     return '_'.join(re.split('[- ]', c.upper()))
@@ -49,6 +77,313 @@ javaTypeMap = {
     'timestamp': 'Date'
     }
 
+# encoded sizes of the fixed-width (non-bit) domains
+fixedWidthSizes = {
+    'octet': 1,
+    'short': 2,
+    'long': 4,
+    'longlong': 8,
+    'timestamp': 8
+    }
+
+def encoded_size_expr(domain, value):
+    """The Java expression for the encoded size of a variable-length value"""
+    return "sizer.%sSize(%s)" % (domain, value)
+
+def property_flag_word_count(c):
+    """One flag word per fifteen properties, and always at least one"""
+    return max(1, (len(c.fields) + 14) // 15)
+
+def property_flag_mask(i):
+    """The presence bit of the i-th property within its flag word"""
+    return 1 << (15 - i % 15)
+
+def property_flag_test(i):
+    """The Java test for the presence of the i-th property"""
+    return "(flags%d & 0x%04x) != 0" % (i // 15, property_flag_mask(i))
+
+def bit_groups(spec, arguments):
+    """Maps the name of each bit argument to the index of its packed
+    octet among all the bit octets, and to its mask within that octet"""
+    groups = {}
+    (octet, mask) = (-1, None)
+    for a in arguments:
+        if spec.resolveDomain(a.domain) != 'bit':
+            mask = None
+            continue
+        if mask is None or mask > 0x80:
+            (octet, mask) = (octet + 1, 0x01)
+        groups[a.name] = (octet, mask)
+        mask = mask << 1
+    return groups
+
+def bit_octet_count(spec, arguments):
+    """The number of octets the packed bit arguments occupy on the wire"""
+    count = 0
+    bitsInOctet = 8
+    for a in arguments:
+        if spec.resolveDomain(a.domain) == 'bit':
+            if bitsInOctet == 8:
+                count += 1
+                bitsInOctet = 0
+            bitsInOctet += 1
+        else:
+            bitsInOctet = 8
+    return count
+
+# methods received often enough that decoders may refill a reusable
+# (flyweight) instance instead of allocating a new one per frame
+reusableMethods = [
+    'basic.deliver',
+    'basic.ack',
+    'basic.nack',
+    'basic.return'
+    ]
+
+# placeholder argument values for flyweight instances not yet filled
+javaPlaceholderValues = {
+    'int': '0',
+    'long': '0L',
+    'boolean': 'false',
+    'String': '""',
+    'LongString': 'LongStringHelper.asLongString("")',
+    'Map<String,Object>': 'null',
+    'Date': 'null'
+    }
+
+# methods sent often enough to be worth encoding once per channel. The
+# listed arguments are bound when a template is made; the others must
+# be fixed-width, must follow the bound ones, and are patched into the
+# encoded frame on every use
+frameTemplates = {
+    'basic.ack': [],
+    'basic.nack': [],
+    'basic.reject': [],
+    'basic.publish': ['ticket', 'exchange', 'routing-key'],
+    'channel.flow-ok': []
+    }
+
+# per-argument decoding hints. 'intern' reads a shortstr through the
+# bounded ShortstrInternCache, so that the few distinct values of a
+# field such as a consumer tag or routing key are decoded once and
+# shared, not reallocated for every frame
+fieldDecodingHints = {
+    'basic.deliver': {'consumer-tag': 'intern', 'exchange': 'intern', 'routing-key': 'intern'},
+    'basic.get-ok': {'exchange': 'intern', 'routing-key': 'intern'},
+    'basic.return': {'exchange': 'intern', 'routing-key': 'intern'}
+    }
+
+# the peer that sends each method, from the chassis elements of the
+# XML spec, which the JSON spec does not carry. When trimming for the
+# client, methods only the server sends get no encoder and methods only
+# the client sends get no decoder. Methods sent by both peers, and any
+# not listed, are generated in full
+methodSenders = {
+    'connection.start': 'server',
+    'connection.start-ok': 'client',
+    'connection.secure': 'server',
+    'connection.secure-ok': 'client',
+    'connection.tune': 'server',
+    'connection.tune-ok': 'client',
+    'connection.open': 'client',
+    'connection.open-ok': 'server',
+    'channel.open': 'client',
+    'channel.open-ok': 'server',
+    'access.request': 'client',
+    'access.request-ok': 'server',
+    'exchange.declare': 'client',
+    'exchange.declare-ok': 'server',
+    'exchange.delete': 'client',
+    'exchange.delete-ok': 'server',
+    'exchange.bind': 'client',
+    'exchange.bind-ok': 'server',
+    'exchange.unbind': 'client',
+    'exchange.unbind-ok': 'server',
+    'queue.declare': 'client',
+    'queue.declare-ok': 'server',
+    'queue.bind': 'client',
+    'queue.bind-ok': 'server',
+    'queue.purge': 'client',
+    'queue.purge-ok': 'server',
+    'queue.delete': 'client',
+    'queue.delete-ok': 'server',
+    'queue.unbind': 'client',
+    'queue.unbind-ok': 'server',
+    'basic.qos': 'client',
+    'basic.qos-ok': 'server',
+    'basic.consume': 'client',
+    'basic.consume-ok': 'server',
+    'basic.publish': 'client',
+    'basic.return': 'server',
+    'basic.deliver': 'server',
+    'basic.get': 'client',
+    'basic.get-ok': 'server',
+    'basic.get-empty': 'server',
+    'basic.reject': 'client',
+    'basic.recover-async': 'client',
+    'basic.recover': 'client',
+    'basic.recover-ok': 'server',
+    'tx.select': 'client',
+    'tx.select-ok': 'server',
+    'tx.commit': 'client',
+    'tx.commit-ok': 'server',
+    'tx.rollback': 'client',
+    'tx.rollback-ok': 'server',
+    'confirm.select': 'client',
+    'confirm.select-ok': 'server'
+    }
+
+# synchronous methods AMQP.PipelinedRpc has no stubs for: those of
+# protocol classes whose state the library itself manages, and those
+# of other classes it keeps state for, such as the consumers it
+# dispatches to. basic.get is answered by get-ok or get-empty, not by
+# a single -ok method
+unpipelinedClasses = ['connection', 'channel']
+unpipelinedMethods = ['basic.consume', 'basic.cancel', 'basic.get', 'confirm.select']
+
+# whether to generate AMQImpl for the client alone: see methodSenders.
+# Decoders are then also dispatched through one method per protocol
+# class, so that the method classes of protocol classes a client never
+# uses are never loaded
+trimForClient = False
+
+# whether generated encoders and decoders record frames in a
+# MethodMetrics. When false the hooks are not generated at all, and
+# connections with metrics enabled report no frames
+emitMethodMetrics = True
+
+# the methods that make up most of the traffic of the profile given
+# with --profile, most frequent first, as "class.method" names; None
+# when generating without a profile. With a profile, decoders test for
+# the hot methods received from the server before dispatching on the
+# others, and only hot methods get flyweights and decoding hints. Frame
+# templates are used by name from ChannelN, so do not depend on it
+hotMethods = None
+
+# the share of the profiled frames that the hot methods must account
+# for, and the most methods that may be hot
+hotFrameShare = 0.99
+maxHotMethods = 8
+
+def read_profile(spec, path):
+    """Reads a method-frequency profile: lines holding a method name,
+    such as basic.deliver, and a frame count, as written by
+    MethodStatistics.writeProfile or listed under "methods:" by
+    amqp_capture.py. Other lines are ignored, and the counts of a
+    method named more than once are added up."""
+    names = set(["%s.%s" % (c.name, m.name) for c in spec.allClasses() for m in c.allMethods()])
+    profile = {}
+    f = open(path)
+    try:
+        for line in f:
+            match = re.match(r"^\s*([a-z][a-z-]*\.[a-z][a-z-]*)\s+(\d+)\s*$", line)
+            if match and match.group(1) in names:
+                name = match.group(1)
+                profile[name] = profile.get(name, 0) + int(match.group(2))
+    finally:
+        f.close()
+    if not sum(profile.values()):
+        raise BogusProfile("no method frame counts in %s" % path)
+    return profile
+
+def hot_methods(spec, profile):
+    """The fewest methods accounting for hotFrameShare of the profiled
+    frames, up to maxHotMethods, most frequent first. Ties are broken
+    by spec order, so that a profile always gives the same result."""
+    ordinals = method_ordinals(spec)
+    counted = [("%s.%s" % (c.name, m.name), ordinals[(c.name, m.name)])
+               for c in spec.allClasses() for m in c.allMethods()]
+    counted = [(name, ordinal) for (name, ordinal) in counted if profile.get(name, 0) > 0]
+    counted.sort(key=lambda item: (-profile[item[0]], item[1]))
+    total = sum([profile[name] for (name, ordinal) in counted])
+    hot = []
+    covered = 0
+    for (name, ordinal) in counted:
+        if covered >= hotFrameShare * total or len(hot) == maxHotMethods:
+            break
+        hot.append(name)
+        covered += profile[name]
+    return hot
+
+def is_hot_method(c, m):
+    return hotMethods is None or ("%s.%s" % (c.name, m.name)) in hotMethods
+
+def hot_decoded_methods(spec):
+    """The hot methods the server sends, most frequent first"""
+    if hotMethods is None:
+        return []
+    methods = dict([("%s.%s" % (c.name, m.name), (c, m)) for c in spec.allClasses() for m in c.allMethods()])
+    return [methods[name] for name in hotMethods
+            if method_sender(*methods[name]) != 'client']
+
+def pipelined_methods(spec):
+    """(class, method, reply) for each synchronous method answered by
+    a single -ok method that AMQP.PipelinedRpc may send, in spec order"""
+    pipelined = []
+    for c in spec.allClasses():
+        if c.name in unpipelinedClasses:
+            continue
+        byName = dict([(m.name, m) for m in c.allMethods()])
+        for m in c.allMethods():
+            ok = byName.get(m.name + "-ok")
+            if m.isSynchronous and ok is not None and "%s.%s" % (c.name, m.name) not in unpipelinedMethods:
+                pipelined.append((c, m, ok))
+    return pipelined
+
+def method_ordinals(spec):
+    """Dense method numbers, in spec order: (class, method) -> ordinal"""
+    ordinals = {}
+    for c in spec.allClasses():
+        for m in c.allMethods():
+            ordinals[(c.name, m.name)] = len(ordinals)
+    return ordinals
+
+def is_reusable_method(c, m):
+    return ("%s.%s" % (c.name, m.name)) in reusableMethods and is_hot_method(c, m)
+
+def method_sender(c, m):
+    return methodSenders.get("%s.%s" % (c.name, m.name), 'both')
+
+def client_decodes(c, m):
+    return not trimForClient or method_sender(c, m) != 'client'
+
+def client_encodes(c, m):
+    return not trimForClient or method_sender(c, m) != 'server'
+
+def field_decoding_hint(c, m, a):
+    if not is_hot_method(c, m):
+        return None
+    return fieldDecodingHints.get("%s.%s" % (c.name, m.name), {}).get(a.name)
+
+def argument_reader_suffix(spec, c, m, a):
+    """The reader method for an argument, less "read", honouring any
+    decoding hint"""
+    domain = spec.resolveDomain(a.domain)
+    hint = field_decoding_hint(c, m, a)
+    if hint is None:
+        return java_reader_suffix(domain)
+    if hint == 'intern' and domain == 'shortstr':
+        return 'InternedShortstr'
+    raise BogusDecodingHint("%s.%s %s: hint %r does not apply to domain %s"
+                            % (c.name, m.name, a.name, hint, domain))
+
+# the ByteBufferValueReader methods that may throw IOException
+byteBufferReadersThrowing = set([
+    'shortstr',
+    'table'
+    ])
+
+# Property domains kept unboxed by generated properties classes, with
+# a presence bit each: domain -> (field type, suffix of the reader and
+# writer methods, suffix of the primitive getter, boxing expression)
+primitiveProperties = {
+    'octet':     ('int',  'Octet',           'Value',  'Integer.valueOf(%s)'),
+    'short':     ('int',  'Short',           'Value',  'Integer.valueOf(%s)'),
+    'long':      ('int',  'Long',            'Value',  'Integer.valueOf(%s)'),
+    'longlong':  ('long', 'Longlong',        'Value',  'Long.valueOf(%s)'),
+    'timestamp': ('long', 'TimestampMillis', 'Millis', 'new Date(%s)')
+    }
+
 javaTypesToCheckForNull = set([
     'String',
     'LongString',
@@ -91,11 +426,38 @@ def java_name(upperNext, name):
 def java_class_name(name):
     return java_name(True, name)
 
+def java_reader_suffix(domain):
+    """The MethodArgumentReader method for a domain, less "read";
+    tables are read straight into ImmutableTables"""
+    if domain == 'table':
+        return 'ImmutableTable'
+    return java_class_name(domain)
+
 def java_getter_name(name):
     return java_name(False, 'get-' + name)
 
 def java_field_name(name):
     return java_name(False, name)
+
+def primitive_property(spec, f):
+    """How a property is kept unboxed (see primitiveProperties), or
+    None if it is kept as an object"""
+    return primitiveProperties.get(spec.resolveDomain(f.domain))
+
+def presence_type(c):
+    """The type of the bitmask recording which unboxed properties are present"""
+    return 'int' if len(c.fields) <= 32 else 'long'
+
+def presence_mask(c, i):
+    return "0x%x%s" % (1 << i, '' if presence_type(c) == 'int' else 'L')
+
+def property_present(spec, c, i):
+    """The Java condition that the i'th property of class c is present"""
+    f = c.fields[i]
+    if primitive_property(spec, f):
+        return "(this.present & %s) != 0" % (presence_mask(c, i))
+    return "this.%s != null" % (java_field_name(f.name))
+
 def java_field_type(spec, domain):
     return javaTypeMap[spec.resolveDomain(domain)]
 
@@ -156,16 +518,21 @@ def genJavaApi(spec):
         printFileHeader()
         print("package com.rabbitmq.client;")
         print()
+        print("import java.io.ByteArrayOutputStream;")
         print("import java.io.DataInputStream;")
+        print("import java.io.DataOutputStream;")
         print("import java.io.IOException;")
         print("import java.util.Collections;")
         print("import java.util.HashMap;")
         print("import java.util.Map;")
         print("import java.util.Date;")
+        print("import java.util.concurrent.Future;")
         print()
         print("import com.rabbitmq.client.impl.ContentHeaderPropertyWriter;")
         print("import com.rabbitmq.client.impl.ContentHeaderPropertyReader;")
+        print("import com.rabbitmq.client.impl.ImmutableTable;")
         print("import com.rabbitmq.client.impl.LongStringHelper;")
+        print("import com.rabbitmq.client.impl.ValueSizer;")
 
     def printProtocolClass():
         print()
@@ -238,39 +605,130 @@ def genJavaApi(spec):
             print("    }")
 
     def printReadProperties(c):
-        if c.fields:
-            for f in c.fields:
-                print("            boolean %s_present = reader.readPresence();" % (java_field_name(f.name)))
-            print()
-
+        for w in range(property_flag_word_count(c)):
+            print("            int flags%d = reader.readFlags();" % (w))
         print("            reader.finishPresence();")
 
         if c.fields:
             print()
-            for f in c.fields:
+            for (i, f) in enumerate(c.fields):
                 (jfName, jfClass) = (java_field_name(f.name), java_class_name(f.domain))
-                print("            this.%s = %s_present ? reader.read%s() : null;" % (jfName, jfName, jfClass))
+                primitive = primitive_property(spec, f)
+                if primitive:
+                    print("            if (%s) {" % (property_flag_test(i)))
+                    print("                this.%s = reader.read%s();" % (jfName, primitive[1]))
+                    print("                this.present |= %s;" % (presence_mask(c, i)))
+                    print("            }")
+                else:
+                    print("            this.%s = %s ? reader.read%s() : null;" % (jfName, property_flag_test(i), jfClass))
 
     def printWritePropertiesTo(c):
         print()
         print("        public void writePropertiesTo(ContentHeaderPropertyWriter writer)")
         print("            throws IOException")
         print("        {")
+        if emitMethodMetrics:
+            print("            long started = writer.startProperties();")
+        if c.fields:
+            print("            byte[] encoded = encodedProperties();")
+            print("            if (encoded != null) {")
+            print("                writer.writeEncodedProperties(encoded, 0, encoded.length);")
+            print("            } else {")
+            print("                writeFieldsTo(writer);")
+            print("            }")
+        else:
+            print("            writeFieldsTo(writer);")
+        if emitMethodMetrics:
+            print("            writer.endProperties(%s, started);" % (c.index))
+        print("        }")
+
+        print()
+        print("        private void writeFieldsTo(ContentHeaderPropertyWriter writer)")
+        print("            throws IOException")
+        print("        {")
+        flagWords = property_flag_word_count(c)
+        for w in range(flagWords):
+            terms = [ "(%s ? 0x%04x : 0)" % (property_present(spec, c, i), property_flag_mask(i))
+                      for (i, f) in enumerate(c.fields) if i // 15 == w ]
+            if w < flagWords - 1:
+                terms.append("1") # continuation
+            print("            writer.writeFlags(%s);" % ("\n                            | ".join(terms or ["0"])))
         if c.fields:
-            for f in c.fields:
-                print("            writer.writePresence(this.%s != null);" % (java_field_name(f.name)))
             print()
-        print("            writer.finishPresence();")
+            for (i, f) in enumerate(c.fields):
+                jfName = java_field_name(f.name)
+                primitive = primitive_property(spec, f)
+                jfClass = primitive[1] if primitive else java_class_name(f.domain)
+                print("            if (%s) writer.write%s(this.%s);" % (property_present(spec, c, i), jfClass, jfName))
+        print("        }")
+
         if c.fields:
+            printEncodedProperties(c)
+
+    def printEncodedProperties(c):
+        # Properties objects have no setters, so their encoding can be
+        # kept and reused for every frame they are sent in, except
+        # that a table value can be changed by whoever holds it:
+        # tables holding anything but immutable values disable the
+        # cache.
+        tables = [ java_field_name(f.name) for f in c.fields if spec.resolveDomain(f.domain) == 'table' ]
+        print()
+        print("        /**")
+        print("         * The encoded flags and properties, computed on first use and")
+        print("         * reused by later frames, or null if a property holds a value")
+        print("         * that may change after encoding.")
+        print("         */")
+        print("        private byte[] encodedProperties()")
+        print("            throws IOException")
+        print("        {")
+        print("            byte[] encoded = this.encodedProperties;")
+        print("            if (encoded != null) return encoded;")
+        if tables:
+            print("            if (this.mutableProperties) return null;")
+            print("            if (%s) {" % (" || ".join([ "!ImmutableTable.isImmutableValue(this.%s)" % t for t in tables ])))
+            print("                this.mutableProperties = true;")
+            print("                return null;")
+            print("            }")
+        print("            ByteArrayOutputStream buffer = new ByteArrayOutputStream();")
+        print("            writeFieldsTo(new ContentHeaderPropertyWriter(new DataOutputStream(buffer)));")
+        print("            encoded = buffer.toByteArray();")
+        print("            this.encodedProperties = encoded;")
+        print("            return encoded;")
+        print("        }")
+
+    def printIsShareable(c):
+        # through the getters, which lazily decoded subclasses override
+        tables = [ f.name for f in c.fields if spec.resolveDomain(f.domain) == 'table' ]
+        if not tables:
+            return
+        print()
+        print("        @Override public boolean isShareable() {")
+        print("            return %s;" % ("\n                && ".join([ "ImmutableTable.isImmutableValue(%s())" % (java_getter_name(t)) for t in tables ])))
+        print("        }")
+
+    def printEncodedSize(c):
+        flagWords = property_flag_word_count(c)
+        print()
+        print("        public int encodedSize(ValueSizer sizer)")
+        print("            throws IOException")
+        print("        {")
+        if c.fields:
+            print("            byte[] encoded = encodedProperties();")
+            print("            if (encoded != null) return encoded.length;")
             print()
-            for f in c.fields:
-                (jfName, jfClass) = (java_field_name(f.name), java_class_name(f.domain))
-                print("            if (this.%s != null) writer.write%s(this.%s);" % (jfName, jfClass, jfName))
+        print("            int acc = %d;" % (2 * flagWords))
+        for (i, f) in enumerate(c.fields):
+            jfName = java_field_name(f.name)
+            if f.domain in fixedWidthSizes:
+                print("            if (%s) acc += %d;" % (property_present(spec, c, i), fixedWidthSizes[f.domain]))
+            else:
+                print("            if (%s) acc += %s;" % (property_present(spec, c, i), encoded_size_expr(f.domain, "this." + jfName)))
+        print("            return acc;")
         print("        }")
 
     def printAppendPropertyDebugStringTo(c):
-        appendList = [ "%s=\")\n               .append(this.%s)\n               .append(\""
-                       % (f.name, java_field_name(f.name))
+        appendList = [ "%s=\")\n               .append(%s())\n               .append(\""
+                       % (f.name, java_getter_name(f.name))
                        for f in c.fields ]
         print()
         print("        public void appendPropertyDebugStringTo(StringBuilder acc) {")
@@ -318,9 +776,8 @@ def genJavaApi(spec):
         print()
         print("        public Builder builder() {")
         print("            Builder builder = new Builder()")
-        setFieldList = [ "%s(%s)" % (fn, fn)
-                         for fn in [ java_field_name(f.name) for f in c.fields ]
-                         ]
+        setFieldList = [ "%s(%s())" % (java_field_name(f.name), java_getter_name(f.name))
+                         for f in c.fields ]
         print("                .%s;" % ("\n                .".join(setFieldList)))
         print("            return builder;")
         print("        }")
@@ -336,8 +793,17 @@ def genJavaApi(spec):
         print("    public static class %sProperties extends com.rabbitmq.client.impl.AMQ%sProperties {" % (jClassName, jClassName))
         #property fields
         for f in c.fields:
-            (fType, fName) = (java_boxed_type(java_field_type(spec, f.domain)), java_field_name(f.name))
-            print("        private %s %s;" % (fType, fName))
+            primitive = primitive_property(spec, f)
+            fType = primitive[0] if primitive else java_boxed_type(java_field_type(spec, f.domain))
+            print("        private %s %s;" % (fType, java_field_name(f.name)))
+        if [ f for f in c.fields if primitive_property(spec, f) ]:
+            print("        /** Which of the properties held unboxed are present, one bit per property */")
+            print("        private %s present;" % (presence_type(c)))
+        if c.fields:
+            print()
+            print("        private transient volatile byte[] encodedProperties;")
+            if [ f for f in c.fields if spec.resolveDomain(f.domain) == 'table' ]:
+                print("        private transient volatile boolean mutableProperties;")
 
         #explicit constructor
         if c.fields:
@@ -347,10 +813,16 @@ def genJavaApi(spec):
             print("        public %sProperties(" % (jClassName))
             print("            %s)" % (",\n            ".join(consParmList)))
             print("        {")
-            for f in c.fields:
+            for (i, f) in enumerate(c.fields):
                 (fType, fName) = (java_field_type(spec, f.domain), java_field_name(f.name))
-                if fType == "Map<String,Object>":
-                    print("            this.%s = %s==null ? null : Collections.unmodifiableMap(new HashMap<String,Object>(%s));" % (fName, fName, fName))
+                if primitive_property(spec, f):
+                    unboxed = "%s.getTime()" % (fName) if fType == "Date" else fName
+                    print("            if (%s != null) {" % (fName))
+                    print("                this.%s = %s;" % (fName, unboxed))
+                    print("                this.present |= %s;" % (presence_mask(c, i)))
+                    print("            }")
+                elif fType == "Map<String,Object>":
+                    print("            this.%s = %s==null ? null : ImmutableTable.copyOf(%s);" % (fName, fName, fName))
                 else:
                     print("            this.%s = %s;" % (fName, fName))
             print("        }")
@@ -376,11 +848,34 @@ def genJavaApi(spec):
 
         #accessor methods
         print()
-        for f in c.fields:
+        for (i, f) in enumerate(c.fields):
             (jType, jName) = (java_field_type(spec, f.domain), java_field_name(f.name))
-            printGetter(jType, jName)
+            primitive = primitive_property(spec, f)
+            if primitive:
+                capFieldName = jName[0].upper() + jName[1:]
+                print("        public %s get%s() { return %s ? %s : null; }"
+                      % (java_boxed_type(jType), capFieldName, property_present(spec, c, i), primitive[3] % ("this." + jName)))
+            else:
+                printGetter(jType, jName)
+
+        #unboxed accessors
+        for (i, f) in enumerate(c.fields):
+            primitive = primitive_property(spec, f)
+            if primitive:
+                jName = java_field_name(f.name)
+                capFieldName = jName[0].upper() + jName[1:]
+                print()
+                print("        /** @return whether the %s property is present */" % (f.name))
+                print("        public boolean has%s() { return %s; }" % (capFieldName, property_present(spec, c, i)))
+                if primitive[2] == 'Millis':
+                    print("        /** @return the %s property in milliseconds since the epoch, or 0 if it is absent */" % (f.name))
+                else:
+                    print("        /** @return the %s property, or 0 if it is absent */" % (f.name))
+                print("        public %s get%s%s() { return this.%s; }" % (primitive[0], capFieldName, primitive[2], jName))
 
         printWritePropertiesTo(c)
+        printEncodedSize(c)
+        printIsShareable(c)
         printAppendPropertyDebugStringTo(c)
         printPropertiesBuilderClass(c)
 
@@ -391,6 +886,35 @@ def genJavaApi(spec):
             if c.hasContentProperties:
                 printPropertiesClass(c)
 
+    def printPipelinedRpcClass():
+        print()
+        print("    /**")
+        print("     * Typed stubs for {@link com.rabbitmq.client.PipelinedChannel#pipelinedRpc}: each")
+        print("     * sends a synchronous method without waiting for the replies to")
+        print("     * those sent before it, and returns a future of its -ok reply.")
+        print("     * Methods whose state the channel keeps, such as channel.close,")
+        print("     * basic.consume and confirm.select, have no stub.")
+        print("     */")
+        print("    public static class PipelinedRpc {")
+        print("        private final com.rabbitmq.client.PipelinedChannel channel;")
+        print()
+        print("        public PipelinedRpc(com.rabbitmq.client.PipelinedChannel channel) {")
+        print("            this.channel = channel;")
+        print("        }")
+        for (c, m, ok) in pipelined_methods(spec):
+            (request, reply) = ("%s.%s" % (java_class_name(c.name), java_class_name(m.name)),
+                                "%s.%s" % (java_class_name(c.name), java_class_name(ok.name)))
+            print()
+            print("        /** Sends %s.%s, returning a future of its %s.%s */" % (c.name, m.name, c.name, ok.name))
+            print("        public Future<%s> %s(%s method) throws IOException {" % (reply, java_field_name(c.name + '-' + m.name), request))
+            if "nowait" in [a.name for a in m.arguments]:
+                print("            if (method.getNowait()) {")
+                print("                throw new IllegalArgumentException(\"%s.%s with nowait set gets no reply\");" % (c.name, m.name))
+                print("            }")
+            print("            return channel.pipelinedRpc(method, %s.class);" % (reply))
+            print("        }")
+        print("    }")
+
     printHeader()
     print()
     print("public interface AMQP {")
@@ -399,6 +923,7 @@ def genJavaApi(spec):
     printConstants()
     printClassInterfaces()
     printPropertiesClasses()
+    printPipelinedRpcClass()
 
     print("}")
 
@@ -411,12 +936,17 @@ def genJavaImpl(spec):
         print()
         print("import java.io.IOException;")
         print("import java.io.DataInputStream;")
+        print("import java.nio.BufferUnderflowException;")
+        print("import java.nio.ByteBuffer;")
+        print("import java.util.Arrays;")
         print("import java.util.Collections;")
+        print("import java.util.Date;")
         print("import java.util.HashMap;")
         print("import java.util.Map;")
         print()
         print("import com.rabbitmq.client.AMQP;")
         print("import com.rabbitmq.client.LongString;")
+        print("import com.rabbitmq.client.MalformedFrameException;")
         print("import com.rabbitmq.client.UnknownClassOrMethodId;")
         print("import com.rabbitmq.client.UnexpectedMethodError;")
 
@@ -447,15 +977,64 @@ def genJavaImpl(spec):
                 for a in m.arguments:
                     (jfType, jfName) = (java_field_type(spec, a.domain), java_field_name(a.name))
                     if jfType == "Map<String,Object>":
-                        print("                this.%s = %s==null ? null : Collections.unmodifiableMap(new HashMap<String,Object>(%s));" % (jfName, jfName, jfName))
+                        print("                this.%s = %s==null ? null : ImmutableTable.copyOf(%s);" % (jfName, jfName, jfName))
                     else:
                         print("                this.%s = %s;" % (jfName, jfName))
 
                 print("            }")
 
-                consArgs = [ "rdr.read%s()" % (java_class_name(spec.resolveDomain(a.domain))) for a in m.arguments ]
-                print("            public %s(MethodArgumentReader rdr) throws IOException {" % (java_class_name(m.name)))
-                print("                this(%s);" % (", ".join(consArgs)))
+                if client_decodes(c, m):
+                    consArgs = [ "rdr.read%s()" % (argument_reader_suffix(spec, c, m, a)) for a in m.arguments ]
+                    print("            public %s(MethodArgumentReader rdr) throws IOException {" % (java_class_name(m.name)))
+                    print("                this(%s);" % (", ".join(consArgs)))
+                    print("            }")
+
+            def read_argument_locals_from_buffer():
+                groups = bit_groups(spec, m.arguments)
+                if groups:
+                    print("                int bits;")
+                for a in m.arguments:
+                    (jfType, jfName) = (java_field_type(spec, a.domain), java_field_name(a.name))
+                    domain = spec.resolveDomain(a.domain)
+                    if a.name in groups:
+                        (octet, mask) = groups[a.name]
+                        if mask == 0x01:
+                            print("                bits = in.get(pos++) & 0xff;")
+                        print("                %s %s = (bits & 0x%02x) != 0;" % (jfType, jfName, mask))
+                        continue
+                    if domain == 'table':
+                        jDomain = java_class_name(domain)
+                    else:
+                        jDomain = argument_reader_suffix(spec, c, m, a)
+                    print("                %s %s = ByteBufferValueReader.read%s(in, pos);" % (jfType, jfName, jDomain))
+                    if a is m.arguments[-1]:
+                        pass
+                    elif domain in fixedWidthSizes:
+                        print("                pos += %d;" % (fixedWidthSizes[domain]))
+                    else:
+                        print("                pos += ByteBufferValueReader.%sSize(in, pos);" % (domain))
+
+            def read_arguments_from_buffer():
+                print()
+                print("            public static %s readFrom(ByteBuffer in, int pos) throws IOException {" % (java_class_name(m.name)))
+                read_argument_locals_from_buffer()
+                argList = [ java_field_name(a.name) for a in m.arguments ]
+                print("                return new %s(%s);" % (java_class_name(m.name), ", ".join(argList)))
+                print("            }")
+
+            def refill_arguments_from_buffer():
+                print()
+                print("            /**")
+                print("             * Replaces the arguments of this flyweight instance with")
+                print("             * those encoded at the given offset.")
+                print("             */")
+                print("            %s refill(ByteBuffer in, int pos) throws IOException {" % (java_class_name(m.name)))
+                read_argument_locals_from_buffer()
+                for a in m.arguments:
+                    (jfType, jfName) = (java_field_type(spec, a.domain), java_field_name(a.name))
+                    # decoded tables are already ImmutableTables
+                    print("                this.%s = %s;" % (jfName, jfName))
+                print("                return this;")
                 print("            }")
 
             def others():
@@ -463,6 +1042,7 @@ def genJavaImpl(spec):
                 print("            public int protocolClassId() { return %s; }" % (c.index))
                 print("            public int protocolMethodId() { return %s; }" % (m.index))
                 print("            public String protocolMethodName() { return \"%s.%s\";}" % (c.name, m.name))
+                print("            public int protocolMethodOrdinal() { return ORDINAL; }")
                 print()
                 print("            public boolean hasContent() { return %s; }" % (trueOrFalse(m.hasContent)))
                 print()
@@ -489,8 +1069,135 @@ def genJavaImpl(spec):
                 print("            public void writeArgumentsTo(MethodArgumentWriter writer)")
                 print("                throws IOException")
                 print("            {")
+                if not client_encodes(c, m):
+                    print("                throw new UnsupportedOperationException(\"%s.%s is only sent by servers\");" % (c.name, m.name))
+                    print("            }")
+                    return
+                if emitMethodMetrics:
+                    print("                long started = writer.startMethod();")
+                groups = bit_groups(spec, m.arguments)
                 for a in m.arguments:
+                    if a.name in groups:
+                        (octet, mask) = groups[a.name]
+                        jfName = java_field_name(a.name)
+                        if mask != 0x01:
+                            continue
+                        terms = [ "(this.%s ? 0x%02x : 0)" % (java_field_name(b.name), groups[b.name][1])
+                                  for b in m.arguments if groups.get(b.name, (None,))[0] == octet ]
+                        if len(terms) == 1:
+                            terms = [ "this.%s ? 0x01 : 0" % (jfName) ]
+                        print("                writer.writeBits(%s);" % ("\n                                 | ".join(terms)))
+                        continue
                     print("                writer.write%s(this.%s);" % (java_class_name(spec.resolveDomain(a.domain)), java_field_name(a.name)))
+                if emitMethodMetrics:
+                    print("                writer.endMethod(ORDINAL, started);")
+                print("            }")
+
+            def encoded_size():
+                if not client_encodes(c, m):
+                    print()
+                    print("            public int encodedSize(ValueSizer sizer) {")
+                    print("                throw new UnsupportedOperationException(\"%s.%s is only sent by servers\");" % (c.name, m.name))
+                    print("            }")
+                    return
+                fixed = bit_octet_count(spec, m.arguments)
+                terms = []
+                for a in m.arguments:
+                    domain = spec.resolveDomain(a.domain)
+                    if domain in fixedWidthSizes:
+                        fixed += fixedWidthSizes[domain]
+                    elif domain != 'bit':
+                        terms.append(encoded_size_expr(domain, "this." + java_field_name(a.name)))
+                print()
+                print("            public int encodedSize(ValueSizer sizer)")
+                print("                throws IOException")
+                print("            {")
+                print("                return %s;" % (" + ".join([str(fixed)] + terms)))
+                print("            }")
+
+            def frame_template():
+                bound = frameTemplates["%s.%s" % (c.name, m.name)]
+                varying = [a for a in m.arguments if a.name not in bound]
+                jName = java_class_name(m.name)
+                groups = bit_groups(spec, m.arguments)
+                for a in m.arguments[len(m.arguments) - len(varying):]:
+                    domain = spec.resolveDomain(a.domain)
+                    if a.name in bound or not (domain == 'bit' or domain in fixedWidthSizes):
+                        raise BogusFrameTemplate("%s.%s: cannot patch argument %s" % (c.name, m.name, a.name))
+                    if a.name in groups and [b for b in bound if groups.get(b, (None,))[0] == groups[a.name][0]]:
+                        raise BogusFrameTemplate("%s.%s: bit %s shares an octet with a bound bit" % (c.name, m.name, a.name))
+                # offsets of each varying argument back from the end of the arguments
+                offsets = {}
+                fromEnd = 0
+                for a in reversed(varying):
+                    domain = spec.resolveDomain(a.domain)
+                    if domain != 'bit':
+                        fromEnd += fixedWidthSizes[domain]
+                    elif groups[a.name][1] == 0x01:
+                        fromEnd += 1
+                    offsets[a.name] = fromEnd
+                # all the bits of an octet are patched at the offset of the octet
+                for a in varying:
+                    if a.name in groups:
+                        first = [b for b in varying if groups.get(b.name, (None,))[0] == groups[a.name][0]][0]
+                        offsets[a.name] = offsets[first.name]
+                boundParams = [ "%s %s" % (java_field_type(spec, a.domain), java_field_name(a.name)) for a in m.arguments if a.name in bound ]
+                prototypeArgs = [ (a.name in bound) and java_field_name(a.name) or javaPlaceholderValues[java_field_type(spec, a.domain)]
+                                  for a in m.arguments ]
+                print()
+                print("            /**")
+                print("             * Pre-encoded %s.%s frame, into which only the arguments" % (c.name, m.name))
+                print("             * given to {@link #frame} are encoded on each use.")
+                print("             */")
+                print("            public static final class Template extends MethodFrameTemplate {")
+                for a in m.arguments:
+                    if a.name in bound:
+                        print("                private final %s %s;" % (java_field_type(spec, a.domain), java_field_name(a.name)))
+                if bound:
+                    print()
+                print("                public Template(%s) throws IOException {" % (", ".join(["int channelNumber"] + boundParams)))
+                print("                    super(channelNumber, new %s(%s));" % (jName, ", ".join(prototypeArgs)))
+                for a in m.arguments:
+                    if a.name in bound:
+                        print("                    this.%s = %s;" % (java_field_name(a.name), java_field_name(a.name)))
+                print("                }")
+                if bound:
+                    tests = []
+                    for a in m.arguments:
+                        if a.name in bound:
+                            jfName = java_field_name(a.name)
+                            if java_field_type(spec, a.domain) in ['int', 'long', 'boolean']:
+                                tests.append("this.%s == %s" % (jfName, jfName))
+                            else:
+                                tests.append("this.%s.equals(%s)" % (jfName, jfName))
+                    print()
+                    print("                /** Whether this template was made with the given bound arguments */")
+                    print("                public boolean matches(%s) {" % (", ".join(boundParams)))
+                    print("                    return %s;" % ("\n                        && ".join(tests)))
+                    print("                }")
+                varyingParams = [ "%s %s" % (java_field_type(spec, a.domain), java_field_name(a.name)) for a in varying ]
+                print()
+                print("                public Frame frame(%s) {" % (", ".join(varyingParams)))
+                for a in varying:
+                    jfName = java_field_name(a.name)
+                    if a.name in groups:
+                        (octet, mask) = groups[a.name]
+                        if mask != 0x01:
+                            continue
+                        terms = [ "(%s ? 0x%02x : 0)" % (java_field_name(b.name), groups[b.name][1])
+                                  for b in varying if groups.get(b.name, (None,))[0] == octet ]
+                        if len(terms) == 1:
+                            terms = [ "%s ? 0x01 : 0" % (jfName) ]
+                        print("                    putOctet(%d, %s);" % (offsets[a.name], " | ".join(terms)))
+                    else:
+                        print("                    put%s(%d, %s);" % (java_class_name(spec.resolveDomain(a.domain)), offsets[a.name], jfName))
+                print("                    return frame();")
+                print("                }")
+                print()
+                print("                public Frame toFrame(Method method) {")
+                print("                    %s m = (%s) method;" % (jName, jName))
+                print("                    return frame(%s);" % (", ".join(["m.%s()" % (java_getter_name(a.name)) for a in varying])))
+                print("                }")
                 print("            }")
 
             #start
@@ -500,20 +1207,67 @@ def genJavaImpl(spec):
             print("            implements com.rabbitmq.client.AMQP.%s.%s" % (java_class_name(c.name), java_class_name(m.name)))
             print("        {")
             print("            public static final int INDEX = %s;" % (m.index))
+            print("            public static final int ORDINAL = %s;" % (methodOrdinals[(c.name, m.name)]))
             print()
+            reusable = is_reusable_method(c, m)
             for a in m.arguments:
-                print("            private final %s %s;" % (java_field_type(spec, a.domain), java_field_name(a.name)))
+                print("            private %s%s %s;" % ((not reusable) and "final " or "", java_field_type(spec, a.domain), java_field_name(a.name)))
 
             getters()
             constructors()
+            if client_decodes(c, m):
+                read_arguments_from_buffer()
+                if reusable:
+                    refill_arguments_from_buffer()
             others()
 
             argument_debug_string()
             write_arguments()
+            encoded_size()
+            if ("%s.%s" % (c.name, m.name)) in frameTemplates:
+                if not client_encodes(c, m):
+                    raise BogusFrameTemplate("%s.%s: only servers send this method" % (c.name, m.name))
+                frame_template()
 
             print("        }")
+
+        if trimForClient:
+            printClassMethodReaders(c)
         print("    }")
 
+    def printClassMethodReaders(c):
+        decoded = [m for m in c.allMethods() if client_decodes(c, m)]
+        if not decoded:
+            return
+        print()
+        print("        /** Decodes a method of this class, loading only this class's methods */")
+        print("        static Method readMethodFrom(DataInputStream in, int methodId) throws IOException {")
+        print("            switch (methodId) {")
+        for m in decoded:
+            print("                case %s: return new %s(new MethodArgumentReader(new ValueReader(in)));" % (m.index, java_class_name(m.name)))
+        print("                default: throw new UnknownClassOrMethodId(INDEX, methodId);")
+        print("            }")
+        print("        }")
+        print()
+        print("        /** Decodes a method of this class, loading only this class's methods */")
+        print("        static Method readMethodFrom(ByteBuffer in, int pos, int methodId, ReusableMethods reuse) throws IOException {")
+        print("            switch (methodId) {")
+        for m in decoded:
+            jName = java_class_name(m.name)
+            if is_reusable_method(c, m):
+                print("                case %s: return reuse == null" % (m.index))
+                print("                    ? %s.readFrom(in, pos)" % (jName))
+                print("                    : reuse.%s.refill(in, pos);" % (java_field_name(c.name + '-' + m.name)))
+            else:
+                print("                case %s: return %s.readFrom(in, pos);" % (m.index, jName))
+        print("                default: throw new UnknownClassOrMethodId(INDEX, methodId);")
+        print("            }")
+        print("        }")
+
+    def decoded_classes():
+        """The classes with methods the client decodes"""
+        return [c for c in spec.allClasses() if [m for m in c.allMethods() if client_decodes(c, m)]]
+
     def printMethodVisitor():
         print()
         print("    public interface MethodVisitor {")
@@ -530,27 +1284,361 @@ def genJavaImpl(spec):
                print("        public Object visit(%s.%s x) throws IOException { throw new UnexpectedMethodError(x); }" % (java_class_name(c.name), java_class_name(m.name)))
         print("    }")
 
+    def printHotMethodTests(reads, indent):
+        """Tests for the hot methods ahead of the general dispatch;
+        reads(c, m, indent) is the expression decoding a method"""
+        pad = " " * indent
+        hot = hot_decoded_methods(spec)
+        if hot:
+            print("%s// the methods received most often in the profiled traffic" % (pad))
+        for (c, m) in hot:
+            print("%sif (classId == %s && methodId == %s) return %s;" % (pad, c.index, m.index, reads(c, m, indent + 4)))
+
     def printMethodArgumentReader():
+        def reads(c, m, indent):
+            return "new %s.%s(new MethodArgumentReader(new ValueReader(in)))" % (java_class_name(c.name), java_class_name(m.name))
+
         print()
         print("    public static Method readMethodFrom(DataInputStream in) throws IOException {")
         print("        int classId = in.readShort();")
         print("        int methodId = in.readShort();")
-        print("        switch (classId) {")
+        if hotMethods is not None:
+            printHotMethodTests(reads, 8)
+            print("        return readOtherMethodFrom(in, classId, methodId);")
+            print("    }")
+            print()
+            print("    /** Decodes a method other than the hot ones {@link #readMethodFrom(DataInputStream)} tests for */")
+            print("    private static Method readOtherMethodFrom(DataInputStream in, int classId, int methodId) throws IOException {")
+        if trimForClient:
+            print("        switch (classId) {")
+            for c in decoded_classes():
+                print("            case %s: return %s.readMethodFrom(in, methodId);" % (c.index, java_class_name(c.name)))
+            print("            default: throw new UnknownClassOrMethodId(classId, methodId);")
+            print("        }")
+            print("    }")
+            return
+        hot = hot_decoded_methods(spec)
+        print("        switch (methodOrdinal(classId, methodId)) {")
         for c in spec.allClasses():
-            print("            case %s:" % (c.index))
-            print("                switch (methodId) {")
             for m in c.allMethods():
+                if (c, m) in hot:
+                    continue
                 fq_name = java_class_name(c.name) + '.' + java_class_name(m.name)
-                print("                    case %s: {" % (m.index))
-                print("                        return new %s(new MethodArgumentReader(new ValueReader(in)));" % (fq_name))
-                print("                    }")
-            print("                    default: break;")
-            print("                } break;")
+                print("            case %s.ORDINAL: {" % (fq_name))
+                print("                return %s;" % (reads(c, m, 20)))
+                print("            }")
+        print("            default: break;")
         print("        }")
         print()
         print("        throw new UnknownClassOrMethodId(classId, methodId);")
         print("    }")
 
+    def printMethodArgumentBufferReader():
+        def reads(c, m, indent):
+            fq_name = java_class_name(c.name) + '.' + java_class_name(m.name)
+            if is_reusable_method(c, m):
+                return ("reuse == null\n%s? %s.readFrom(in, pos + 4)\n%s: reuse.%s.refill(in, pos + 4)"
+                        % (" " * indent, fq_name, " " * indent, java_field_name(c.name + '-' + m.name)))
+            return "%s.readFrom(in, pos + 4)" % (fq_name)
+
+        def printDispatch(indent):
+            pad = " " * indent
+            if trimForClient:
+                print("%sswitch (classId) {" % (pad))
+                for c in decoded_classes():
+                    print("%s    case %s: return %s.readMethodFrom(in, pos + 4, methodId, reuse);" % (pad, c.index, java_class_name(c.name)))
+                print("%s    default: throw new UnknownClassOrMethodId(classId, methodId);" % (pad))
+                print("%s}" % (pad))
+                return
+            hot = hot_decoded_methods(spec)
+            print("%sswitch (methodOrdinal(classId, methodId)) {" % (pad))
+            for c in spec.allClasses():
+                for m in c.allMethods():
+                    if (c, m) in hot:
+                        continue
+                    fq_name = java_class_name(c.name) + '.' + java_class_name(m.name)
+                    print("%s    case %s.ORDINAL: return %s;" % (pad, fq_name, reads(c, m, indent + 8)))
+            print("%s    default: break;" % (pad))
+            print("%s}" % (pad))
+            print()
+            print("%sthrow new UnknownClassOrMethodId(classId, methodId);" % (pad))
+
+        def printTruncationHandler():
+            print("        } catch (IndexOutOfBoundsException e) {")
+            print("            throw new MalformedFrameException(\"Truncated method frame\");")
+            print("        } catch (BufferUnderflowException e) {")
+            print("            throw new MalformedFrameException(\"Truncated method frame\");")
+            print("        }")
+            print("    }")
+
+        print()
+        print("    public static Method readMethodFrom(ByteBuffer in) throws IOException {")
+        print("        return readMethodFrom(in, null);")
+        print("    }")
+        print()
+        print("    /**")
+        print("     * Decodes a method, refilling the matching flyweight of")
+        print("     * <code>reuse</code> instead of allocating where there is one.")
+        print("     */")
+        print("    public static Method readMethodFrom(ByteBuffer in, ReusableMethods reuse) throws IOException {")
+        print("        try {")
+        print("            int pos = in.position();")
+        print("            int classId = in.getShort(pos);")
+        print("            int methodId = in.getShort(pos + 2);")
+        if hotMethods is None:
+            printDispatch(12)
+            printTruncationHandler()
+        else:
+            printHotMethodTests(reads, 12)
+            print("            return readOtherMethodFrom(in, pos, classId, methodId, reuse);")
+            printTruncationHandler()
+            print()
+            print("    /** Decodes a method other than the hot ones {@link #readMethodFrom(ByteBuffer, ReusableMethods)} tests for */")
+            print("    private static Method readOtherMethodFrom(ByteBuffer in, int pos, int classId, int methodId,")
+            print("                                             ReusableMethods reuse) throws IOException {")
+            printDispatch(8)
+            print("    }")
+        print()
+        print("    /**")
+        print("     * Decodes a method as {@link #readMethodFrom(ByteBuffer, ReusableMethods)}")
+        print("     * does, recording it in <code>metrics</code> unless that is null.")
+        print("     */")
+        print("    public static Method readMethodFrom(ByteBuffer in, ReusableMethods reuse, MethodMetrics metrics) throws IOException {")
+        if emitMethodMetrics:
+            print("        if (metrics == null) return readMethodFrom(in, reuse);")
+            print("        long started = metrics.startTiming();")
+            print("        Method method = readMethodFrom(in, reuse);")
+            print("        metrics.methodReceived(method.protocolMethodOrdinal(), in.remaining(), started);")
+            print("        return method;")
+        else:
+            print("        return readMethodFrom(in, reuse);")
+        print("    }")
+
+    def printMethodOrdinals():
+        classIds = [c.index for c in spec.allClasses()]
+        print()
+        print("    /** The number of methods, and so one more than the largest method ordinal */")
+        print("    public static final int METHOD_COUNT = %d;" % (len(methodOrdinals)))
+        print()
+        print("    /** Method ordinals indexed by class id, then method id; -1 for unknown methods */")
+        print("    private static final int[][] METHOD_ORDINALS = new int[%d][];" % (max(classIds) + 1))
+        print("    static {")
+        for c in spec.allClasses():
+            pairs = ["%s, %s" % (m.index, methodOrdinals[(c.name, m.name)]) for m in c.allMethods()]
+            maxMethodId = max([m.index for m in c.allMethods()])
+            print("        METHOD_ORDINALS[%s] = methodOrdinalRow(%d, %s);" % (c.index, maxMethodId, ", ".join(pairs)))
+        print("    }")
+        print()
+        print("    private static int[] methodOrdinalRow(int maxMethodId, int... methodIdOrdinalPairs) {")
+        print("        int[] row = new int[maxMethodId + 1];")
+        print("        Arrays.fill(row, -1);")
+        print("        for (int i = 0; i < methodIdOrdinalPairs.length; i += 2) {")
+        print("            row[methodIdOrdinalPairs[i]] = methodIdOrdinalPairs[i + 1];")
+        print("        }")
+        print("        return row;")
+        print("    }")
+        print()
+        print("    /**")
+        print("     * The dense ordinal of the method with the given ids, in the range")
+        print("     * 0 to {@link #METHOD_COUNT} - 1, or -1 if there is no such method.")
+        print("     */")
+        print("    public static int methodOrdinal(int classId, int methodId) {")
+        print("        if (classId < 0 || classId >= METHOD_ORDINALS.length) return -1;")
+        print("        int[] row = METHOD_ORDINALS[classId];")
+        print("        if (row == null || methodId < 0 || methodId >= row.length) return -1;")
+        print("        return row[methodId];")
+        print("    }")
+        print()
+        print("    /** The dense ordinal of the given method, or -1 if it is unknown. */")
+        print("    public static int methodOrdinal(com.rabbitmq.client.Method m) {")
+        print("        if (m instanceof Method) return ((Method) m).protocolMethodOrdinal();")
+        print("        return methodOrdinal(m.protocolClassId(), m.protocolMethodId());")
+        print("    }")
+        print()
+        print("    private static final String[] METHOD_NAMES = {")
+        for c in spec.allClasses():
+            print("        %s," % (", ".join(["\"%s.%s\"" % (c.name, m.name) for m in c.allMethods()])))
+        print("    };")
+        print()
+        print("    /** The protocol name, such as basic.deliver, of the method with the given ordinal */")
+        print("    public static String methodName(int ordinal) {")
+        print("        return METHOD_NAMES[ordinal];")
+        print("    }")
+
+        contentClasses = [c for c in spec.allClasses() if c.fields]
+        print()
+        print("    /** The number of classes with content headers, and so one more than the largest content class ordinal */")
+        print("    public static final int CONTENT_CLASS_COUNT = %d;" % (len(contentClasses)))
+        print()
+        print("    /**")
+        print("     * The dense ordinal of the content header class with the given")
+        print("     * id, or -1 if there is no such class.")
+        print("     */")
+        print("    public static int contentClassOrdinal(int classId) {")
+        print("        switch (classId) {")
+        for (i, c) in enumerate(contentClasses):
+            print("            case %s: return %d;" % (c.index, i))
+        print("            default: return -1;")
+        print("        }")
+        print("    }")
+        print()
+        print("    private static final String[] CONTENT_CLASS_NAMES = { %s };" % (", ".join(["\"%s\"" % (c.name) for c in contentClasses])))
+        print()
+        print("    /** The name of the content header class with the given ordinal */")
+        print("    public static String contentClassName(int ordinal) {")
+        print("        return CONTENT_CLASS_NAMES[ordinal];")
+        print("    }")
+
+    def printReusableMethods():
+        print()
+        print("    /**")
+        print("     * One flyweight instance of each frequently received method, for")
+        print("     * {@link #readMethodFrom(ByteBuffer, ReusableMethods)} to refill")
+        print("     * in place. A decoded method is only valid until the next method")
+        print("     * is read with the same ReusableMethods.")
+        print("     */")
+        print("    public static class ReusableMethods {")
+        for c in spec.allClasses():
+            for m in c.allMethods():
+                if is_reusable_method(c, m) and client_decodes(c, m):
+                    fq_name = java_class_name(c.name) + '.' + java_class_name(m.name)
+                    values = [ javaPlaceholderValues[java_field_type(spec, a.domain)] for a in m.arguments ]
+                    print("        final %s %s = new %s(%s);" % (fq_name, java_field_name(c.name + '-' + m.name), fq_name, ", ".join(values)))
+        print("    }")
+
+    def printLazyPropertiesClass(c):
+        jClassName = java_class_name(c.name)
+        lazyName = "Lazy%sProperties" % (jClassName)
+        flagWords = property_flag_word_count(c)
+        flagTest = property_flag_test
+
+        def decodedMask(i):
+            return "0x%xL" % (1 << i)
+
+        print()
+        print("    public static class %s extends AMQP.%sProperties {" % (lazyName, jClassName))
+        print("        /** The encoded header frame payload */")
+        print("        private final ByteBuffer encoded;")
+        print("        /** Where the property flags start and the last property ends */")
+        print("        private final int flagsOffset, endOffset;")
+        print("        private final long bodySize;")
+        print("        /** Properties already decoded, one bit per property */")
+        print("        private long decoded;")
+        print()
+        for f in c.fields:
+            print("        private final int %sOffset;" % (java_field_name(f.name)))
+        for f in c.fields:
+            (fType, fName) = (java_boxed_type(java_field_type(spec, f.domain)), java_field_name(f.name))
+            print("        private %s %s;" % (fType, fName))
+
+        print()
+        print("        public %s(ByteBuffer in) throws IOException {" % (lazyName))
+        print("            try {")
+        print("                int pos = in.position() + 4; // class id and weight")
+        print("                this.bodySize = in.getLong(pos);")
+        print("                pos += 8;")
+        print("                this.encoded = in;")
+        print("                this.flagsOffset = pos;")
+        for w in range(flagWords):
+            if w > 0:
+                print("                if ((flags%d & 1) == 0)" % (w - 1))
+                print("                    throw new IOException(\"Attempted to read flag word when none advertised\");")
+            print("                int flags%d = in.getShort(pos) & 0xffff;" % (w))
+            print("                pos += 2;")
+        print("                if ((flags%d & 1) != 0)" % (flagWords - 1))
+        print("                    throw new IOException(\"Unexpected continuation flag word\");")
+        print()
+        for (i, f) in enumerate(c.fields):
+            jfName = java_field_name(f.name)
+            print("                this.%sOffset = %s ? pos : -1;" % (jfName, flagTest(i)))
+            if f.domain in fixedWidthSizes:
+                size = "%d" % (fixedWidthSizes[f.domain])
+            else:
+                size = "ByteBufferValueReader.%sSize(in, pos)" % (f.domain)
+            print("                if (this.%sOffset >= 0) pos += %s;" % (jfName, size))
+        print("                if (pos > in.limit())")
+        print("                    throw new MalformedFrameException(\"Truncated content header frame\");")
+        print("                this.endOffset = pos;")
+        print("            } catch (IndexOutOfBoundsException e) {")
+        print("                throw new MalformedFrameException(\"Truncated content header frame\");")
+        print("            }")
+        print("        }")
+
+        print()
+        print("        @Override public long getBodySize() { return this.bodySize; }")
+        for (i, f) in enumerate(c.fields):
+            (jfType, jfName) = (java_boxed_type(java_field_type(spec, f.domain)), java_field_name(f.name))
+            read = "this.%s = ByteBufferValueReader.read%s(this.encoded, this.%sOffset);" % (jfName, java_class_name(f.domain), jfName)
+            print()
+            print("        @Override public synchronized %s %s() {" % (jfType, java_getter_name(f.name)))
+            print("            if ((this.decoded & %s) == 0) {" % (decodedMask(i)))
+            if f.domain in byteBufferReadersThrowing:
+                print("                try {")
+                print("                    if (this.%sOffset >= 0) %s" % (jfName, read))
+                print("                } catch (IOException e) {")
+                print("                    throw new IllegalStateException(\"Malformed %s property\", e);" % (f.name))
+                print("                }")
+            else:
+                print("                if (this.%sOffset >= 0) %s" % (jfName, read))
+            print("                this.decoded |= %s;" % (decodedMask(i)))
+            print("            }")
+            print("            return this.%s;" % (jfName))
+            print("        }")
+            primitive = primitive_property(spec, f)
+            if primitive:
+                capFieldName = jfName[0].upper() + jfName[1:]
+                print()
+                print("        @Override public boolean has%s() { return this.%sOffset >= 0; }" % (capFieldName, jfName))
+                print("        @Override public %s get%s%s() {" % (primitive[0], capFieldName, primitive[2]))
+                print("            return this.%sOffset >= 0 ? ByteBufferValueReader.read%s(this.encoded, this.%sOffset) : 0;"
+                      % (jfName, primitive[1], jfName))
+                print("        }")
+
+        print()
+        print("        @Override public void writePropertiesTo(ContentHeaderPropertyWriter writer)")
+        print("            throws IOException")
+        print("        {")
+        if emitMethodMetrics:
+            print("            long started = writer.startProperties();")
+        print("            writer.writeEncodedProperties(this.encoded, this.flagsOffset, this.endOffset - this.flagsOffset);")
+        if emitMethodMetrics:
+            print("            writer.endProperties(%s, started);" % (c.index))
+        print("        }")
+        print()
+        print("        @Override public int encodedSize(ValueSizer sizer) {")
+        print("            return this.endOffset - this.flagsOffset;")
+        print("        }")
+        print("    }")
+
+    def printLazyContentHeaderReader():
+        print()
+        print("    public static AMQContentHeader readLazyContentHeaderFrom(ByteBuffer in) throws IOException {")
+        print("        int classId = in.getShort(in.position());")
+        print("        switch (classId) {")
+        for c in spec.allClasses():
+            if c.fields:
+                print("            case %s: return new Lazy%sProperties(in);" %(c.index, (java_class_name(c.name))))
+        print("            default: break;")
+        print("        }")
+        print()
+        print("        throw new UnknownClassOrMethodId(classId);")
+        print("    }")
+        print()
+        print("    /**")
+        print("     * Decodes a content header as {@link #readLazyContentHeaderFrom(ByteBuffer)}")
+        print("     * does, recording it in <code>metrics</code> unless that is null.")
+        print("     */")
+        print("    public static AMQContentHeader readLazyContentHeaderFrom(ByteBuffer in, MethodMetrics metrics) throws IOException {")
+        if emitMethodMetrics:
+            print("        if (metrics == null) return readLazyContentHeaderFrom(in);")
+            print("        long started = metrics.startTiming();")
+            print("        AMQContentHeader header = readLazyContentHeaderFrom(in);")
+            print("        metrics.contentHeaderReceived(header.getClassId(), in.remaining(), started);")
+            print("        return header;")
+        else:
+            print("        return readLazyContentHeaderFrom(in);")
+        print("    }")
+
     def printContentHeaderReader():
         print()
         print("    public static AMQContentHeader readContentHeaderFrom(DataInputStream in) throws IOException {")
@@ -564,19 +1652,1471 @@ def genJavaImpl(spec):
         print()
         print("        throw new UnknownClassOrMethodId(classId);")
         print("    }")
+        print()
+        print("    /**")
+        print("     * Decodes the content header in a frame, recording it in")
+        print("     * <code>metrics</code> unless that is null.")
+        print("     */")
+        print("    public static AMQContentHeader readContentHeaderFrom(Frame frame, MethodMetrics metrics) throws IOException {")
+        if emitMethodMetrics:
+            print("        if (metrics == null) return readContentHeaderFrom(frame.getInputStream());")
+            print("        long started = metrics.startTiming();")
+            print("        AMQContentHeader header = readContentHeaderFrom(frame.getInputStream());")
+            print("        metrics.contentHeaderReceived(header.getClassId(), frame.getPayload().length, started);")
+            print("        return header;")
+        else:
+            print("        return readContentHeaderFrom(frame.getInputStream());")
+        print("    }")
+
+    methodOrdinals = method_ordinals(spec)
 
     printHeader()
     print()
+    print("/**")
+    print(" * Method classes and codecs generated from the AMQP specification.")
+    print(" * <p/>")
+    print(" * The decoders are static and keep no state between calls: anything")
+    print(" * they reuse is either passed in by the caller, like the flyweights of")
+    print(" * a {@link ReusableMethods}, which belong to one channel, or safe to")
+    print(" * share between threads, like {@link ShortstrInternCache#SHARED} and")
+    print(" * {@link MethodMetrics}. Any number of threads may therefore decode")
+    print(" * frames at once, as they do when connections decode on a worker pool.")
+    print(" */")
     print("public class AMQImpl implements AMQP {")
 
     for c in spec.allClasses(): printClassMethods(spec,c)
 
+    for c in spec.allClasses():
+        if c.hasContentProperties:
+            printLazyPropertiesClass(c)
+
+    printMethodOrdinals()
+    printReusableMethods()
     printMethodVisitor()
     printMethodArgumentReader()
+    printMethodArgumentBufferReader()
     printContentHeaderReader()
+    printLazyContentHeaderReader()
+
+    print("}")
+
+#--------------------------------------------------------------------------------
+
+# argument and property values used by the generated codec benchmarks,
+# named in CodecBenchmark
+javaBenchmarkValues = {
+    'int': '1',
+    'long': '1234567890123L',
+    'boolean': 'true',
+    'String': 'SHORTSTR',
+    'LongString': 'LONGSTR',
+    'Map<String,Object>': 'TABLE',
+    'Date': 'TIMESTAMP'
+    }
+
+def genJavaBenchmark(spec):
+    def printHeader():
+        printFileHeader()
+        print("package com.rabbitmq.client.test.performance;")
+        print()
+        print("import java.io.IOException;")
+        print("import java.util.ArrayList;")
+        print("import java.util.List;")
+        print()
+        print("import com.rabbitmq.client.AMQP;")
+        print("import com.rabbitmq.client.impl.AMQImpl;")
+        print()
+        print("import static com.rabbitmq.client.test.performance.CodecBenchmark.*;")
 
+    def benchmark_value(domain):
+        return javaBenchmarkValues[java_type(spec, domain)]
+
+    def printMethodBenchmarks(c, m):
+        args = ", ".join([benchmark_value(a.domain) for a in m.arguments])
+        print("        addMethod(benchmarks, \"%s.%s\"," % (c.name, m.name))
+        print("                  new AMQImpl.%s.%s(%s));" % (java_class_name(c.name), java_class_name(m.name), args))
+
+    def printPropertiesBenchmarks(c):
+        print("        addProperties(benchmarks, \"%s.properties\", new AMQP.%sProperties.Builder()" % (c.name, java_class_name(c.name)))
+        for f in c.fields:
+            print("                      .%s(%s)" % (java_field_name(f.name), benchmark_value(f.domain)))
+        print("                      .build());")
+
+    printHeader()
+    print()
+    print("/**")
+    print(" * Encode, decode and round-trip benchmarks of every method and")
+    print(" * content properties class in the spec, run by {@link CodecBenchmark}.")
+    print(" */")
+    print("public class CodecBenchmarkSuite {")
+    print("    public static List<Benchmark> benchmarks() throws IOException {")
+    print("        List<Benchmark> benchmarks = new ArrayList<Benchmark>();")
+    for c in spec.allClasses():
+        for m in c.allMethods():
+            if client_encodes(c, m) and client_decodes(c, m):
+                printMethodBenchmarks(c, m)
+        if c.hasContentProperties:
+            printPropertiesBenchmarks(c)
+    print("        return benchmarks;")
+    print("    }")
     print("}")
 
+def genPythonCapture(spec):
+    """A NumPy decoder for captured AMQP traffic. Frame boundaries are
+    indexed and fields decoded a whole column at a time, from tables of
+    the spec's methods and content properties."""
+    def printHeader():
+        print("""#   NOTE: This Python source code is autogenerated from the AMQP
+#         specification!
+#
+#  The contents of this file are subject to the Mozilla Public License
+#  Version 1.1 (the "License"); you may not use this file except in
+#  compliance with the License. You may obtain a copy of the License
+#  at http://www.mozilla.org/MPL/
+#
+#  Software distributed under the License is distributed on an "AS IS"
+#  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+#  the License for the specific language governing rights and
+#  limitations under the License.
+#
+#  The Original Code is RabbitMQ.
+#
+#  The Initial Developer of the Original Code is GoPivotal, Inc.
+#  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+#
+
+\"\"\"Bulk decoder for captured AMQP %d-%d-%d traffic.
+
+A capture is the raw byte stream received by one end of a connection,
+with or without the protocol header, as saved by a packet capture tool
+or by com.rabbitmq.tools.Tracer. The capture is memory-mapped and read
+in chunks. Each chunk's frame boundaries are found with one vectorised
+pass, and method and content header fields are then decoded into
+columns (NumPy arrays), one group of columns per method:
+
+    for chunk in iter_chunks("capture.bin"):
+        deliveries = decode_methods(chunk).get("basic.deliver")
+
+Run as a script to print a summary: a histogram of methods, the gaps
+in delivery tags on each channel, and content header statistics.
+\"\"\"
+
+from __future__ import print_function
+
+import sys
+from optparse import OptionParser
+
+import numpy as np
+""" % (spec.major, spec.minor, spec.revision))
+
+    def printConstants():
+        for (c, v, cls) in spec.constants:
+            print("%s = %d" % (java_constant_name(c), v))
+
+    def domain(d):
+        return spec.resolveDomain(d)
+
+    def printMethods():
+        ordinals = method_ordinals(spec)
+        print("# (class id, method id, name, [(argument, domain)...]), indexed by the")
+        print("# method ordinals used by com.rabbitmq.client.impl.AMQImpl")
+        print("METHODS = [")
+        for c in spec.allClasses():
+            for m in c.allMethods():
+                args = ", ".join(["(%r, %r)" % (str(a.name), str(domain(a.domain))) for a in m.arguments])
+                print("    (%d, %d, %r, [%s]),  # %d" % (c.index, m.index, str("%s.%s" % (c.name, m.name)), args, ordinals[(c.name, m.name)]))
+        print("]")
+        print()
+        print("METHOD_ORDINALS = dict(((classId << 16) | methodId, ordinal)")
+        print("                       for (ordinal, (classId, methodId, _, _))")
+        print("                       in enumerate(METHODS))")
+
+    def printProperties():
+        print("# class id -> (class name, number of flag words, [(property, domain)...])")
+        print("PROPERTIES = {")
+        for c in spec.allClasses():
+            if c.hasContentProperties:
+                fields = ", ".join(["(%r, %r)" % (str(f.name), str(domain(f.domain))) for f in c.fields])
+                print("    %d: (%r, %d, [%s])," % (c.index, str(c.name), property_flag_word_count(c), fields))
+        print("}")
+
+    def printRuntime():
+        print('''
+class MalformedCapture(Exception):
+    pass
+
+_FIXED_WIDTHS = {"octet": 1, "short": 2, "long": 4, "longlong": 8, "timestamp": 8}
+_FIXED_DTYPES = {"octet": np.uint8, "short": np.uint16, "long": np.uint32,
+                 "longlong": np.uint64, "timestamp": np.uint64}
+
+def _read_uint(data, offsets, width):
+    """The big-endian unsigned integer of the given width at each offset."""
+    value = np.zeros(len(offsets), dtype=np.uint64)
+    for i in range(width):
+        value = (value << np.uint64(8)) | data[offsets + i].astype(np.uint64)
+    return value
+
+class Spans(object):
+    """A column of variable-width values (strings and tables) left in
+    place in the capture: the offset and length of each value's bytes.
+    Absent values have a length of -1."""
+
+    def __init__(self, data, offsets, lengths):
+        self.data = data
+        self.offsets = offsets
+        self.lengths = lengths
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def present(self):
+        return self.lengths >= 0
+
+    def raw(self, i):
+        if self.lengths[i] < 0:
+            return None
+        return self.data[self.offsets[i]:self.offsets[i] + self.lengths[i]].tobytes()
+
+    def text(self, i):
+        raw = self.raw(i)
+        return None if raw is None else raw.decode("utf-8", "replace")
+
+    def texts(self):
+        return [self.text(i) for i in range(len(self))]
+
+class Frames(object):
+    """The complete frames found in part of a capture, as columns: the
+    offset of each frame, and its type, channel and payload size."""
+
+    def __init__(self, data, offset, type, channel, size):
+        self.data = data
+        self.offset = offset
+        self.type = type
+        self.channel = channel
+        self.size = size
+
+    def __len__(self):
+        return len(self.offset)
+
+    def payload(self):
+        return self.offset + 7
+
+def _candidates(data, start, stop, frame_max):
+    """Every offset in [start, stop) that could begin a complete frame: a
+    known frame type, a plausible size, and a frame-end octet where the
+    size says the frame ends. Returns the offsets and their frame ends."""
+    types = data[start:max(start, stop - 7)]
+    offsets = np.flatnonzero((types == FRAME_METHOD) | (types == FRAME_HEADER) |
+                             (types == FRAME_BODY) | (types == FRAME_HEARTBEAT))
+    offsets = offsets.astype(np.int64) + start
+    ends = offsets + 7 + _read_uint(data, offsets + 3, 4).astype(np.int64)
+    fits = (ends - offsets <= frame_max + 7) & (ends < stop)
+    offsets, ends = offsets[fits], ends[fits]
+    terminated = data[ends] == FRAME_END
+    return offsets[terminated], ends[terminated]
+
+def index_frames(data, start, stop, frame_max=1 << 31):
+    """Finds the complete frames in data[start:stop], given that a frame
+    begins at start. Returns the Frames and the offset just past the
+    last of them.
+
+    Candidate frame starts are found everywhere at once, and linked to
+    the candidate beginning where each ends; the frames are then the
+    chain of links from start, followed by pointer doubling so that no
+    per-frame Python code runs."""
+    offsets, ends = _candidates(data, start, stop, frame_max)
+    count = len(offsets)
+    if count == 0 or offsets[0] != start:
+        if stop - start >= 7:
+            size = int(_read_uint(data, np.array([start + 3]), 4)[0])
+            if start + 8 + size <= stop:
+                raise MalformedCapture("no valid frame at offset %d" % start)
+        return Frames(data, *([np.zeros(0, dtype=np.int64)] * 4)), start
+
+    # next[i] is the candidate following candidate i, or count if none
+    # does; count is a sentinel which follows itself
+    following = np.searchsorted(offsets, ends + 1)
+    linked = following < count
+    linked[linked] = offsets[following[linked]] == ends[linked] + 1
+    jump = np.where(linked, following, count)
+    jump = np.append(jump, count)
+
+    # After each round, reached holds the first 2**k frames of the
+    # chain and jump leads 2**k frames on
+    reached = np.zeros(count + 1, dtype=bool)
+    reached[0] = True
+    while True:
+        landed = jump[np.flatnonzero(reached)]
+        if reached[landed].all():
+            break
+        reached[landed] = True
+        jump = jump[jump]
+    reached = reached[:count]
+
+    offsets = offsets[reached]
+    end = int(ends[reached][-1]) + 1
+    return (Frames(data,
+                   offsets,
+                   data[offsets],
+                   _read_uint(data, offsets + 1, 2).astype(np.uint16),
+                   _read_uint(data, offsets + 3, 4).astype(np.int64)),
+            end)
+
+def open_capture(path):
+    """Memory-maps a capture, returning the data and the offset of its
+    first frame."""
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    if len(data) >= 8 and data[:4].tobytes() == b"AMQP":
+        return data, 8
+    return data, 0
+
+def iter_chunks(path, chunk_size=64 << 20, frame_max=1 << 31):
+    """Yields the Frames of a capture, a chunk of about chunk_size bytes
+    at a time. A truncated final frame is ignored."""
+    data, start = open_capture(path)
+    total = len(data)
+    stop = min(total, start + chunk_size)
+    while start < total:
+        frames, end = index_frames(data, start, stop, frame_max)
+        if end == start:
+            if stop == total:
+                break
+            # a frame bigger than a chunk
+            stop = min(total, stop + chunk_size)
+            continue
+        yield frames
+        start = end
+        stop = min(total, start + chunk_size)
+
+def _decode_field(data, pos, domain, present=None):
+    """Decodes one field of every frame, at the given offsets. Returns
+    the column and the offsets just past the field. Where present is
+    given, frames for which it is false lack the field."""
+    if present is not None:
+        at = np.where(present, pos, 0)
+    else:
+        at = pos
+    if domain in _FIXED_WIDTHS:
+        width = _FIXED_WIDTHS[domain]
+        values = _read_uint(data, at, width).astype(_FIXED_DTYPES[domain])
+        if present is None:
+            return values, pos + width
+        return np.ma.masked_array(values, mask=~present), pos + np.where(present, width, 0)
+    if domain == "shortstr":
+        prefix = 1
+        lengths = data[at].astype(np.int64)
+    else:
+        prefix = 4
+        lengths = _read_uint(data, at, 4).astype(np.int64)
+    if present is None:
+        return Spans(data, pos + prefix, lengths), pos + prefix + lengths
+    return (Spans(data, pos + prefix, np.where(present, lengths, -1)),
+            pos + np.where(present, prefix + lengths, 0))
+
+def _decode_arguments(data, pos, arguments, columns):
+    bit = 8
+    for (name, domain) in arguments:
+        if domain == "bit":
+            if bit == 8:
+                octet = data[pos]
+                pos = pos + 1
+                bit = 0
+            columns[name] = ((octet >> bit) & 1) != 0
+            bit += 1
+        else:
+            bit = 8
+            columns[name], pos = _decode_field(data, pos, domain)
+    return columns
+
+def method_keys(frames):
+    """The (class id << 16) | method id of each method frame, and the
+    selection of method frames."""
+    selected = frames.type == FRAME_METHOD
+    payload = frames.payload()[selected]
+    return _read_uint(frames.data, payload, 4).astype(np.int64), selected
+
+def decode_methods(frames):
+    """Decodes the method frames among frames. Returns a dict from method
+    name to columns: a dict holding the "offset" and "channel" of each
+    frame and a column per argument."""
+    data = frames.data
+    keys, selected = method_keys(frames)
+    offsets = frames.offset[selected]
+    channels = frames.channel[selected]
+    result = {}
+    for key in np.unique(keys):
+        which = keys == key
+        columns = {"offset": offsets[which], "channel": channels[which]}
+        ordinal = METHOD_ORDINALS.get(int(key))
+        if ordinal is None:
+            result["unknown.%d.%d" % (key >> 16, key & 0xffff)] = columns
+            continue
+        (_, _, name, arguments) = METHODS[ordinal]
+        result[name] = _decode_arguments(data, offsets[which] + 11, arguments, columns)
+    return result
+
+def decode_content_headers(frames):
+    """Decodes the content header frames among frames. Returns a dict from
+    class name to columns: "offset", "channel", "weight", "body-size"
+    and a column per property. Absent fixed-width properties are masked,
+    and absent strings and tables have a length of -1."""
+    data = frames.data
+    selected = frames.type == FRAME_HEADER
+    offsets = frames.offset[selected]
+    channels = frames.channel[selected]
+    payload = offsets + 7
+    classIds = _read_uint(data, payload, 2).astype(np.int64)
+    result = {}
+    for classId in np.unique(classIds):
+        which = classIds == classId
+        pos = payload[which]
+        columns = {"offset": offsets[which], "channel": channels[which],
+                   "weight": _read_uint(data, pos + 2, 2).astype(np.uint16),
+                   "body-size": _read_uint(data, pos + 4, 8).astype(np.uint64)}
+        if int(classId) not in PROPERTIES:
+            result["unknown.%d" % classId] = columns
+            continue
+        (name, flagWords, properties) = PROPERTIES[int(classId)]
+        pos = pos + 12
+        flags = []
+        for i in range(flagWords):
+            flags.append(_read_uint(data, pos, 2).astype(np.int64))
+            pos = pos + 2
+        for (i, (property, domain)) in enumerate(properties):
+            present = (flags[i // 15] & (1 << (15 - i % 15))) != 0
+            if domain == "bit":
+                columns[property] = present
+            else:
+                columns[property], pos = _decode_field(data, pos, domain, present)
+        result[name] = columns
+    return result
+
+class Summary(object):
+    """Statistics accumulated over the chunks of a capture."""
+
+    def __init__(self):
+        self.frameTypes = {}
+        self.methods = {}
+        self.lastDeliveryTag = {}
+        self.deliveryTagGaps = {}
+        self.headers = {}
+
+    def add(self, frames):
+        types, counts = np.unique(frames.type, return_counts=True)
+        for (t, n) in zip(types, counts):
+            self.frameTypes[int(t)] = self.frameTypes.get(int(t), 0) + int(n)
+
+        methods = decode_methods(frames)
+        for (name, columns) in methods.items():
+            self.methods[name] = self.methods.get(name, 0) + len(columns["offset"])
+        if "basic.deliver" in methods:
+            self.addDeliveries(methods["basic.deliver"])
+
+        for (name, columns) in decode_content_headers(frames).items():
+            self.addHeaders(name, columns)
+
+    def addDeliveries(self, columns):
+        channels = columns["channel"]
+        tags = columns["delivery-tag"].astype(np.int64)
+        for channel in np.unique(channels):
+            channelTags = tags[channels == channel]
+            channel = int(channel)
+            if channel in self.lastDeliveryTag:
+                channelTags = np.insert(channelTags, 0, self.lastDeliveryTag[channel])
+            self.lastDeliveryTag[channel] = int(channelTags[-1])
+            steps = np.diff(channelTags)
+            # a step back to 1 is a reopened channel, not a gap
+            gaps = int(np.count_nonzero(steps > 1))
+            if gaps:
+                self.deliveryTagGaps[channel] = self.deliveryTagGaps.get(channel, 0) + gaps
+
+    def addHeaders(self, name, columns):
+        stats = self.headers.setdefault(name, {"count": 0, "body-size-total": 0,
+                                               "body-size-max": 0, "present": {}})
+        bodySize = columns["body-size"]
+        stats["count"] += len(bodySize)
+        stats["body-size-total"] += int(bodySize.sum())
+        stats["body-size-max"] = max(stats["body-size-max"], int(bodySize.max()))
+        for (property, column) in columns.items():
+            if isinstance(column, Spans):
+                present = column.present()
+            elif isinstance(column, np.ma.MaskedArray):
+                present = ~np.ma.getmaskarray(column)
+            elif property in ("offset", "channel", "weight", "body-size"):
+                continue
+            else:
+                present = column
+            stats["present"][property] = (stats["present"].get(property, 0) +
+                                          int(np.count_nonzero(present)))
+
+    def printTo(self, out):
+        print("frames by type:", file=out)
+        for (t, n) in sorted(self.frameTypes.items()):
+            print("  %3d %12d" % (t, n), file=out)
+        print("methods:", file=out)
+        for (name, n) in sorted(self.methods.items(), key=lambda item: -item[1]):
+            print("  %-32s %12d" % (name, n), file=out)
+        print("delivery tag gaps by channel:", file=out)
+        for (channel, gaps) in sorted(self.deliveryTagGaps.items()):
+            print("  %5d %12d" % (channel, gaps), file=out)
+        for (name, stats) in sorted(self.headers.items()):
+            count = stats["count"]
+            print("%s content headers: %d, body size mean %.1f max %d" %
+                  (name, count, stats["body-size-total"] / float(max(count, 1)),
+                   stats["body-size-max"]), file=out)
+            for (property, n) in sorted(stats["present"].items()):
+                print("  %-32s %12d" % (property, n), file=out)
+
+def main(argv):
+    parser = OptionParser(usage="%prog [options] CAPTURE...")
+    parser.add_option("--chunk-size", type="int", default=64,
+                      help="bytes of capture to decode at a time, in MiB")
+    parser.add_option("--frame-max", type="int", default=1 << 31,
+                      help="largest frame payload to accept")
+    (options, paths) = parser.parse_args(argv)
+    if not paths:
+        parser.error("no capture given")
+    summary = Summary()
+    for path in paths:
+        for frames in iter_chunks(path, options.chunk_size << 20, options.frame_max):
+            summary.add(frames)
+    summary.printTo(sys.stdout)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])''')
+
+    printHeader()
+    printConstants()
+    print()
+    printMethods()
+    print()
+    printProperties()
+    printRuntime()
+
+pythonStandinHeader = '''#   NOTE: This Python source code is autogenerated from the AMQP
+#         specification!
+#
+#  The contents of this file are subject to the Mozilla Public License
+#  Version 1.1 (the "License"); you may not use this file except in
+#  compliance with the License. You may obtain a copy of the License
+#  at http://www.mozilla.org/MPL/
+#
+#  Software distributed under the License is distributed on an "AS IS"
+#  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+#  the License for the specific language governing rights and
+#  limitations under the License.
+#
+#  The Original Code is RabbitMQ.
+#
+#  The Initial Developer of the Original Code is GoPivotal, Inc.
+#  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+#
+
+"""Stand-in AMQP %d-%d-%d broker for load-testing clients.
+
+It does just enough for a client to run against it: the connection
+handshake, channels, and a -ok reply to every synchronous method. It
+also accepts publishes, delivers generated messages to every consumer
+at a configurable rate, and honours basic.qos prefetch. Publisher
+confirms are sent deterministically, one basic.ack for every
+--confirm-every publishes. Nothing is routed or stored, so the broker
+costs little and the client under test is the bottleneck.
+
+    python amqp_standin.py --port 5673 --rate 10000 --body-size 1024
+
+With --smoke-test it instead serves a few connections of its own on a
+free port, checking that it stays responsive, and exits.
+
+Every method and content properties class has a codec built from
+precompiled struct.Structs, generated from the spec. Requires Python 3.5
+or later.
+"""
+
+import asyncio
+import socket
+import struct
+import sys
+import threading
+import time
+from optparse import OptionParser
+'''
+
+pythonStandinCodecs = '''
+_FRAME_END = bytes((FRAME_END,))
+
+class MalformedFrame(Exception):
+    pass
+
+def _pack_shortstr(value):
+    if not isinstance(value, bytes):
+        value = value.encode("utf-8")
+    if len(value) > 255:
+        raise ValueError("short string too long: %d octets" % len(value))
+    return _S_B.pack(len(value)) + value
+
+def _pack_longstr(value):
+    if not isinstance(value, bytes):
+        value = value.encode("utf-8")
+    return _S_I.pack(len(value)) + value
+
+def _pack_field_value(value):
+    if isinstance(value, bool):
+        return b"t" + _S_B.pack(1 if value else 0)
+    if isinstance(value, int):
+        if -(1 << 31) <= value < (1 << 31):
+            return b"I" + _FIELD_STRUCTS[ord("I")].pack(value)
+        return b"l" + _FIELD_STRUCTS[ord("l")].pack(value)
+    if isinstance(value, float):
+        return b"d" + _FIELD_STRUCTS[ord("d")].pack(value)
+    if isinstance(value, (str, bytes)):
+        return b"S" + _pack_longstr(value)
+    if isinstance(value, dict):
+        return b"F" + _pack_table(value)
+    if isinstance(value, (list, tuple)):
+        items = b"".join([_pack_field_value(v) for v in value])
+        return b"A" + _S_I.pack(len(items)) + items
+    if value is None:
+        return b"V"
+    raise TypeError("cannot encode %r in a table" % (value,))
+
+def _pack_table(table):
+    if not table:
+        return _S_I.pack(0)
+    body = b"".join([_pack_shortstr(k) + _pack_field_value(v) for (k, v) in table.items()])
+    return _S_I.pack(len(body)) + body
+
+def _pack_flags(flags):
+    """Property flag words; all but the last have the continuation bit."""
+    last = len(flags) - 1
+    return b"".join([_S_H.pack(f | (1 if i < last else 0)) for (i, f) in enumerate(flags)])
+
+def _unpack_shortstr(buf, pos):
+    end = pos + 1 + buf[pos]
+    return bytes(buf[pos + 1:end]).decode("utf-8"), end
+
+def _unpack_longstr(buf, pos):
+    (length,) = _S_I.unpack_from(buf, pos)
+    end = pos + 4 + length
+    return bytes(buf[pos + 4:end]), end
+
+# table field types with a fixed width
+_FIELD_STRUCTS = {
+    ord("I"): struct.Struct(">i"),
+    ord("T"): struct.Struct(">Q"),
+    ord("b"): struct.Struct(">b"),
+    ord("d"): struct.Struct(">d"),
+    ord("f"): struct.Struct(">f"),
+    ord("l"): struct.Struct(">q"),
+    ord("s"): struct.Struct(">h"),
+    ord("t"): struct.Struct(">B"),
+    ord("D"): struct.Struct(">Bi"),
+}
+
+def _unpack_field_value(buf, pos):
+    kind = buf[pos]
+    pos += 1
+    fixed = _FIELD_STRUCTS.get(kind)
+    if fixed is not None:
+        value = fixed.unpack_from(buf, pos)
+        pos += fixed.size
+        if kind == ord("t"):
+            return value[0] != 0, pos
+        if kind == ord("D"):
+            return value, pos
+        return value[0], pos
+    if kind in (ord("S"), ord("x")):
+        return _unpack_longstr(buf, pos)
+    if kind == ord("F"):
+        return _unpack_table(buf, pos)
+    if kind == ord("A"):
+        (length,) = _S_I.unpack_from(buf, pos)
+        (pos, end) = (pos + 4, pos + 4 + length)
+        items = []
+        while pos < end:
+            (value, pos) = _unpack_field_value(buf, pos)
+            items.append(value)
+        return items, end
+    if kind == ord("V"):
+        return None, pos
+    raise MalformedFrame("unknown table field type %r" % chr(kind))
+
+def _unpack_table(buf, pos):
+    (length,) = _S_I.unpack_from(buf, pos)
+    (pos, end) = (pos + 4, pos + 4 + length)
+    table = {}
+    while pos < end:
+        (key, pos) = _unpack_shortstr(buf, pos)
+        (value, pos) = _unpack_field_value(buf, pos)
+        table.setdefault(key, value)
+    return table, end
+
+def _unpack_flags(buf, pos, count):
+    flags = []
+    for i in range(count):
+        (word,) = _S_H.unpack_from(buf, pos)
+        flags.append(word)
+        pos += 2
+    return flags, pos
+
+class Method(object):
+    __slots__ = ()
+
+    def __repr__(self):
+        return "%s(%s)" % (self.NAME, ", ".join(["%s=%r" % (name, getattr(self, name))
+                                                 for name in self.__slots__]))
+
+class Properties(object):
+    __slots__ = ()
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__,
+                           ", ".join(["%s=%r" % (name, getattr(self, name))
+                                      for name in self.__slots__
+                                      if getattr(self, name) is not None]))
+
+def method_frame(channel, method):
+    payload = method.encode()
+    return _S_BHI.pack(FRAME_METHOD, channel, len(payload)) + payload + _FRAME_END
+
+def content_frames(channel, properties, body, frame_max):
+    """The content header and body frames carrying a message."""
+    header = _S_HHQ.pack(properties.CLASS_ID, 0, len(body)) + properties.encode()
+    frames = [_S_BHI.pack(FRAME_HEADER, channel, len(header)), header, _FRAME_END]
+    step = frame_max - 8
+    for start in range(0, len(body), step):
+        chunk = body[start:start + step]
+        frames.extend([_S_BHI.pack(FRAME_BODY, channel, len(chunk)), chunk, _FRAME_END])
+    return b"".join(frames)
+
+def decode_method(payload):
+    (classId, methodId) = _S_HH.unpack_from(payload, 0)
+    cls = METHODS.get((classId << 16) | methodId)
+    if cls is None:
+        raise MalformedFrame("unknown method %d.%d" % (classId, methodId))
+    return cls.decode(payload, 4)
+
+def decode_content_header(payload):
+    """The properties and body size of a content header frame."""
+    (classId, weight, bodySize) = _S_HHQ.unpack_from(payload, 0)
+    cls = PROPERTIES.get(classId)
+    if cls is None:
+        raise MalformedFrame("unknown content class %d" % classId)
+    return cls.decode(payload, 12), bodySize'''
+
+pythonStandinBroker = '''
+
+SERVER_PROPERTIES = {
+    "product": "AMQP stand-in broker",
+    "capabilities": {
+        "publisher_confirms": True,
+        "exchange_exchange_bindings": True,
+        "basic.nack": True,
+        "consumer_cancel_notify": True,
+        "connection.blocked": True,
+        "authentication_failure_close": True,
+        "per_consumer_qos": True,
+    },
+}
+
+class Config(object):
+    host = "127.0.0.1"
+    port = 5672
+    rate = 0              # deliveries per second per consumer, 0 for no limit
+    body_size = 256
+    frame_max = 131072
+    channel_max = 2047
+    heartbeat = 0
+    confirm_every = 1     # publishes per confirm
+    report = 1.0          # seconds between statistics lines, 0 for none
+
+class Stats(object):
+    FIELDS = ("published", "confirmed", "delivered", "acked", "nacked")
+
+    def __init__(self):
+        self.connections = 0
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def snapshot(self):
+        return dict((field, getattr(self, field)) for field in self.FIELDS)
+
+class Consumer(object):
+    def __init__(self, tag, queue, no_ack):
+        self.tag = tag
+        self.queue = queue
+        self.no_ack = no_ack
+        self.active = True
+        self.task = None
+
+class ChannelState(object):
+    def __init__(self, number):
+        self.number = number
+        self.prefetch = 0
+        self.unacked = set()
+        self.credit = asyncio.Event()
+        self.credit.set()
+        self.consumers = {}
+        self.confirming = False
+        self.published = 0
+        self.confirmed = 0
+        self.nextDeliveryTag = 1
+        self.content = None        # the publish awaiting its content
+        self.remaining = 0         # body octets still to come
+
+    def deliveryTag(self):
+        tag = self.nextDeliveryTag
+        self.nextDeliveryTag += 1
+        return tag
+
+    def release(self, tag, multiple):
+        """Forgets acknowledged deliveries; returns how many."""
+        if multiple:
+            released = set(t for t in self.unacked if tag == 0 or t <= tag)
+            self.unacked -= released
+            count = len(released)
+        else:
+            count = 1 if tag in self.unacked else 0
+            self.unacked.discard(tag)
+        self.credit.set()
+        return count
+
+    def stop(self):
+        for consumer in self.consumers.values():
+            consumer.active = False
+            if consumer.task is not None:
+                consumer.task.cancel()
+        self.consumers.clear()
+
+class Connection(object):
+    def __init__(self, broker, reader, writer):
+        self.broker = broker
+        self.config = broker.config
+        self.stats = broker.stats
+        self.reader = reader
+        self.writer = writer
+        self.channels = {}
+        self.frameMax = self.config.frame_max
+        self.content = None
+        self.closing = False
+        self.opened = False
+        self.tasks = []
+
+    def send(self, channel, method):
+        self.writer.write(method_frame(channel, method))
+
+    def message(self, channel):
+        """The content frames of the generated message; the same for
+        every delivery on a connection but for the channel number."""
+        if self.content is None:
+            self.content = {}
+        frames = self.content.get(channel)
+        if frames is None:
+            frames = content_frames(channel, BasicProperties(delivery_mode=1),
+                                    b"x" * self.config.body_size, self.frameMax)
+            self.content[channel] = frames
+        return frames
+
+    async def run(self):
+        try:
+            header = await self.reader.readexactly(8)
+            if header != PROTOCOL_HEADER:
+                self.writer.write(PROTOCOL_HEADER)
+                return
+            self.send(0, ConnectionStart(server_properties=SERVER_PROPERTIES,
+                                         mechanisms="PLAIN AMQPLAIN", locales="en_US"))
+            while not self.closing:
+                (kind, channel, size) = _S_BHI.unpack(await self.reader.readexactly(7))
+                frame = memoryview(await self.reader.readexactly(size + 1))
+                if frame[size] != FRAME_END:
+                    raise MalformedFrame("missing frame end on channel %d" % channel)
+                payload = frame[:size]
+                if kind == FRAME_METHOD:
+                    self.dispatch(channel, decode_method(payload))
+                elif kind == FRAME_HEADER:
+                    self.contentHeader(channel, payload)
+                elif kind == FRAME_BODY:
+                    self.contentBody(channel, size)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        for state in self.channels.values():
+            state.stop()
+        self.channels.clear()
+        for task in self.tasks:
+            task.cancel()
+        if self.opened:
+            self.opened = False
+            self.stats.connections -= 1
+        self.writer.close()
+
+    def dispatch(self, channel, method):
+        handler = getattr(self, "on_" + method.NAME.replace(".", "_").replace("-", "_"), None)
+        if handler is not None:
+            handler(channel, method)
+        elif type(method) in RESPONSES and not getattr(method, "nowait", False):
+            self.send(channel, RESPONSES[type(method)]())
+
+    # connection class
+
+    def on_connection_start_ok(self, channel, method):
+        self.send(0, ConnectionTune(channel_max=self.config.channel_max,
+                                    frame_max=self.config.frame_max,
+                                    heartbeat=self.config.heartbeat))
+
+    def on_connection_tune_ok(self, channel, method):
+        if method.frame_max:
+            self.frameMax = min(self.frameMax, method.frame_max)
+        if method.heartbeat:
+            self.tasks.append(asyncio.ensure_future(self.heartbeats(method.heartbeat)))
+
+    def on_connection_open(self, channel, method):
+        self.opened = True
+        self.stats.connections += 1
+        self.send(0, ConnectionOpenOk())
+
+    def on_connection_close(self, channel, method):
+        self.send(0, ConnectionCloseOk())
+        self.closing = True
+
+    def on_connection_close_ok(self, channel, method):
+        self.closing = True
+
+    async def heartbeats(self, interval):
+        heartbeat = _S_BHI.pack(FRAME_HEARTBEAT, 0, 0) + _FRAME_END
+        while True:
+            await asyncio.sleep(interval / 2.0)
+            self.writer.write(heartbeat)
+
+    # channel class
+
+    def on_channel_open(self, channel, method):
+        self.channels[channel] = ChannelState(channel)
+        self.send(channel, ChannelOpenOk())
+
+    def on_channel_close(self, channel, method):
+        state = self.channels.pop(channel, None)
+        if state is not None:
+            state.stop()
+        self.send(channel, ChannelCloseOk())
+
+    def on_channel_close_ok(self, channel, method):
+        self.channels.pop(channel, None)
+
+    def on_channel_flow(self, channel, method):
+        self.send(channel, ChannelFlowOk(active=method.active))
+
+    # queue class
+
+    def on_queue_declare(self, channel, method):
+        queue = method.queue or "amq.gen-%d" % self.broker.nextId()
+        if not method.nowait:
+            self.send(channel, QueueDeclareOk(queue=queue))
+
+    # basic class
+
+    def on_basic_qos(self, channel, method):
+        self.channels[channel].prefetch = method.prefetch_count
+        self.send(channel, BasicQosOk())
+
+    def on_basic_consume(self, channel, method):
+        state = self.channels[channel]
+        tag = method.consumer_tag or "amq.ctag-%d" % self.broker.nextId()
+        consumer = Consumer(tag, method.queue, method.no_ack)
+        state.consumers[tag] = consumer
+        if not method.nowait:
+            self.send(channel, BasicConsumeOk(consumer_tag=tag))
+        consumer.task = asyncio.ensure_future(self.deliver(state, consumer))
+
+    def on_basic_cancel(self, channel, method):
+        state = self.channels[channel]
+        consumer = state.consumers.pop(method.consumer_tag, None)
+        if consumer is not None:
+            consumer.active = False
+            consumer.task.cancel()
+        if not method.nowait:
+            self.send(channel, BasicCancelOk(consumer_tag=method.consumer_tag))
+
+    def on_basic_get(self, channel, method):
+        state = self.channels[channel]
+        tag = state.deliveryTag()
+        if not method.no_ack:
+            state.unacked.add(tag)
+        self.send(channel, BasicGetOk(delivery_tag=tag, routing_key=method.queue))
+        self.writer.write(self.message(channel))
+        self.stats.delivered += 1
+
+    def on_basic_publish(self, channel, method):
+        self.channels[channel].content = method
+
+    def contentHeader(self, channel, payload):
+        state = self.channels[channel]
+        (properties, bodySize) = decode_content_header(payload)
+        state.remaining = bodySize
+        if bodySize == 0:
+            self.published(state)
+
+    def contentBody(self, channel, size):
+        state = self.channels[channel]
+        state.remaining -= size
+        if state.remaining <= 0:
+            self.published(state)
+
+    def published(self, state):
+        state.content = None
+        self.stats.published += 1
+        if state.confirming:
+            state.published += 1
+            if state.published - state.confirmed >= self.config.confirm_every:
+                multiple = state.published - state.confirmed > 1
+                self.send(state.number, BasicAck(delivery_tag=state.published, multiple=multiple))
+                self.stats.confirmed += state.published - state.confirmed
+                state.confirmed = state.published
+
+    def on_basic_ack(self, channel, method):
+        self.stats.acked += self.channels[channel].release(method.delivery_tag, method.multiple)
+
+    def on_basic_nack(self, channel, method):
+        self.stats.nacked += self.channels[channel].release(method.delivery_tag, method.multiple)
+
+    def on_basic_reject(self, channel, method):
+        self.stats.nacked += self.channels[channel].release(method.delivery_tag, False)
+
+    async def deliver(self, state, consumer):
+        """Delivers generated messages to a consumer until it is
+        cancelled, at the configured rate and within the prefetch."""
+        loop = asyncio.get_event_loop()
+        interval = 1.0 / self.config.rate if self.config.rate else 0
+        due = loop.time()
+        sent = 0
+        content = self.message(state.number)
+        while consumer.active and not self.writer.transport.is_closing():
+            if not consumer.no_ack and state.prefetch and len(state.unacked) >= state.prefetch:
+                state.credit.clear()
+                await self.writer.drain()
+                await state.credit.wait()
+                continue
+            tag = state.deliveryTag()
+            if not consumer.no_ack:
+                state.unacked.add(tag)
+            self.writer.write(method_frame(state.number, BasicDeliver(
+                consumer_tag=consumer.tag, delivery_tag=tag, routing_key=consumer.queue)))
+            self.writer.write(content)
+            self.stats.delivered += 1
+            sent += 1
+            if interval:
+                due += interval
+                delay = due - loop.time()
+                if delay > 0:
+                    await self.writer.drain()
+                    await asyncio.sleep(delay)
+                    continue
+            if sent % 64 == 0:
+                await self.writer.drain()
+                # drain() only waits once the transport's buffer is
+                # full, so yield anyway to let other connections run
+                await asyncio.sleep(0)
+
+    # confirm class
+
+    def on_confirm_select(self, channel, method):
+        self.channels[channel].confirming = True
+        if not method.nowait:
+            self.send(channel, ConfirmSelectOk())
+
+class Broker(object):
+    def __init__(self, config):
+        self.config = config
+        self.stats = Stats()
+        self.ids = 0
+
+    def nextId(self):
+        self.ids += 1
+        return self.ids
+
+    async def serve(self, reader, writer):
+        await Connection(self, reader, writer).run()
+
+    async def report(self):
+        loop = asyncio.get_event_loop()
+        (then, before) = (loop.time(), self.stats.snapshot())
+        while True:
+            await asyncio.sleep(self.config.report)
+            (now, after) = (loop.time(), self.stats.snapshot())
+            rates = ["%s/s %.0f" % (field, (after[field] - before[field]) / (now - then))
+                     for field in Stats.FIELDS]
+            print("connections %d, %s" % (self.stats.connections, ", ".join(rates)))
+            sys.stdout.flush()
+            (then, before) = (now, after)
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise EOFError("connection closed by the broker")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+def _client_method(sock):
+    """Reads frames until a method frame, returning its method."""
+    while True:
+        (kind, channel, size) = _S_BHI.unpack(_recv_exactly(sock, 7))
+        payload = _recv_exactly(sock, size + 1)[:size]
+        if kind == FRAME_METHOD:
+            return decode_method(payload)
+
+def _client_connect(port, timeout):
+    """A blocking client socket that has opened an AMQP connection."""
+    sock = socket.create_connection(("127.0.0.1", port), timeout)
+    sock.sendall(PROTOCOL_HEADER)
+    _client_method(sock)
+    sock.sendall(method_frame(0, ConnectionStartOk(response=b"\\0guest\\0guest")))
+    tune = _client_method(sock)
+    sock.sendall(method_frame(0, ConnectionTuneOk(frame_max=tune.frame_max)) +
+                 method_frame(0, ConnectionOpen()))
+    _client_method(sock)
+    return sock
+
+def _client_discard(sock):
+    try:
+        while sock.recv(65536):
+            pass
+    except (socket.error, ValueError):
+        pass
+
+def _wait_until(condition, timeout):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+def smoke_test(config, timeout=5.0):
+    """Runs the broker on a free port with an unthrottled no-ack
+    consumer read as fast as possible, and checks that a second
+    connection still opens and that the consumer stops once its client
+    leaves. Returns an exit status."""
+    config.rate = 0
+    broker = Broker(config)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = loop.run_until_complete(asyncio.start_server(broker.serve, "127.0.0.1", 0))
+    port = server.sockets[0].getsockname()[1]
+    serving = threading.Thread(target=loop.run_forever)
+    serving.daemon = True
+    serving.start()
+    failures = []
+    try:
+        consumer = _client_connect(port, timeout)
+        consumer.sendall(method_frame(1, ChannelOpen()) +
+                         method_frame(1, BasicConsume(queue="smoke-test", no_ack=True)))
+        reading = threading.Thread(target=_client_discard, args=(consumer,))
+        reading.daemon = True
+        reading.start()
+        if not _wait_until(lambda: broker.stats.delivered > 0, timeout):
+            failures.append("no deliveries to the consumer")
+        started = time.time()
+        try:
+            _client_connect(port, timeout).close()
+            print("second connection opened in %.3fs" % (time.time() - started))
+        except (socket.timeout, EOFError) as e:
+            failures.append("second connection did not open: %r" % e)
+        consumer.shutdown(socket.SHUT_RDWR)
+        consumer.close()
+        if not _wait_until(lambda: broker.stats.connections == 0, timeout):
+            failures.append("broker still serving the consumer after its client left")
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        serving.join(timeout)
+    for failure in failures:
+        print("FAILED: " + failure)
+    print("smoke test %s, %d deliveries" % ("failed" if failures else "passed",
+                                            broker.stats.delivered))
+    return 1 if failures else 0
+
+def main(argv):
+    config = Config()
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option("--host", default=config.host)
+    parser.add_option("--port", type="int", default=config.port)
+    parser.add_option("--rate", type="float", default=config.rate,
+                      help="deliveries per second per consumer, 0 for no limit")
+    parser.add_option("--body-size", type="int", default=config.body_size)
+    parser.add_option("--frame-max", type="int", default=config.frame_max)
+    parser.add_option("--channel-max", type="int", default=config.channel_max)
+    parser.add_option("--heartbeat", type="int", default=config.heartbeat)
+    parser.add_option("--confirm-every", type="int", default=config.confirm_every,
+                      help="publishes confirmed by each basic.ack")
+    parser.add_option("--report", type="float", default=config.report,
+                      help="seconds between statistics lines, 0 for none")
+    parser.add_option("--smoke-test", action="store_true", default=False,
+                      help="check the broker stays responsive under load, then exit")
+    (options, args) = parser.parse_args(argv)
+    for name in ("host", "port", "rate", "body_size", "frame_max", "channel_max",
+                 "heartbeat", "confirm_every", "report"):
+        setattr(config, name, getattr(options, name))
+    if options.smoke_test:
+        sys.exit(smoke_test(config))
+
+    broker = Broker(config)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = loop.run_until_complete(asyncio.start_server(broker.serve, config.host, config.port))
+    if config.report:
+        asyncio.ensure_future(broker.report())
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])'''
+
+
+# struct format characters of the fixed-width domains
+pythonStructFormats = {
+    'octet': 'B',
+    'short': 'H',
+    'long': 'I',
+    'longlong': 'Q',
+    'timestamp': 'Q'
+    }
+
+def python_name(name):
+    """A Python identifier for a spec name; keywords get a trailing _"""
+    identifier = name.replace('-', '_')
+    if keyword.iskeyword(identifier):
+        identifier += '_'
+    return identifier
+
+def python_default_value(domain, value):
+    if domain == 'table':
+        return 'None'
+    elif domain == 'bit':
+        return repr(bool(value))
+    elif domain in ('shortstr', 'longstr'):
+        return repr(str(value or ''))
+    else:
+        return repr(int(value or 0))
+
+def python_struct_runs(spec, arguments):
+    """Splits arguments into runs encoded with one precompiled struct
+    (fixed-width arguments and packed bits) and the variable-width
+    arguments between them. A run is ('struct', format, items) where
+    each item is an argument or a list of the bit arguments packed into
+    one octet; other runs are (domain, argument)."""
+    runs = []
+    for a in arguments:
+        d = spec.resolveDomain(a.domain)
+        if d in pythonStructFormats or d == 'bit':
+            if not runs or runs[-1][0] != 'struct':
+                runs.append(('struct', '', []))
+            (_, fmt, items) = runs[-1]
+            if d == 'bit':
+                if items and isinstance(items[-1], list) and len(items[-1]) < 8:
+                    items[-1].append(a)
+                    continue
+                items.append([a])
+                fmt += 'B'
+            else:
+                items.append(a)
+                fmt += pythonStructFormats[d]
+            runs[-1] = ('struct', fmt, items)
+        else:
+            runs.append((d, a))
+    return runs
+
+def genPythonStandin(spec):
+    """An asyncio stand-in broker for load-testing clients, built on
+    precompiled struct codecs generated for every method and content
+    properties class."""
+    structs = set(['BHI', 'HH', 'HHQ', 'H'])
+
+    def struct_name(fmt):
+        return '_S_' + fmt
+
+    def class_name(c, m):
+        return java_class_name(c.name) + java_class_name(m.name)
+
+    def printMethodClass(c, m):
+        runs = python_struct_runs(spec, m.arguments)
+        names = [python_name(a.name) for a in m.arguments]
+        print()
+        print("class %s(Method):" % class_name(c, m))
+        print("    CLASS_ID = %d" % c.index)
+        print("    METHOD_ID = %d" % m.index)
+        print("    NAME = %r" % str("%s.%s" % (c.name, m.name)))
+        print("    SYNCHRONOUS = %r" % bool(m.isSynchronous))
+        print("    HAS_CONTENT = %r" % bool(m.hasContent))
+        print("    __slots__ = (%s)" % "".join(["%r, " % str(n) for n in names]))
+        print("    _IDS = _S_HH.pack(%d, %d)" % (c.index, m.index))
+        print()
+        params = ["%s=%s" % (python_name(a.name), python_default_value(spec.resolveDomain(a.domain), a.defaultvalue))
+                  for a in m.arguments]
+        print("    def __init__(%s):" % ", ".join(["self"] + params))
+        for n in names:
+            print("        self.%s = %s" % (n, n))
+        if not names:
+            print("        pass")
+        print()
+        print("    def encode(self):")
+        print("        parts = [self._IDS]")
+        for run in runs:
+            if run[0] == 'struct':
+                (_, fmt, items) = run
+                structs.add(fmt)
+                values = []
+                for item in items:
+                    if isinstance(item, list):
+                        values.append(" | ".join(["(%d if self.%s else 0)" % (1 << i, python_name(a.name))
+                                                  for (i, a) in enumerate(item)]))
+                    else:
+                        values.append("self.%s" % python_name(item.name))
+                print("        parts.append(%s.pack(%s))" % (struct_name(fmt), ", ".join(values)))
+            else:
+                (d, a) = run
+                print("        parts.append(_pack_%s(self.%s))" % (d, python_name(a.name)))
+        print("        return b\"\".join(parts)")
+        print()
+        print("    @classmethod")
+        print("    def decode(cls, buf, pos):")
+        bitOctet = 0
+        for run in runs:
+            if run[0] == 'struct':
+                (_, fmt, items) = run
+                targets = []
+                bits = []
+                for item in items:
+                    if isinstance(item, list):
+                        targets.append("_bits%d" % bitOctet)
+                        bits.append(("_bits%d" % bitOctet, item))
+                        bitOctet += 1
+                    else:
+                        targets.append(python_name(item.name))
+                print("        (%s,) = %s.unpack_from(buf, pos)" % (", ".join(targets), struct_name(fmt)))
+                print("        pos += %s.size" % struct_name(fmt))
+                for (octet, item) in bits:
+                    for (i, a) in enumerate(item):
+                        print("        %s = (%s & %d) != 0" % (python_name(a.name), octet, 1 << i))
+            else:
+                (d, a) = run
+                print("        (%s, pos) = _unpack_%s(buf, pos)" % (python_name(a.name), d))
+        print("        return cls(%s)" % ", ".join(names))
+
+    def printPropertiesClass(c):
+        names = [python_name(f.name) for f in c.fields]
+        words = property_flag_word_count(c)
+        print()
+        print("class %sProperties(Properties):" % java_class_name(c.name))
+        print("    CLASS_ID = %d" % c.index)
+        print("    __slots__ = (%s)" % "".join(["%r, " % str(n) for n in names]))
+        print()
+        print("    def __init__(%s):" % ", ".join(["self"] + ["%s=None" % n for n in names]))
+        for n in names:
+            print("        self.%s = %s" % (n, n))
+        print()
+        print("    def encode(self):")
+        print("        flags = [0] * %d" % words)
+        print("        parts = []")
+        for (i, f) in enumerate(c.fields):
+            d = spec.resolveDomain(f.domain)
+            n = python_name(f.name)
+            (word, bit) = (i // 15, 15 - i % 15)
+            if d == 'bit':
+                print("        if self.%s:" % n)
+                print("            flags[%d] |= 0x%04x" % (word, 1 << bit))
+                continue
+            print("        if self.%s is not None:" % n)
+            print("            flags[%d] |= 0x%04x" % (word, 1 << bit))
+            if d in pythonStructFormats:
+                structs.add(pythonStructFormats[d])
+                print("            parts.append(%s.pack(self.%s))" % (struct_name(pythonStructFormats[d]), n))
+            else:
+                print("            parts.append(_pack_%s(self.%s))" % (d, n))
+        print("        return _pack_flags(flags) + b\"\".join(parts)")
+        print()
+        print("    @classmethod")
+        print("    def decode(cls, buf, pos):")
+        print("        (flags, pos) = _unpack_flags(buf, pos, %d)" % words)
+        for (i, f) in enumerate(c.fields):
+            d = spec.resolveDomain(f.domain)
+            n = python_name(f.name)
+            (word, bit) = (i // 15, 15 - i % 15)
+            test = "flags[%d] & 0x%04x" % (word, 1 << bit)
+            if d == 'bit':
+                print("        %s = (%s) != 0" % (n, test))
+                continue
+            print("        %s = None" % n)
+            print("        if %s:" % test)
+            if d in pythonStructFormats:
+                fmt = pythonStructFormats[d]
+                print("            (%s,) = %s.unpack_from(buf, pos)" % (n, struct_name(fmt)))
+                print("            pos += %s.size" % struct_name(fmt))
+            else:
+                print("            (%s, pos) = _unpack_%s(buf, pos)" % (n, d))
+        print("        return cls(%s)" % ", ".join(names))
+
+    def printTables():
+        print()
+        print("# (class id << 16) | method id -> method class")
+        print("METHODS = dict(((m.CLASS_ID << 16) | m.METHOD_ID, m) for m in [")
+        for c in spec.allClasses():
+            for m in c.allMethods():
+                print("    %s," % class_name(c, m))
+        print("])")
+        print()
+        print("# class id -> content properties class")
+        print("PROPERTIES = dict((p.CLASS_ID, p) for p in [")
+        for c in spec.allClasses():
+            if c.hasContentProperties:
+                print("    %sProperties," % java_class_name(c.name))
+        print("])")
+        print()
+        print("# synchronous method -> the -ok method the broker replies with")
+        print("RESPONSES = {")
+        for c in spec.allClasses():
+            byName = dict([(m.name, m) for m in c.allMethods()])
+            for m in c.allMethods():
+                ok = byName.get(m.name + "-ok")
+                if m.isSynchronous and ok is not None:
+                    print("    %s: %s," % (class_name(c, m), class_name(c, ok)))
+        print("}")
+
+    # generated first so that the structs they use are known
+    stdout = sys.stdout
+    body = StringIO()
+    try:
+        sys.stdout = body
+        for c in spec.allClasses():
+            for m in c.allMethods():
+                printMethodClass(c, m)
+        for c in spec.allClasses():
+            if c.hasContentProperties:
+                printPropertiesClass(c)
+        printTables()
+    finally:
+        sys.stdout = stdout
+
+    print(pythonStandinHeader % (spec.major, spec.minor, spec.revision))
+    for (c, v, cls) in spec.constants:
+        print("%s = %d" % (java_constant_name(c), v))
+    print("PROTOCOL_HEADER = b\"AMQP\\x00\\x%02x\\x%02x\\x%02x\"" % (spec.major, spec.minor, spec.revision))
+    print()
+    for fmt in sorted(structs):
+        print("%s = struct.Struct(\">%s\")" % (struct_name(fmt), fmt))
+    print(pythonStandinCodecs)
+    sys.stdout.write(body.getvalue())
+    print(pythonStandinBroker)
+
 #--------------------------------------------------------------------------------
 
 def generateJavaApi(specPath):
@@ -585,5 +3125,166 @@ def generateJavaApi(specPath):
 def generateJavaImpl(specPath):
     genJavaImpl(AmqpSpec(specPath))
 
+def generateJavaBenchmark(specPath):
+    genJavaBenchmark(AmqpSpec(specPath))
+
+def generatePythonCapture(specPath):
+    genPythonCapture(AmqpSpec(specPath))
+
+def generatePythonStandin(specPath):
+    genPythonStandin(AmqpSpec(specPath))
+
+# Files written by "codegen.py all": whether each belongs to the library
+# ("main"), to the tests ("test") or to the Python tools ("python"), its
+# path relative to the output directory for that tree, and the function
+# generating it from the parsed spec.
+generatedOutputs = [
+    ("main", "com/rabbitmq/client/AMQP.java", genJavaApi),
+    ("main", "com/rabbitmq/client/impl/AMQImpl.java", genJavaImpl),
+    ("test", "com/rabbitmq/client/test/performance/CodecBenchmarkSuite.java", genJavaBenchmark),
+    ("python", "amqp_capture.py", genPythonCapture),
+    ("python", "amqp_standin.py", genPythonStandin),
+]
+
+def spec_cache_key(specPaths):
+    """Hash of everything the parsed model depends on: the spec files,
+    the parser in amqp_codegen, the parser options and the pickle
+    format of this interpreter."""
+    digest = hashlib.sha1()
+    parserPath = sys.modules[AmqpSpec.__module__].__file__
+    if parserPath.endswith(".pyc") or parserPath.endswith(".pyo"):
+        parserPath = parserPath[:-1]
+    for path in list(specPaths) + [parserPath]:
+        f = open(path, 'rb')
+        try:
+            digest.update(f.read())
+        finally:
+            f.close()
+        digest.update(b"\0")
+    digest.update(repr((AmqpSpec.ignore_conflicts,
+                        sys.version_info[0],
+                        pickle.HIGHEST_PROTOCOL)).encode("utf-8"))
+    return digest.hexdigest()
+
+def load_spec(specPaths, cacheDir):
+    """Parses the spec, reusing the model pickled in cacheDir by an
+    earlier run over identical inputs. A missing or unreadable cache
+    entry just means parsing again."""
+    if cacheDir is None:
+        return AmqpSpec(specPaths)
+    cachePath = os.path.join(cacheDir, "spec-%s.pickle" % spec_cache_key(specPaths))
+    try:
+        f = open(cachePath, 'rb')
+        try:
+            return pickle.load(f)
+        finally:
+            f.close()
+    except Exception:
+        pass
+    spec = AmqpSpec(specPaths)
+    try:
+        if not os.path.isdir(cacheDir):
+            os.makedirs(cacheDir)
+        tmpPath = "%s.%d.tmp" % (cachePath, os.getpid())
+        f = open(tmpPath, 'wb')
+        try:
+            pickle.dump(spec, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+        os.rename(tmpPath, cachePath)
+    except Exception:
+        pass
+    return spec
+
+def render(generator, spec):
+    stdout = sys.stdout
+    buffer = StringIO()
+    try:
+        sys.stdout = buffer
+        generator(spec)
+    finally:
+        sys.stdout = stdout
+    return buffer.getvalue().encode("utf-8")
+
+def write_if_changed(path, contents):
+    """Writes contents to path unless it already holds exactly those
+    bytes, so that an unchanged output keeps its timestamp and is not
+    recompiled. Returns whether the file was written."""
+    if os.path.isfile(path):
+        f = open(path, 'rb')
+        try:
+            if f.read() == contents:
+                return False
+        finally:
+            f.close()
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    f = open(path, 'wb')
+    try:
+        f.write(contents)
+    finally:
+        f.close()
+    return True
+
+def generate_all(argv):
+    """codegen.py all [--cache-dir DIR] [--test-out TESTDIR]
+                      [--python-out PYDIR] [--ignore-conflicts]
+                      [--trim-for-client] [--no-method-metrics]
+                      [--profile FILE] SPEC... OUTDIR
+
+    Parses the spec once and generates every library file in
+    generatedOutputs under OUTDIR, and every test and Python file under
+    TESTDIR and PYDIR if they are given. Nothing is written unless every output generated
+    successfully, and outputs whose contents did not change are left
+    untouched. A profile, as written by MethodStatistics.writeProfile,
+    orders method decoding hot-first and confines the specialised fast
+    paths to the methods it shows to be frequent."""
+    parser = OptionParser(usage="%prog all [options] SPEC... OUTDIR")
+    parser.add_option("--cache-dir", dest="cache_dir", default=None,
+                      help="directory caching the parsed spec between runs")
+    parser.add_option("--test-out", dest="test_out", default=None,
+                      help="directory to generate test sources into")
+    parser.add_option("--python-out", dest="python_out", default=None,
+                      help="directory to generate Python tools into")
+    parser.add_option("--ignore-conflicts", action="store_true", default=False,
+                      help="ignore conflicts between merged spec files")
+    parser.add_option("--trim-for-client", action="store_true", default=False,
+                      help="generate only the encoders and decoders a client uses")
+    parser.add_option("--no-method-metrics", dest="method_metrics",
+                      action="store_false", default=True,
+                      help="leave the MethodMetrics hooks out of generated code")
+    parser.add_option("--profile", dest="profile", default=None,
+                      help="method frequency profile to optimise decoding for")
+    (options, args) = parser.parse_args(argv)
+    if len(args) < 2:
+        parser.error("need at least one spec file and an output directory")
+    specPaths, outDir = args[:-1], args[-1]
+    AmqpSpec.ignore_conflicts = options.ignore_conflicts
+    global emitMethodMetrics, trimForClient
+    emitMethodMetrics = options.method_metrics
+    trimForClient = options.trim_for_client
+
+    spec = load_spec(specPaths, options.cache_dir)
+    if options.profile is not None:
+        global hotMethods
+        hotMethods = hot_methods(spec, read_profile(spec, options.profile))
+    roots = {"main": outDir, "test": options.test_out, "python": options.python_out}
+    outputs = [(os.path.join(roots[root], relPath), render(generator, spec))
+               for (root, relPath, generator) in generatedOutputs
+               if roots[root] is not None]
+    for (path, contents) in outputs:
+        if write_if_changed(path, contents):
+            print("Generated %s" % path)
+        else:
+            print("Unchanged %s" % path)
+
 if __name__ == "__main__":
-    do_main(generateJavaApi, generateJavaImpl)
+    if len(sys.argv) > 1 and sys.argv[1] == "all":
+        generate_all(sys.argv[2:])
+    else:
+        do_main_dict({"header": generateJavaApi,
+                      "body": generateJavaImpl,
+                      "benchmark": generateJavaBenchmark,
+                      "capture": generatePythonCapture,
+                      "standin": generatePythonStandin})
@@ -0,0 +1,53 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client;
+
+import java.io.IOException;
+
+/**
+ * A {@link Channel} whose commands can be batched into a single write.
+ *
+ * The channels returned by {@link Connection#createChannel()} implement
+ * {@link BatchingChannel}.
+ *
+ * @see com.rabbitmq.client.impl.ChannelN
+ * @see com.rabbitmq.client.impl.recovery.AutorecoveringChannel
+ */
+public interface BatchingChannel extends Channel {
+    /**
+     * Start batching the commands sent on this channel. Until
+     * {@link #endBatch} is called, publishes, acknowledgements and
+     * other commands that expect no reply are encoded into one buffer
+     * instead of being written to the socket one by one; the batch is
+     * then written in a single write. Commands sent on this channel by
+     * any thread join the batch while it is open.
+     * <p/>
+     * Methods that wait for a reply from the server, including
+     * {@link #close}, write the batch before their own request. A
+     * batch that grows large is written without waiting for its end.
+     * Commands still batched when the channel is shut down are lost.
+     * @see #endBatch
+     */
+    void startBatch();
+
+    /**
+     * Write the commands batched since {@link #startBatch}, in a
+     * single write, and stop batching.
+     * @throws java.io.IOException if an error is encountered
+     */
+    void endBatch() throws IOException;
+}
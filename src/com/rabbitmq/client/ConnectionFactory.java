@@ -101,11 +101,16 @@ public class ConnectionFactory implements Cloneable {
     // connections uses, see rabbitmq/rabbitmq-java-client#86
     private ExecutorService shutdownExecutor;
     private ScheduledExecutorService heartbeatExecutor;
+    private ExecutorService frameDecodingExecutor;
     private SocketConfigurator socketConf         = new DefaultSocketConfigurator();
     private ExceptionHandler exceptionHandler     = new DefaultExceptionHandler();
 
     private boolean automaticRecovery             = false;
     private boolean topologyRecovery              = true;
+    private boolean lazyContentHeaderDecoding     = false;
+    private boolean reusableMethodObjects         = false;
+    private boolean methodMetrics                 = false;
+    private int contentHeaderCacheSize            = 0;
 
     // long is used to make sure the users can use both ints
     // and longs safely. It is unlikely that anybody'd need
@@ -501,6 +506,34 @@ public class ConnectionFactory implements Cloneable {
     public void setHeartbeatExecutor(ScheduledExecutorService executor) {
         this.heartbeatExecutor = executor;
     }
+
+    /**
+     * Set the executor to decode and handle the frames received on
+     * channels with, instead of the connection's own thread, which
+     * then only reads frames and hands each to its channel. The frames
+     * of one channel are still handled one at a time and in order, but
+     * those of different channels are handled in parallel, so a
+     * connection with many busy channels can decode on many cores.
+     * All connections that use this executor share it.
+     *
+     * The executor must run tasks on threads of its own, and must not
+     * be the consumer work service executor: frame handling waits for
+     * consumers when too many deliveries are queued for them.
+     *
+     * It's developer's responsibility to shut down the executor
+     * when it is no longer needed.
+     *
+     * @param executor executor service to decode frames with, or null
+     * to decode them on the connection's thread
+     */
+    public void setFrameDecodingExecutor(ExecutorService executor) {
+        this.frameDecodingExecutor = executor;
+    }
+
+    /** @return the executor frames received on channels are decoded with, or null */
+    public ExecutorService getFrameDecodingExecutor() {
+        return frameDecodingExecutor;
+    }
     
     /**
      * Retrieve the thread factory used to instantiate new threads.
@@ -624,6 +657,101 @@ public class ConnectionFactory implements Cloneable {
         this.topologyRecovery = topologyRecovery;
     }
 
+    /**
+     * Returns true if content header properties of received messages
+     * are decoded lazily, false otherwise
+     * @return true if lazy content header decoding is enabled
+     */
+    public boolean isLazyContentHeaderDecodingEnabled() {
+        return lazyContentHeaderDecoding;
+    }
+
+    /**
+     * Enables or disables lazy decoding of the content header
+     * properties of received messages. When enabled, each property is
+     * decoded from the received frame the first time its getter is
+     * called, so consumers that only look at a few properties do not
+     * pay for decoding the others.
+     * @param lazyContentHeaderDecoding if true, enables lazy decoding
+     */
+    public void setLazyContentHeaderDecodingEnabled(boolean lazyContentHeaderDecoding) {
+        this.lazyContentHeaderDecoding = lazyContentHeaderDecoding;
+    }
+
+    /**
+     * Returns true if channels decode frequently received methods into
+     * reusable objects, false otherwise
+     * @return true if method object reuse is enabled
+     */
+    public boolean isReusableMethodObjectsEnabled() {
+        return reusableMethodObjects;
+    }
+
+    /**
+     * Enables or disables decoding of frequently received methods
+     * (basic.deliver, basic.ack, basic.nack and basic.return) into one
+     * reusable object per channel instead of a new object per frame.
+     * The client library never retains these methods after handling
+     * them, so this is only unsafe for custom channel implementations
+     * that do.
+     * @param reusableMethodObjects if true, enables method object reuse
+     */
+    public void setReusableMethodObjectsEnabled(boolean reusableMethodObjects) {
+        this.reusableMethodObjects = reusableMethodObjects;
+    }
+
+    /**
+     * Returns true if connections count the frames they send and
+     * receive per method, false otherwise
+     * @return true if method metrics are enabled
+     */
+    public boolean isMethodMetricsEnabled() {
+        return methodMetrics;
+    }
+
+    /**
+     * Enables or disables per-method metrics. When enabled, each
+     * connection counts the method and content header frames it sends
+     * and receives, and their sizes, per method, and times the
+     * encoding and decoding of a sample of them. The counts are read
+     * with {@link MethodStatisticsProvider#getMethodStatistics()}. When disabled,
+     * recording costs one null check per frame.
+     * @param methodMetrics if true, enables method metrics
+     */
+    public void setMethodMetricsEnabled(boolean methodMetrics) {
+        this.methodMetrics = methodMetrics;
+    }
+
+    /**
+     * Returns the number of decoded content headers each connection
+     * caches, or 0 if the cache is disabled
+     * @return the content header cache size
+     */
+    public int getContentHeaderCacheSize() {
+        return contentHeaderCacheSize;
+    }
+
+    /**
+     * Sets the number of decoded content headers each connection
+     * caches. When a message arrives with the same properties as one
+     * received before, byte for byte, it is given the properties
+     * object already decoded instead of a new one, so that consumers
+     * holding many messages from the same producers decode and keep
+     * one copy of their properties. Properties objects are immutable,
+     * but those whose headers hold a byte array, date or list are
+     * never shared. The cache is not used with lazy content header
+     * decoding.
+     * @param contentHeaderCacheSize a power of two, or 0 to disable the cache
+     * @see #setLazyContentHeaderDecodingEnabled(boolean)
+     */
+    public void setContentHeaderCacheSize(int contentHeaderCacheSize) {
+        if (contentHeaderCacheSize < 0 || (contentHeaderCacheSize & (contentHeaderCacheSize - 1)) != 0) {
+            throw new IllegalArgumentException("content header cache size must be 0 or a power of two: "
+                                               + contentHeaderCacheSize);
+        }
+        this.contentHeaderCacheSize = contentHeaderCacheSize;
+    }
+
     protected FrameHandlerFactory createFrameHandlerFactory() throws IOException {
         return new FrameHandlerFactory(connectionTimeout, factory, socketConf, isSSL());
     }
@@ -699,12 +827,17 @@ public class ConnectionFactory implements Cloneable {
         result.setSaslConfig(saslConfig);
         result.setNetworkRecoveryInterval(networkRecoveryInterval);
         result.setTopologyRecovery(topologyRecovery);
+        result.setLazyContentHeaderDecoding(lazyContentHeaderDecoding);
+        result.setReusableMethodObjects(reusableMethodObjects);
+        result.setMethodMetrics(methodMetrics);
+        result.setContentHeaderCacheSize(contentHeaderCacheSize);
         result.setExceptionHandler(exceptionHandler);
         result.setThreadFactory(threadFactory);
         result.setHandshakeTimeout(handshakeTimeout);
         result.setRequestedHeartbeat(requestedHeartbeat);
         result.setShutdownExecutor(shutdownExecutor);
         result.setHeartbeatExecutor(heartbeatExecutor);
+        result.setFrameDecodingExecutor(frameDecodingExecutor);
         return result;
     }
 
@@ -0,0 +1,142 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client;
+
+import java.io.IOException;
+import java.util.ArrayList;
+import java.util.Collections;
+import java.util.Comparator;
+import java.util.List;
+import java.util.Map;
+import java.util.TreeMap;
+
+/**
+ * A snapshot of the frames a connection has sent and received, per
+ * AMQP method and per content header class. Methods are named as in
+ * the protocol, e.g. <code>basic.deliver</code>; content header
+ * frames are counted under the name of their class followed by
+ * <code>.properties</code>, e.g. <code>basic.properties</code>. Only
+ * names with at least one frame appear.
+ * <p/>
+ * Encoding and decoding times are sampled, not measured for every
+ * frame, so {@link Counters#getSamples} is usually much smaller than
+ * {@link Counters#getFrames}.
+ * @see MethodStatisticsProvider#getMethodStatistics()
+ * @see ConnectionFactory#setMethodMetricsEnabled(boolean)
+ */
+public final class MethodStatistics {
+    /** Counts for one method or content header class, in one direction */
+    public static final class Counters {
+        private final long frames;
+        private final long bytes;
+        private final long samples;
+        private final long sampledNanos;
+
+        /** Private API - called when taking a snapshot */
+        public Counters(long frames, long bytes, long samples, long sampledNanos) {
+            this.frames = frames;
+            this.bytes = bytes;
+            this.samples = samples;
+            this.sampledNanos = sampledNanos;
+        }
+
+        /** @return the number of frames */
+        public long getFrames() {
+            return frames;
+        }
+
+        /** @return the total size of the frames' payloads, in bytes */
+        public long getBytes() {
+            return bytes;
+        }
+
+        /** @return the number of frames whose encoding or decoding was timed */
+        public long getSamples() {
+            return samples;
+        }
+
+        /** @return the total time spent encoding or decoding the sampled frames */
+        public long getSampledNanos() {
+            return sampledNanos;
+        }
+
+        /** @return the mean time to encode or decode one frame, or 0 if none was sampled */
+        public double getMeanNanos() {
+            return samples == 0 ? 0 : sampledNanos / (double) samples;
+        }
+
+        @Override public String toString() {
+            return "(frames=" + frames + ", bytes=" + bytes +
+                ", meanNanos=" + String.format("%.1f", getMeanNanos()) + ")";
+        }
+    }
+
+    private final Map<String, Counters> received;
+    private final Map<String, Counters> sent;
+
+    /** Private API - called when taking a snapshot */
+    public MethodStatistics(Map<String, Counters> received, Map<String, Counters> sent) {
+        this.received = Collections.unmodifiableMap(received);
+        this.sent = Collections.unmodifiableMap(sent);
+    }
+
+    /** @return counts of frames received, by method or content header class name */
+    public Map<String, Counters> getReceived() {
+        return received;
+    }
+
+    /** @return counts of frames sent, by method or content header class name */
+    public Map<String, Counters> getSent() {
+        return sent;
+    }
+
+    /**
+     * Writes the number of frames of each method, sent and received
+     * together, as a profile for <code>codegen.py all --profile</code>:
+     * one <code>name count</code> line per method, most frequent first.
+     * Content headers are left out.
+     * @param out where to write the profile
+     * @throws IOException if writing fails
+     */
+    public void writeProfile(Appendable out) throws IOException {
+        final Map<String, Long> counts = new TreeMap<String, Long>();
+        addFrameCounts(counts, received);
+        addFrameCounts(counts, sent);
+        List<String> names = new ArrayList<String>(counts.keySet());
+        Collections.sort(names, new Comparator<String>() {
+            public int compare(String a, String b) {
+                return counts.get(b).compareTo(counts.get(a));
+            }
+        });
+        for (String name : names) {
+            out.append(name).append(' ').append(counts.get(name).toString()).append('\n');
+        }
+    }
+
+    private static void addFrameCounts(Map<String, Long> counts, Map<String, Counters> direction) {
+        for (Map.Entry<String, Counters> entry : direction.entrySet()) {
+            String name = entry.getKey();
+            if (name.endsWith(".properties")) continue;
+            Long count = counts.get(name);
+            counts.put(name, (count == null ? 0 : count) + entry.getValue().getFrames());
+        }
+    }
+
+    @Override public String toString() {
+        return "MethodStatistics(received=" + received + ", sent=" + sent + ")";
+    }
+}
@@ -0,0 +1,39 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client;
+
+/**
+ * Provides the per-method frame statistics of a connection.
+ *
+ * The connections returned by {@link ConnectionFactory#newConnection()}
+ * implement {@link MethodStatisticsProvider}; statistics are only
+ * collected if enabled with
+ * {@link ConnectionFactory#setMethodMetricsEnabled(boolean)}.
+ *
+ * @see com.rabbitmq.client.impl.AMQConnection
+ * @see com.rabbitmq.client.impl.recovery.AutorecoveringConnection
+ */
+public interface MethodStatisticsProvider {
+    /**
+     * Get a snapshot of the frames this connection has sent and
+     * received, per method.
+     *
+     * @return the statistics, or null unless they were enabled with
+     * {@link ConnectionFactory#setMethodMetricsEnabled(boolean)}
+     */
+    MethodStatistics getMethodStatistics();
+}
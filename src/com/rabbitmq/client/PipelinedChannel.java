@@ -0,0 +1,58 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client;
+
+import java.io.IOException;
+import java.util.concurrent.Future;
+
+/**
+ * A {@link Channel} that can have many synchronous methods in flight
+ * at once.
+ *
+ * The channels returned by {@link Connection#createChannel()} implement
+ * {@link PipelinedChannel}.
+ *
+ * @see AMQP.PipelinedRpc
+ * @see com.rabbitmq.client.impl.ChannelN
+ * @see com.rabbitmq.client.impl.recovery.AutorecoveringChannel
+ */
+public interface PipelinedChannel extends Channel {
+    /**
+     * Send a synchronous method over this channel without waiting for
+     * its reply, or for the replies to methods sent before it. The
+     * broker replies in the order methods were sent, so many methods
+     * can be in flight on one channel at once: declaring a topology
+     * this way takes one round trip rather than one per method.
+     * <p/>
+     * The method must expect a single reply of <code>replyType</code>;
+     * a method with its nowait flag set gets none, and the replies of
+     * every method sent after it would be mismatched.
+     * {@link AMQP.PipelinedRpc} wraps this for each method that may be
+     * pipelined. If the channel is closed before the reply arrives the
+     * future fails with the {@link ShutdownSignalException}.
+     * <p/>
+     * On a channel of an automatically recovering connection, the
+     * queues, exchanges and bindings declared this way are recovered
+     * like those declared with the blocking methods.
+     * @param method method to transmit over this channel.
+     * @param replyType the class of the reply the method expects
+     * @return a future of the reply
+     * @throws IOException Problem transmitting method.
+     * @see BatchingChannel#startBatch()
+     */
+    <T extends Method> Future<T> pipelinedRpc(Method method, Class<T> replyType) throws IOException;
+}
@@ -0,0 +1,74 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client;
+
+import java.io.IOException;
+
+/**
+ * A {@link Consumer} that receives the body of each message in pieces
+ * as it arrives, rather than whole once it has all arrived. The body
+ * is never assembled, so a large message is not held in memory in
+ * full, and work on it can begin as soon as its first frame is read.
+ * <p/>
+ * For each <code><b>basic.deliver</b></code>, a streaming consumer is
+ * called with {@link #handleDeliveryStart}, then with
+ * {@link #handleDeliveryBody} once for each body frame, in order,
+ * then with {@link #handleDeliveryEnd}. These calls are made in the
+ * consumer's dispatch thread like its other callbacks, so the
+ * deliveries to it never overlap. {@link #handleDelivery} is not
+ * called.
+ * <p/>
+ * A body is split into frames no larger than the connection's
+ * negotiated frame size, see {@link ConnectionFactory#setRequestedFrameMax}.
+ *
+ * @see Channel#basicConsume(String, boolean, String, boolean, boolean, java.util.Map, Consumer)
+ */
+public interface StreamingConsumer extends Consumer {
+    /**
+     * Called when the content header of a message for this consumer
+     * has been received, before any of its body.
+     * @param consumerTag the <i>consumer tag</i> associated with the consumer
+     * @param envelope packaging data for the message
+     * @param properties content header data for the message
+     * @param bodySize the size of the message body in bytes
+     * @throws IOException if the consumer encounters an I/O error while processing the message
+     */
+    void handleDeliveryStart(String consumerTag,
+                             Envelope envelope,
+                             AMQP.BasicProperties properties,
+                             long bodySize)
+        throws IOException;
+
+    /**
+     * Called with each piece of the body of the message started by
+     * the last call to {@link #handleDeliveryStart}.
+     * @param consumerTag the <i>consumer tag</i> associated with the consumer
+     * @param fragment the next bytes of the message body
+     * @throws IOException if the consumer encounters an I/O error while processing the message
+     */
+    void handleDeliveryBody(String consumerTag, byte[] fragment)
+        throws IOException;
+
+    /**
+     * Called once all of the body of the message started by the last
+     * call to {@link #handleDeliveryStart} has been received.
+     * @param consumerTag the <i>consumer tag</i> associated with the consumer
+     * @throws IOException if the consumer encounters an I/O error while processing the message
+     */
+    void handleDeliveryEnd(String consumerTag)
+        throws IOException;
+}
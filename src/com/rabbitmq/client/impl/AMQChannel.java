@@ -18,13 +18,21 @@
 package com.rabbitmq.client.impl;
 
 import java.io.IOException;
+import java.util.ArrayDeque;
+import java.util.Queue;
+import java.util.concurrent.CountDownLatch;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.Future;
+import java.util.concurrent.TimeUnit;
 import java.util.concurrent.TimeoutException;
 
+import com.rabbitmq.client.AMQP;
 import com.rabbitmq.client.AlreadyClosedException;
 import com.rabbitmq.client.Command;
 import com.rabbitmq.client.Method;
 import com.rabbitmq.client.Connection;
 import com.rabbitmq.client.ShutdownSignalException;
+import com.rabbitmq.client.UnexpectedMethodError;
 import com.rabbitmq.utility.BlockingValueOrException;
 
 /**
@@ -51,15 +59,32 @@ public abstract class AMQChannel extends ShutdownNotifierComponent {
     /** This channel's channel number. */
     private final int _channelNumber;
 
+    /** Flyweight methods inbound commands decode into, or null */
+    private final AMQImpl.ReusableMethods _reusableMethods;
+
+    /** Frames waiting for a worker to handle them, or null if the connection's main loop does */
+    private final FrameDecodingQueue _frameQueue;
+
     /** Command being assembled */
-    private AMQCommand _command = new AMQCommand();
+    private AMQCommand _command;
 
-    /** The current outstanding RPC request, if any. (Could become a queue in future.) */
-    private RpcContinuation _activeRpc = null;
+    /**
+     * The outstanding RPC requests, oldest first. The broker replies
+     * to synchronous methods in the order they were sent, so each
+     * reply goes to the head of the queue. Only pipelined RPCs are
+     * queued behind others; see {@link #pipelinedRpc}.
+     */
+    private final Queue<RpcContinuation> _outstandingRpcs = new ArrayDeque<RpcContinuation>();
 
     /** Whether transmission of content-bearing methods should be blocked */
     public volatile boolean _blockContent = false;
 
+    /** Whether commands are being batched; see {@link #startBatch} */
+    private boolean _batching = false;
+
+    /** Commands encoded while batching but not yet written, or null if never batched */
+    private CommandBatch _batch = null;
+
     /**
      * Construct a channel on the given connection, with the given channel number.
      * @param connection the underlying connection for this channel
@@ -68,6 +93,16 @@ public abstract class AMQChannel extends ShutdownNotifierComponent {
     public AMQChannel(AMQConnection connection, int channelNumber) {
         this._connection = connection;
         this._channelNumber = channelNumber;
+        this._reusableMethods = connection.isReusableMethodObjectsEnabled()
+            ? new AMQImpl.ReusableMethods() : null;
+        this._frameQueue = (channelNumber != 0 && connection.getFrameDecodingExecutor() != null)
+            ? new FrameDecodingQueue(this, connection.getFrameDecodingExecutor()) : null;
+        this._command = newInboundCommand();
+    }
+
+    private AMQCommand newInboundCommand() {
+        return new AMQCommand(_connection.isLazyContentHeaderDecodingEnabled(), _reusableMethods,
+                              _connection.getMethodMetrics(), _connection.getContentHeaderCache());
     }
 
     /**
@@ -86,12 +121,52 @@ public abstract class AMQChannel extends ShutdownNotifierComponent {
      */
     public void handleFrame(Frame frame) throws IOException {
         AMQCommand command = _command;
-        if (command.handleFrame(frame)) { // a complete command has rolled off the assembly line
-            _command = new AMQCommand(); // prepare for the next one
+        boolean complete = command.handleFrame(frame);
+        if (frame.type == AMQP.FRAME_HEADER) {
+            processContentHeader(command);
+        }
+        if (complete) { // a complete command has rolled off the assembly line
+            _command = newInboundCommand(); // prepare for the next one
             handleCompleteInboundCommand(command);
         }
     }
 
+    /**
+     * Protected API - called once the content header of an inbound
+     * command has been read, before any of its body, e.g. to stream
+     * the body with {@link AMQCommand#streamContentBody}. Does
+     * nothing by default.
+     * @param command the command being read
+     * @throws IOException if there's any problem
+     */
+    protected void processContentHeader(AMQCommand command) throws IOException {
+    }
+
+    /**
+     * Private API - When the Connection reads a Frame for this
+     * channel, it passes it to this method, which handles it at once
+     * or queues it for the connection's frame decoding executor.
+     * @param frame the incoming frame
+     * @throws IOException if an error is encountered
+     */
+    public void dispatchFrame(Frame frame) throws IOException {
+        if (_frameQueue == null) {
+            handleFrame(frame);
+        } else {
+            _frameQueue.add(frame);
+        }
+    }
+
+    /**
+     * Private API - waits until the frames passed to
+     * {@link #dispatchFrame} so far have been handled.
+     */
+    public void awaitDispatchedFrames() {
+        if (_frameQueue != null) {
+            _frameQueue.awaitHandled();
+        }
+    }
+
     /**
      * Placeholder until we address bug 15786 (implementing a proper exception hierarchy).
      * In the meantime, this at least won't throw away any information from the wrapped exception.
@@ -153,7 +228,7 @@ public abstract class AMQChannel extends ShutdownNotifierComponent {
     {
         synchronized (_channelMutex) {
             boolean waitClearedInterruptStatus = false;
-            while (_activeRpc != null) {
+            while (!_outstandingRpcs.isEmpty()) {
                 try {
                     _channelMutex.wait();
                 } catch (InterruptedException e) {
@@ -163,22 +238,32 @@ public abstract class AMQChannel extends ShutdownNotifierComponent {
             if (waitClearedInterruptStatus) {
                 Thread.currentThread().interrupt();
             }
-            _activeRpc = k;
+            _outstandingRpcs.add(k);
+        }
+    }
+
+    /**
+     * Queues an RPC continuation behind any outstanding ones, without
+     * waiting for them to complete.
+     */
+    public void enqueuePipelinedRpc(RpcContinuation k)
+    {
+        synchronized (_channelMutex) {
+            _outstandingRpcs.add(k);
         }
     }
 
     public boolean isOutstandingRpc()
     {
         synchronized (_channelMutex) {
-            return (_activeRpc != null);
+            return !_outstandingRpcs.isEmpty();
         }
     }
 
     public RpcContinuation nextOutstandingRpc()
     {
         synchronized (_channelMutex) {
-            RpcContinuation result = _activeRpc;
-            _activeRpc = null;
+            RpcContinuation result = _outstandingRpcs.poll();
             _channelMutex.notifyAll();
             return result;
         }
@@ -243,6 +328,34 @@ public abstract class AMQChannel extends ShutdownNotifierComponent {
         }
     }
 
+    /**
+     * Public API - sends a synchronous method without waiting for the
+     * replies to any sent before it; see
+     * {@link com.rabbitmq.client.PipelinedChannel#pipelinedRpc}.
+     */
+    public <T extends Method> Future<T> pipelinedRpc(Method m, Class<T> replyType)
+        throws IOException
+    {
+        return pipelinedRpc(m, new FutureRpcContinuation<T>(replyType));
+    }
+
+    /**
+     * Private API - sends a synchronous method without waiting for the
+     * replies to any sent before it, completing the given continuation
+     * with its reply.
+     */
+    public <T extends Method> Future<T> pipelinedRpc(Method m, FutureRpcContinuation<T> k)
+        throws IOException
+    {
+        synchronized (_channelMutex) {
+            ensureIsOpen();
+            enqueuePipelinedRpc(k);
+            // batched like any other command while batching
+            transmit(new AMQCommand(m));
+        }
+        return k;
+    }
+
     public void quiescingRpc(Method m, RpcContinuation k)
         throws IOException
     {
@@ -292,8 +405,8 @@ public abstract class AMQChannel extends ShutdownNotifierComponent {
     }
 
     public void notifyOutstandingRpc(ShutdownSignalException signal) {
-        RpcContinuation k = nextOutstandingRpc();
-        if (k != null) {
+        RpcContinuation k;
+        while ((k = nextOutstandingRpc()) != null) {
             k.handleShutdownSignal(signal);
         }
     }
@@ -307,7 +420,33 @@ public abstract class AMQChannel extends ShutdownNotifierComponent {
     public void transmit(AMQCommand c) throws IOException {
         synchronized (_channelMutex) {
             ensureIsOpen();
-            quiescingTransmit(c);
+            if (_batching) {
+                awaitContentUnblocked(c);
+                c.encodeTo(_batch, _connection);
+                if (_batch.isFull()) flushBatch();
+            } else {
+                quiescingTransmit(c);
+            }
+        }
+    }
+
+    /**
+     * Protected API - sends the method frame last made from a
+     * {@link MethodFrameTemplate}. Must be called with the channel
+     * mutex held from the template's use until this returns.
+     */
+    public void transmitMethodFrame(MethodFrameTemplate template, Frame methodFrame) throws IOException {
+        synchronized (_channelMutex) {
+            ensureIsOpen();
+            if (_batching) {
+                _batch.addFrame(methodFrame);
+                if (_batch.isFull()) flushBatch();
+            } else {
+                _connection.writeFrame(methodFrame);
+                _connection.flush();
+            }
+            MethodMetrics metrics = _connection.getMethodMetrics();
+            if (metrics != null) template.recordSent(metrics);
         }
     }
 
@@ -319,22 +458,62 @@ public abstract class AMQChannel extends ShutdownNotifierComponent {
 
     public void quiescingTransmit(AMQCommand c) throws IOException {
         synchronized (_channelMutex) {
-            if (c.getMethod().hasContent()) {
-                while (_blockContent) {
-                    try {
-                        _channelMutex.wait();
-                    } catch (InterruptedException ignored) {}
-
-                    // This is to catch a situation when the thread wakes up during
-                    // shutdown. Currently, no command that has content is allowed
-                    // to send anything in a closing state.
-                    ensureIsOpen();
-                }
-            }
+            awaitContentUnblocked(c);
+            // commands batched so far must go first
+            flushBatch();
             c.transmit(this);
         }
     }
 
+    private void awaitContentUnblocked(AMQCommand c) {
+        if (c.getMethod().hasContent()) {
+            while (_blockContent) {
+                try {
+                    _channelMutex.wait();
+                } catch (InterruptedException ignored) {}
+
+                // This is to catch a situation when the thread wakes up during
+                // shutdown. Currently, no command that has content is allowed
+                // to send anything in a closing state.
+                ensureIsOpen();
+            }
+        }
+    }
+
+    /**
+     * Public API - starts batching the commands sent on this channel;
+     * see {@link com.rabbitmq.client.BatchingChannel#startBatch}.
+     */
+    public void startBatch() {
+        synchronized (_channelMutex) {
+            ensureIsOpen();
+            if (_batch == null) {
+                _batch = new CommandBatch(_channelNumber);
+            }
+            _batching = true;
+        }
+    }
+
+    /**
+     * Public API - writes the commands batched since {@link #startBatch}
+     * and stops batching.
+     */
+    public void endBatch() throws IOException {
+        synchronized (_channelMutex) {
+            _batching = false;
+            if (!isOpen() && _batch != null) _batch.clear();
+            ensureIsOpen();
+            flushBatch();
+        }
+    }
+
+    /** Writes the commands batched so far, if any. Must be called with the channel mutex held. */
+    private void flushBatch() throws IOException {
+        if (_batch != null && !_batch.isEmpty()) {
+            _batch.writeTo(_connection);
+        }
+    }
+
     public AMQConnection getConnection() {
         return _connection;
     }
@@ -370,6 +549,84 @@ public abstract class AMQChannel extends ShutdownNotifierComponent {
         public abstract T transformReply(AMQCommand command);
     }
 
+    /**
+     * The continuation of a pipelined RPC, and the future of its
+     * reply. A reply of any type but the one expected fails the
+     * future with an {@link UnexpectedMethodError}, and a shutdown of
+     * the channel with the {@link ShutdownSignalException}. Methods
+     * already sent cannot be recalled, so the future cannot be
+     * cancelled.
+     */
+    public static class FutureRpcContinuation<T extends Method>
+        implements RpcContinuation, Future<T>
+    {
+        private final Class<T> _replyType;
+        private final CountDownLatch _done = new CountDownLatch(1);
+        private volatile T _reply;
+        private volatile Throwable _failure;
+
+        public FutureRpcContinuation(Class<T> replyType) {
+            _replyType = replyType;
+        }
+
+        public void handleCommand(AMQCommand command) {
+            Method reply = command.getMethod();
+            if (_replyType.isInstance(reply)) {
+                _reply = _replyType.cast(reply);
+                handleReply(_reply);
+            } else {
+                _failure = new UnexpectedMethodError(reply);
+            }
+            _done.countDown();
+        }
+
+        /**
+         * Called with the reply before the future completes, in the
+         * thread reading from the connection. Does nothing by default.
+         * @param reply the reply to the method
+         */
+        protected void handleReply(T reply) {
+        }
+
+        public void handleShutdownSignal(ShutdownSignalException signal) {
+            _failure = signal;
+            _done.countDown();
+        }
+
+        public boolean cancel(boolean mayInterruptIfRunning) {
+            return false;
+        }
+
+        public boolean isCancelled() {
+            return false;
+        }
+
+        public boolean isDone() {
+            return _done.getCount() == 0;
+        }
+
+        public T get() throws InterruptedException, ExecutionException {
+            _done.await();
+            return result();
+        }
+
+        public T get(long timeout, TimeUnit unit)
+            throws InterruptedException, ExecutionException, TimeoutException
+        {
+            if (!_done.await(timeout, unit)) {
+                throw new TimeoutException();
+            }
+            return result();
+        }
+
+        private T result() throws ExecutionException {
+            if (_failure != null) {
+                throw new ExecutionException(_failure);
+            }
+            return _reply;
+        }
+    }
+
     public static class SimpleBlockingRpcContinuation
         extends BlockingRpcContinuation<AMQCommand>
     {
@@ -42,12 +42,75 @@ public class AMQCommand implements Command {
      */
     public static final int EMPTY_FRAME_SIZE = 8;
 
+    /** Receives the content body of a command a fragment at a time, as its frames are read */
+    public interface ContentBodyListener {
+        /**
+         * Called with the payload of each body frame, in order.
+         * @param fragment the frame's payload, not copied
+         * @throws IOException if the fragment cannot be handled
+         */
+        void handleBodyFragment(byte[] fragment) throws IOException;
+    }
+
     /** The assembler for this command - synchronised on - contains all the state */
     private final CommandAssembler assembler;
 
+    /** Pre-encoded frame to send the method in, or null to encode the method */
+    private final MethodFrameTemplate methodFrameTemplate;
+
     /** Construct a command ready to fill in by reading frames */
     public AMQCommand() {
-        this(null, null, null);
+        this(false);
+    }
+
+    /**
+     * Construct a command ready to fill in by reading frames
+     * @param lazyContentHeader whether to decode the content header's
+     * properties only when they are first read
+     */
+    public AMQCommand(boolean lazyContentHeader) {
+        this(lazyContentHeader, null);
+    }
+
+    /**
+     * Construct a command ready to fill in by reading frames
+     * @param lazyContentHeader whether to decode the content header's
+     * properties only when they are first read
+     * @param reusableMethods flyweight methods to decode into, or null
+     * to allocate a new method
+     */
+    public AMQCommand(boolean lazyContentHeader, AMQImpl.ReusableMethods reusableMethods) {
+        this(lazyContentHeader, reusableMethods, null);
+    }
+
+    /**
+     * Construct a command ready to fill in by reading frames
+     * @param lazyContentHeader whether to decode the content header's
+     * properties only when they are first read
+     * @param reusableMethods flyweight methods to decode into, or null
+     * to allocate a new method
+     * @param metrics counters to record the frames read in, or null
+     */
+    public AMQCommand(boolean lazyContentHeader, AMQImpl.ReusableMethods reusableMethods,
+                      MethodMetrics metrics) {
+        this(lazyContentHeader, reusableMethods, metrics, null);
+    }
+
+    /**
+     * Construct a command ready to fill in by reading frames
+     * @param lazyContentHeader whether to decode the content header's
+     * properties only when they are first read
+     * @param reusableMethods flyweight methods to decode into, or null
+     * to allocate a new method
+     * @param metrics counters to record the frames read in, or null
+     * @param contentHeaderCache cache to decode the content header
+     * through, or null; not used with lazy decoding
+     */
+    public AMQCommand(boolean lazyContentHeader, AMQImpl.ReusableMethods reusableMethods,
+                      MethodMetrics metrics, ContentHeaderCache contentHeaderCache) {
+        this.assembler = new CommandAssembler(lazyContentHeader, reusableMethods, metrics,
+                                              contentHeaderCache);
+        this.methodFrameTemplate = null;
     }
 
     /**
@@ -65,7 +128,22 @@ public class AMQCommand implements Command {
      * @param body the message body data
      */
     public AMQCommand(com.rabbitmq.client.Method method, AMQContentHeader contentHeader, byte[] body) {
+        this(method, contentHeader, body, null);
+    }
+
+    /**
+     * Construct a command with a specified method, header and body,
+     * sending the method in a frame made from a template.
+     * @param method the wrapped method
+     * @param contentHeader the wrapped content header
+     * @param body the message body data
+     * @param methodFrameTemplate a template bound to the method's fixed
+     * arguments, or null to encode the method in full
+     */
+    public AMQCommand(com.rabbitmq.client.Method method, AMQContentHeader contentHeader, byte[] body,
+                      MethodFrameTemplate methodFrameTemplate) {
         this.assembler = new CommandAssembler((Method) method, contentHeader, body);
+        this.methodFrameTemplate = methodFrameTemplate;
     }
 
     /** Public API - {@inheritDoc} */
@@ -87,6 +165,17 @@ public class AMQCommand implements Command {
         return this.assembler.handleFrame(f);
     }
 
+    /**
+     * Private API - passes the rest of this command's content body to
+     * the given listener as its frames are read, rather than
+     * accumulating it; {@link #getContentBody} then returns only what
+     * was accumulated before.
+     * @param listener receives each body fragment still to be read
+     */
+    public void streamContentBody(ContentBodyListener listener) {
+        this.assembler.setContentBodyListener(listener);
+    }
+
     /**
      * Sends this command down the named channel on the channel's
      * connection, possibly in multiple frames.
@@ -96,15 +185,22 @@ public class AMQCommand implements Command {
     public void transmit(AMQChannel channel) throws IOException {
         int channelNumber = channel.getChannelNumber();
         AMQConnection connection = channel.getConnection();
+        MethodMetrics metrics = connection.getMethodMetrics();
 
         synchronized (assembler) {
             Method m = this.assembler.getMethod();
-            connection.writeFrame(m.toFrame(channelNumber));
+            if (this.methodFrameTemplate == null) {
+                connection.writeFrame(m.toFrame(channelNumber, metrics));
+            } else {
+                Frame frame = this.methodFrameTemplate.toFrame(m);
+                connection.writeFrame(frame);
+                if (metrics != null) this.methodFrameTemplate.recordSent(metrics);
+            }
             if (m.hasContent()) {
                 byte[] body = this.assembler.getContentBody();
 
                 connection.writeFrame(this.assembler.getContentHeader()
-                        .toFrame(channelNumber, body.length));
+                        .toFrame(channelNumber, body.length, metrics));
 
                 int frameMax = connection.getFrameMax();
                 int bodyPayloadMax = (frameMax == 0) ? body.length : frameMax
@@ -125,6 +221,32 @@ public class AMQCommand implements Command {
         connection.flush();
     }
 
+    /**
+     * Encodes this command into the channel's batch, to be sent when
+     * the batch is written.
+     * @param batch the batch of the channel on which to transmit the command
+     * @param connection the channel's connection
+     * @throws IOException if an error is encountered
+     */
+    public void encodeTo(CommandBatch batch, AMQConnection connection) throws IOException {
+        MethodMetrics metrics = connection.getMethodMetrics();
+
+        synchronized (assembler) {
+            Method m = this.assembler.getMethod();
+            if (this.methodFrameTemplate == null) {
+                batch.addMethod(m, metrics);
+            } else {
+                batch.addFrame(this.methodFrameTemplate.toFrame(m));
+                if (metrics != null) this.methodFrameTemplate.recordSent(metrics);
+            }
+            if (m.hasContent()) {
+                batch.addContent(this.assembler.getContentHeader(),
+                                 this.assembler.getContentBody(),
+                                 connection.getFrameMax(), metrics);
+            }
+        }
+    }
+
     @Override public String toString() {
         return toString(false);
     }
@@ -38,6 +38,8 @@ import com.rabbitmq.client.Command;
 import com.rabbitmq.client.Connection;
 import com.rabbitmq.client.ConnectionFactory;
 import com.rabbitmq.client.LongString;
+import com.rabbitmq.client.MethodStatistics;
+import com.rabbitmq.client.MethodStatisticsProvider;
 import com.rabbitmq.client.MissedHeartbeatException;
 import com.rabbitmq.client.PossibleAuthenticationFailureException;
 import com.rabbitmq.client.ProtocolVersionMismatchException;
@@ -58,10 +60,13 @@ final class Copyright {
  * To create a broker connection, use {@link ConnectionFactory}.  See {@link Connection}
  * for an example.
  */
-public class AMQConnection extends ShutdownNotifierComponent implements Connection, NetworkConnection {
+public class AMQConnection extends ShutdownNotifierComponent
+    implements Connection, NetworkConnection, MethodStatisticsProvider {
     private final ExecutorService consumerWorkServiceExecutor;
     private final ScheduledExecutorService heartbeatExecutor;
     private final ExecutorService shutdownExecutor;
+    /** Executor channels decode their frames with, or null to decode them on the main loop */
+    private final ExecutorService frameDecodingExecutor;
     private Thread mainLoopThread;
     private ThreadFactory threadFactory = Executors.defaultThreadFactory();
 
@@ -112,6 +117,9 @@ public class AMQConnection extends ShutdownNotifierComponent implements Connecti
     /** Flag controlling the main driver loop's termination */
     private volatile boolean _running = false;
 
+    /** Set once a frame decoding worker has failed and stopped the main loop */
+    private volatile boolean _frameDecodingFailed = false;
+
     /** Handler for (uncaught) exceptions that crop up in the {@link MainLoop}. */
     private final ExceptionHandler _exceptionHandler;
 
@@ -137,6 +145,12 @@ public class AMQConnection extends ShutdownNotifierComponent implements Connecti
     private final int requestedFrameMax;
     private final int handshakeTimeout;
     private final int shutdownTimeout;
+    private final boolean lazyContentHeaderDecoding;
+    private final boolean reusableMethodObjects;
+    /** Counters of the frames sent and received, or null if not kept */
+    private final MethodMetrics methodMetrics;
+    /** Content headers decoded already, shared by the channels, or null if not kept */
+    private final ContentHeaderCache contentHeaderCache;
     private final String username;
     private final String password;
     private final Collection<BlockedListener> blockedListeners = new CopyOnWriteArrayList<BlockedListener>();
@@ -217,10 +231,16 @@ public class AMQConnection extends ShutdownNotifierComponent implements Connecti
         this.requestedHeartbeat = params.getRequestedHeartbeat();
         this.handshakeTimeout = params.getHandshakeTimeout();
         this.shutdownTimeout = params.getShutdownTimeout();
+        this.lazyContentHeaderDecoding = params.isLazyContentHeaderDecodingEnabled();
+        this.reusableMethodObjects = params.isReusableMethodObjectsEnabled();
+        this.methodMetrics = params.isMethodMetricsEnabled() ? new MethodMetrics() : null;
+        this.contentHeaderCache = (params.getContentHeaderCacheSize() > 0 && !lazyContentHeaderDecoding)
+            ? new ContentHeaderCache(params.getContentHeaderCacheSize()) : null;
         this.saslConfig = params.getSaslConfig();
         this.consumerWorkServiceExecutor = params.getConsumerWorkServiceExecutor();
         this.heartbeatExecutor = params.getHeartbeatExecutor();
         this.shutdownExecutor = params.getShutdownExecutor();
+        this.frameDecodingExecutor = params.getFrameDecodingExecutor();
         this.threadFactory = params.getThreadFactory();
 
         this._channelManager = null;
@@ -478,6 +498,76 @@ public class AMQConnection extends ShutdownNotifierComponent implements Connecti
     }
 
 
+    /**
+     * Private API - whether channels should decode content header
+     * properties lazily
+     */
+    public boolean isLazyContentHeaderDecodingEnabled() {
+        return lazyContentHeaderDecoding;
+    }
+
+    /**
+     * Private API - whether channels should decode frequently received
+     * methods into reusable objects
+     */
+    public boolean isReusableMethodObjectsEnabled() {
+        return reusableMethodObjects;
+    }
+
+    /**
+     * Private API - the counters encoders and decoders record frames
+     * in, or null if method metrics are disabled
+     */
+    public MethodMetrics getMethodMetrics() {
+        return methodMetrics;
+    }
+
+    /**
+     * Private API - the executor channels decode and handle their
+     * frames with, or null if the main loop handles them
+     */
+    public ExecutorService getFrameDecodingExecutor() {
+        return frameDecodingExecutor;
+    }
+
+    /**
+     * Private API - handles an exception thrown while a worker of the
+     * frame decoding executor handled a channel's frames, as the main
+     * loop handles one thrown there: the connection is shut down, and
+     * the main loop stopped.
+     */
+    public void handleFrameDecodingFailure(Throwable ex) {
+        _frameDecodingFailed = true;
+        _exceptionHandler.handleUnexpectedConnectionDriverException(this, ex);
+        shutdown(null, false, ex, true);
+        _running = false;
+        _frameHandler.close();
+    }
+
+    /**
+     * Waits until the frames read so far for every channel have been
+     * handled, when they are handled by the frame decoding executor
+     */
+    private void awaitDispatchedFrames() {
+        ChannelManager cm = _channelManager;
+        if (frameDecodingExecutor != null && cm != null && !_frameDecodingFailed) {
+            cm.awaitDispatchedFrames();
+        }
+    }
+
+    /**
+     * Private API - the cache channels decode content headers
+     * through, or null if content headers are not cached
+     */
+    public ContentHeaderCache getContentHeaderCache() {
+        return contentHeaderCache;
+    }
+
+    /** Public API - {@inheritDoc} */
+    public MethodStatistics getMethodStatistics() {
+        return methodMetrics == null ? null : methodMetrics.snapshot();
+    }
+
     /** Public API
      *
      * @return true if this work service instance uses its own consumerWorkServiceExecutor (as opposed to a shared one)
@@ -543,6 +633,8 @@ public class AMQConnection extends ShutdownNotifierComponent implements Connecti
                             // Ignore it: we've already just reset the heartbeat counter.
                         } else {
                             if (frame.channel == 0) { // the special channel
+                                // frames read before it for other channels come first
+                                awaitDispatchedFrames();
                                 _channel0.handleFrame(frame);
                             } else {
                                 if (isOpen()) {
@@ -553,7 +645,7 @@ public class AMQConnection extends ShutdownNotifierComponent implements Connecti
                                     // be discarded.
                                     ChannelManager cm = _channelManager;
                                     if (cm != null) {
-                                        cm.getChannel(frame.channel).handleFrame(frame);
+                                        cm.getChannel(frame.channel).dispatchFrame(frame);
                                     }
                                 }
                             }
@@ -565,12 +657,18 @@ public class AMQConnection extends ShutdownNotifierComponent implements Connecti
                     }
                 }
             } catch (EOFException ex) {
+                awaitDispatchedFrames();
                 if (!_brokerInitiatedShutdown)
                     shutdown(null, false, ex, true);
             } catch (Throwable ex) {
-                _exceptionHandler.handleUnexpectedConnectionDriverException(AMQConnection.this,
-                                                                            ex);
-                shutdown(null, false, ex, true);
+                // unless a frame decoding worker has failed, and
+                // stopped the main loop by closing the socket
+                if (!_frameDecodingFailed) {
+                    awaitDispatchedFrames();
+                    _exceptionHandler.handleUnexpectedConnectionDriverException(AMQConnection.this,
+                                                                                ex);
+                    shutdown(null, false, ex, true);
+                }
             } finally {
                 // Finally, shut down our underlying data connection.
                 _frameHandler.close();
@@ -841,7 +939,8 @@ public class AMQConnection extends ShutdownNotifierComponent implements Connecti
                       boolean abort)
         throws IOException
     {
-        boolean sync = !(Thread.currentThread() == mainLoopThread);
+        boolean sync = !(Thread.currentThread() == mainLoopThread ||
+                         FrameDecodingQueue.isHandlingFramesOf(this));
 
         try {
             AMQP.Connection.Close reason =
@@ -43,12 +43,39 @@ public abstract class AMQContentHeader implements ContentHeader {
     }
     
     public long getBodySize() { return bodySize; }
+
+    /**
+     * Private API - this header with the given body size: this
+     * instance if it has that size already, otherwise a copy sharing
+     * its properties
+     */
+    AMQContentHeader withBodySize(long bodySize) {
+        if (bodySize == this.bodySize) return this;
+        try {
+            AMQContentHeader copy = (AMQContentHeader) clone();
+            copy.bodySize = bodySize;
+            return copy;
+        } catch (CloneNotSupportedException e) {
+            throw new IllegalStateException(e);
+        }
+    }
+
+    /**
+     * Private API - whether this header can be handed to any number
+     * of consumers at once, because none of its properties holds a
+     * value that can be changed. Overridden by autogenerated code for
+     * headers with table properties.
+     */
+    public boolean isShareable() {
+        return true;
+    }
     
 
-    private void writeTo(DataOutputStream out, long bodySize) throws IOException {
+    private void writeTo(DataOutputStream out, long bodySize, ValueSizer sizer,
+                         MethodMetrics metrics) throws IOException {
         out.writeShort(0); // weight - not currently used
         out.writeLong(bodySize);
-        writePropertiesTo(new ContentHeaderPropertyWriter(out));
+        writePropertiesTo(new ContentHeaderPropertyWriter(out, sizer, metrics));
     }
 
     /**
@@ -56,6 +83,19 @@ public abstract class AMQContentHeader implements ContentHeader {
      */
     public abstract void writePropertiesTo(ContentHeaderPropertyWriter writer) throws IOException;
 
+    /**
+     * Private API - Autogenerated computation of the encoded size of this
+     * header's property flags and properties
+     */
+    public abstract int encodedSize(ValueSizer sizer) throws IOException;
+
+    /**
+     * Public API - the number of bytes {@link #writePropertiesTo} will write
+     */
+    public int encodedSize() throws IOException {
+        return encodedSize(new ValueSizer());
+    }
+
     /** Public API - {@inheritDoc} */
     public void appendPropertyDebugStringTo(StringBuilder acc) {
         acc.append("(?)");
@@ -72,12 +112,33 @@ public abstract class AMQContentHeader implements ContentHeader {
      * Private API - Called by {@link AMQCommand#transmit}
      */
     public Frame toFrame(int channelNumber, long bodySize) throws IOException {
-        Frame frame = new Frame(AMQP.FRAME_HEADER, channelNumber);
+        return toFrame(channelNumber, bodySize, null);
+    }
+
+    /**
+     * Private API - encodes this header, recording it in the given
+     * metrics unless they are null
+     */
+    public Frame toFrame(int channelNumber, long bodySize, MethodMetrics metrics) throws IOException {
+        ValueSizer sizer = new ValueSizer();
+        // class id, weight and body size precede the properties
+        Frame frame = new Frame(AMQP.FRAME_HEADER, channelNumber, 12 + encodedSize(sizer));
         DataOutputStream bodyOut = frame.getOutputStream();
         bodyOut.writeShort(getClassId());
-        writeTo(bodyOut, bodySize);
+        writeTo(bodyOut, bodySize, sizer, metrics);
         return frame;
     }
+
+    /**
+     * Private API - writes the payload of a frame carrying this
+     * header, recording it in the given metrics unless they are null
+     */
+    public void writePayloadTo(DataOutputStream out, long bodySize, MethodMetrics metrics)
+        throws IOException
+    {
+        out.writeShort(getClassId());
+        writeTo(out, bodySize, null, metrics);
+    }
     
     public Object clone() throws CloneNotSupportedException {
         return super.clone();
@@ -0,0 +1,278 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.impl;
+
+import java.io.IOException;
+import java.math.BigDecimal;
+import java.math.BigInteger;
+import java.nio.ByteBuffer;
+import java.util.ArrayList;
+import java.util.Date;
+import java.util.List;
+import java.util.Map;
+
+import com.rabbitmq.client.LongString;
+import com.rabbitmq.client.MalformedFrameException;
+
+/**
+ * Helper class to read AMQP wire-protocol encoded values at absolute
+ * offsets of a {@link ByteBuffer}. Methods on this class are usually
+ * called from generated code, and produce the same values as the
+ * equivalent {@link ValueReader} methods.
+ */
+public class ByteBufferValueReader
+{
+    private static final long INT_MASK = 0xffffffffL;
+
+    private ByteBufferValueReader() { }
+
+    /** Public API - reads an octet. */
+    public static int readOctet(ByteBuffer in, int offset)
+    {
+        return in.get(offset) & 0xff;
+    }
+
+    /** Public API - reads a short integer. */
+    public static int readShort(ByteBuffer in, int offset)
+    {
+        return in.getShort(offset) & 0xffff;
+    }
+
+    /** Public API - reads an integer. */
+    public static int readLong(ByteBuffer in, int offset)
+    {
+        return in.getInt(offset);
+    }
+
+    /** Public API - reads a long integer. */
+    public static long readLonglong(ByteBuffer in, int offset)
+    {
+        return in.getLong(offset);
+    }
+
+    /** Public API - reads a timestamp. */
+    public static Date readTimestamp(ByteBuffer in, int offset)
+    {
+        return new Date(readTimestampMillis(in, offset));
+    }
+
+    /** Public API - reads a timestamp, in milliseconds since the epoch. */
+    public static long readTimestampMillis(ByteBuffer in, int offset)
+    {
+        return in.getLong(offset)*1000;
+    }
+
+    /** Public API - the encoded size of the short string at the given offset. */
+    public static int shortstrSize(ByteBuffer in, int offset)
+    {
+        return 1 + (in.get(offset) & 0xff);
+    }
+
+    /** Public API - reads a short string. */
+    public static String readShortstr(ByteBuffer in, int offset)
+        throws IOException
+    {
+        return utf8(in, offset + 1, in.get(offset) & 0xff);
+    }
+
+    /**
+     * Public API - reads a short string through
+     * {@link ShortstrInternCache#SHARED}.
+     */
+    public static String readInternedShortstr(ByteBuffer in, int offset)
+        throws IOException
+    {
+        return ShortstrInternCache.SHARED.intern(in, offset + 1, in.get(offset) & 0xff);
+    }
+
+    /** Public API - the encoded size of the long string at the given offset. */
+    public static int longstrSize(ByteBuffer in, int offset)
+    {
+        return 4 + checkedLength(in, offset);
+    }
+
+    /** Public API - reads a long string. */
+    public static LongString readLongstr(ByteBuffer in, int offset)
+    {
+        return LongStringHelper.asLongString(readBytes(in, offset));
+    }
+
+    /** Public API - the encoded size of the table at the given offset. */
+    public static int tableSize(ByteBuffer in, int offset)
+    {
+        return 4 + checkedLength(in, offset);
+    }
+
+    /** Public API - reads a table, and any tables nested in it, as {@link ImmutableTable}s. */
+    public static Map<String, Object> readTable(ByteBuffer in, int offset)
+        throws IOException
+    {
+        int length = checkedLength(in, offset);
+        if (length == 0) return ImmutableTable.EMPTY;
+        return readTable(view(in, offset + 4, length));
+    }
+
+    /** Reads a 32-bit length prefix, rejecting lengths we cannot index. */
+    private static int checkedLength(ByteBuffer in, int offset)
+    {
+        long length = in.getInt(offset) & INT_MASK;
+        if (length < Integer.MAX_VALUE) {
+            return (int)length;
+        } else {
+            throw new UnsupportedOperationException
+                ("Very long byte vectors and strings not currently supported");
+        }
+    }
+
+    private static byte[] readBytes(ByteBuffer in, int offset)
+    {
+        byte [] buffer = new byte[checkedLength(in, offset)];
+        ByteBuffer src = in.duplicate();
+        src.position(offset + 4);
+        src.get(buffer);
+        return buffer;
+    }
+
+    private static String utf8(ByteBuffer in, int offset, int length)
+        throws IOException
+    {
+        if (in.hasArray()) {
+            if (offset + length > in.limit())
+                throw new IndexOutOfBoundsException();
+            return new String(in.array(), in.arrayOffset() + offset, length, "utf-8");
+        }
+        byte [] b = new byte[length];
+        ByteBuffer src = in.duplicate();
+        src.position(offset);
+        src.get(b);
+        return new String(b, "utf-8");
+    }
+
+    /** A view of length bytes starting at offset, read with relative gets. */
+    private static ByteBuffer view(ByteBuffer in, int offset, int length)
+    {
+        ByteBuffer view = in.duplicate();
+        view.limit(offset + length);
+        view.position(offset);
+        return view;
+    }
+
+    private static String readShortstr(ByteBuffer in)
+        throws IOException
+    {
+        int length = in.get() & 0xff;
+        String s = utf8(in, in.position(), length);
+        in.position(in.position() + length);
+        return s;
+    }
+
+    private static byte[] readBytes(ByteBuffer in)
+    {
+        byte [] buffer = new byte[checkedLength(in, in.position())];
+        in.position(in.position() + 4);
+        in.get(buffer);
+        return buffer;
+    }
+
+    private static ImmutableTable readTable(ByteBuffer in)
+        throws IOException
+    {
+        ImmutableTable.Builder table = new ImmutableTable.Builder();
+        while (in.hasRemaining()) {
+            String name = readShortstr(in);
+            table.put(name, readFieldValue(in));
+        }
+        return table.build();
+    }
+
+    private static List<Object> readArray(ByteBuffer in)
+        throws IOException
+    {
+        List<Object> array = new ArrayList<Object>();
+        while (in.hasRemaining()) {
+            array.add(readFieldValue(in));
+        }
+        return array;
+    }
+
+    /** Reads a nested table or array body, advancing past it. */
+    private static ByteBuffer nested(ByteBuffer in)
+    {
+        int length = checkedLength(in, in.position());
+        ByteBuffer nested = view(in, in.position() + 4, length);
+        in.position(in.position() + 4 + length);
+        return nested;
+    }
+
+    private static Object readFieldValue(ByteBuffer in)
+        throws IOException
+    {
+        Object value = null;
+        switch(in.get() & 0xff) {
+          case 'S':
+              value = LongStringHelper.asLongString(readBytes(in));
+              break;
+          case 'I':
+              value = in.getInt();
+              break;
+          case 'D':
+              int scale = in.get() & 0xff;
+              byte [] unscaled = new byte[4];
+              in.get(unscaled);
+              value = new BigDecimal(new BigInteger(unscaled), scale);
+              break;
+          case 'T':
+              value = new Date(in.getLong()*1000);
+              break;
+          case 'F':
+              ByteBuffer tableIn = nested(in);
+              value = readTable(tableIn);
+              break;
+          case 'A':
+              value = readArray(nested(in));
+              break;
+          case 'b':
+              value = in.get();
+              break;
+          case 'd':
+              value = in.getDouble();
+              break;
+          case 'f':
+              value = in.getFloat();
+              break;
+          case 'l':
+              value = in.getLong();
+              break;
+          case 's':
+              value = in.getShort();
+              break;
+          case 't':
+              value = in.get() != 0;
+              break;
+          case 'x':
+              value = readBytes(in);
+              break;
+          case 'V':
+              value = null;
+              break;
+          default:
+              throw new MalformedFrameException
+                  ("Unrecognised type in table");
+        }
+        return value;
+    }
+}
@@ -84,6 +84,21 @@ public class ChannelManager {
         }
     }
 
+    /**
+     * Waits until every managed channel has handled the frames
+     * dispatched to it so far.
+     * @see AMQChannel#awaitDispatchedFrames()
+     */
+    public void awaitDispatchedFrames() {
+        Set<ChannelN> channels;
+        synchronized(this.monitor) {
+            channels = new HashSet<ChannelN>(_channelMap.values());
+        }
+        for (ChannelN channel : channels) {
+            channel.awaitDispatchedFrames();
+        }
+    }
+
     /**
      * Handle shutdown. All the managed {@link com.rabbitmq.client.Channel Channel}s are shutdown.
      * @param signal reason for shutdown
@@ -39,6 +39,7 @@ import com.rabbitmq.client.Method;
 import com.rabbitmq.client.MessageProperties;
 import com.rabbitmq.client.ReturnListener;
 import com.rabbitmq.client.ShutdownSignalException;
+import com.rabbitmq.client.StreamingConsumer;
 import com.rabbitmq.client.UnexpectedMethodError;
 import com.rabbitmq.client.impl.AMQImpl.Basic;
 import com.rabbitmq.client.impl.AMQImpl.Channel;
@@ -58,7 +59,8 @@ import com.rabbitmq.utility.Utility;
  * {@link ChannelN} ch1 = conn.{@link Connection#createChannel createChannel}();
  * </pre>
  */
-public class ChannelN extends AMQChannel implements com.rabbitmq.client.Channel {
+public class ChannelN extends AMQChannel implements com.rabbitmq.client.BatchingChannel,
+                                                   com.rabbitmq.client.PipelinedChannel {
     private static final String UNSPECIFIED_OUT_OF_BAND = "";
 
     /** Map from consumer tag to {@link Consumer} instance.
@@ -86,6 +88,9 @@ public class ChannelN extends AMQChannel implements com.rabbitmq.client.Channel
     /** The current default consumer, or null if there is none. */
     private volatile Consumer defaultConsumer = null;
 
+    /** The consumer the body of the delivery being read is streamed to, or null */
+    private StreamingConsumer streamingConsumer = null;
+
     /** Dispatcher of consumer work for this channel */
     private final ConsumerDispatcher dispatcher;
 
@@ -100,6 +105,17 @@ public class ChannelN extends AMQChannel implements com.rabbitmq.client.Channel
     /** Whether any nacks have been received since the last waitForConfirms(). */
     private volatile boolean onlyAcksReceived = true;
 
+    /** Pre-encoded frames for frequently sent methods, made on first use
+     *  and only used while holding _channelMutex */
+    private Basic.Ack.Template ackTemplate;
+    private Basic.Nack.Template nackTemplate;
+    private Basic.Reject.Template rejectTemplate;
+    private Channel.FlowOk.Template flowOkTemplate;
+    private Basic.Publish.Template publishTemplate;
+    /** Where the previous message was published, for deciding when to
+     *  make a publish template */
+    private String lastPublishExchange, lastPublishRoutingKey;
+
     /**
      * Construct a new channel on the given connection with the given
      * channel number. Usually not called directly - call
@@ -316,8 +332,9 @@ public class ChannelN extends AMQChannel implements com.rabbitmq.client.Channel
         // incoming commands except for a close and close-ok.
 
         Method method = command.getMethod();
+        int ordinal = AMQImpl.methodOrdinal(method);
         // we deal with channel.close in the same way, regardless
-        if (method instanceof Channel.Close) {
+        if (ordinal == Channel.Close.ORDINAL) {
             asyncShutdown(command);
             return true;
         }
@@ -325,32 +342,39 @@ public class ChannelN extends AMQChannel implements com.rabbitmq.client.Channel
         if (isOpen()) {
             // We're in normal running mode.
 
-            if (method instanceof Basic.Deliver) {
+            switch (ordinal) {
+              case Basic.Deliver.ORDINAL:
                 processDelivery(command, (Basic.Deliver) method);
                 return true;
-            } else if (method instanceof Basic.Return) {
+              case Basic.Return.ORDINAL:
                 callReturnListeners(command, (Basic.Return) method);
                 return true;
-            } else if (method instanceof Channel.Flow) {
+              case Channel.Flow.ORDINAL: {
                 Channel.Flow channelFlow = (Channel.Flow) method;
                 synchronized (_channelMutex) {
                     _blockContent = !channelFlow.getActive();
-                    transmit(new Channel.FlowOk(!_blockContent));
+                    if (flowOkTemplate == null) {
+                        flowOkTemplate = new Channel.FlowOk.Template(getChannelNumber());
+                    }
+                    transmitMethodFrame(flowOkTemplate, flowOkTemplate.frame(!_blockContent));
                     _channelMutex.notifyAll();
                 }
                 callFlowListeners(command, channelFlow);
                 return true;
-            } else if (method instanceof Basic.Ack) {
+              }
+              case Basic.Ack.ORDINAL: {
                 Basic.Ack ack = (Basic.Ack) method;
                 callConfirmListeners(command, ack);
                 handleAckNack(ack.getDeliveryTag(), ack.getMultiple(), false);
                 return true;
-            } else if (method instanceof Basic.Nack) {
+              }
+              case Basic.Nack.ORDINAL: {
                 Basic.Nack nack = (Basic.Nack) method;
                 callConfirmListeners(command, nack);
                 handleAckNack(nack.getDeliveryTag(), nack.getMultiple(), true);
                 return true;
-            } else if (method instanceof Basic.RecoverOk) {
+              }
+              case Basic.RecoverOk.ORDINAL:
                 for (Map.Entry<String, Consumer> entry : _consumers.entrySet()) {
                     this.dispatcher.handleRecoverOk(entry.getValue(), entry.getKey());
                 }
@@ -358,7 +382,7 @@ public class ChannelN extends AMQChannel implements com.rabbitmq.client.Channel
                 // be handled by whichever RPC continuation invoked Recover,
                 // so return false
                 return false;
-            } else if (method instanceof Basic.Cancel) {
+              case Basic.Cancel.ORDINAL: {
                 Basic.Cancel m = (Basic.Cancel)method;
                 String consumerTag = m.getConsumerTag();
                 Consumer callback = _consumers.remove(consumerTag);
@@ -377,13 +401,14 @@ public class ChannelN extends AMQChannel implements com.rabbitmq.client.Channel
                     }
                 }
                 return true;
-            } else {
+              }
+              default:
                 return false;
             }
         } else {
             // We're in quiescing mode == !isOpen()
 
-            if (method instanceof Channel.CloseOk) {
+            if (ordinal == Channel.CloseOk.ORDINAL) {
                 // We're quiescing, and we see a channel.close-ok:
                 // this is our signal to leave quiescing mode and
                 // finally shut down for good. Let it be handled as an
@@ -398,9 +423,74 @@ public class ChannelN extends AMQChannel implements com.rabbitmq.client.Channel
         }
     }
 
+    /**
+     * Protected API - Starts streaming the body of a delivery to its
+     * consumer, if that is a {@link StreamingConsumer}.
+     */
+    @Override protected void processContentHeader(AMQCommand command) {
+        Method method = command.getMethod();
+        if (AMQImpl.methodOrdinal(method) != Basic.Deliver.ORDINAL || !isOpen()) return;
+        Basic.Deliver m = (Basic.Deliver) method;
+
+        Consumer callback = _consumers.get(m.getConsumerTag());
+        if (callback == null) callback = defaultConsumer;
+        if (!(callback instanceof StreamingConsumer)) return;
+        final StreamingConsumer consumer = (StreamingConsumer) callback;
+        final String consumerTag = m.getConsumerTag();
+        this.streamingConsumer = consumer;
+
+        Envelope envelope = new Envelope(m.getDeliveryTag(),
+                                         m.getRedelivered(),
+                                         m.getExchange(),
+                                         m.getRoutingKey());
+        AMQContentHeader header = command.getContentHeader();
+        try {
+            this.dispatcher.handleDeliveryStart(consumer,
+                                                consumerTag,
+                                                envelope,
+                                                (BasicProperties) header,
+                                                header.getBodySize());
+        } catch (Throwable ex) {
+            getConnection().getExceptionHandler().handleConsumerException(this,
+                ex,
+                consumer,
+                consumerTag,
+                "handleDeliveryStart");
+        }
+        command.streamContentBody(new AMQCommand.ContentBodyListener() {
+            public void handleBodyFragment(byte[] fragment) {
+                try {
+                    ChannelN.this.dispatcher.handleDeliveryBody(consumer, consumerTag, fragment);
+                } catch (Throwable ex) {
+                    getConnection().getExceptionHandler().handleConsumerException(ChannelN.this,
+                        ex,
+                        consumer,
+                        consumerTag,
+                        "handleDeliveryBody");
+                }
+            }
+        });
+    }
+
     protected void processDelivery(Command command, Basic.Deliver method) {
         Basic.Deliver m = method;
 
+        StreamingConsumer streamed = this.streamingConsumer;
+        if (streamed != null) {
+            // the body has already been passed to the consumer
+            this.streamingConsumer = null;
+            try {
+                this.dispatcher.handleDeliveryEnd(streamed, m.getConsumerTag());
+            } catch (Throwable ex) {
+                getConnection().getExceptionHandler().handleConsumerException(this,
+                    ex,
+                    streamed,
+                    m.getConsumerTag(),
+                    "handleDeliveryEnd");
+            }
+            return;
+        }
+
         Consumer callback = _consumers.get(m.getConsumerTag());
         if (callback == null) {
             if (defaultConsumer == null) {
@@ -654,13 +744,35 @@ public class ChannelN extends AMQChannel implements com.rabbitmq.client.Channel
         if (props == null) {
             useProps = MessageProperties.MINIMAL_BASIC;
         }
-        transmit(new AMQCommand(new Basic.Publish.Builder()
+        Method publish = new Basic.Publish.Builder()
                                         .exchange(exchange)
                                         .routingKey(routingKey)
                                         .mandatory(mandatory)
                                         .immediate(immediate)
-                                        .build(),
-                                       useProps, body));
+                                        .build();
+        transmit(new AMQCommand(publish, useProps, body,
+                                publishTemplate(exchange, routingKey)));
+    }
+
+    /**
+     * The publish template for the given exchange and routing key,
+     * made once they have been published to twice in a row, or null.
+     */
+    private Basic.Publish.Template publishTemplate(String exchange, String routingKey)
+        throws IOException
+    {
+        synchronized (_channelMutex) {
+            if (publishTemplate != null && publishTemplate.matches(0, exchange, routingKey)) {
+                return publishTemplate;
+            }
+            if (exchange.equals(lastPublishExchange) && routingKey.equals(lastPublishRoutingKey)) {
+                publishTemplate = new Basic.Publish.Template(getChannelNumber(), 0, exchange, routingKey);
+                return publishTemplate;
+            }
+            lastPublishExchange = exchange;
+            lastPublishRoutingKey = routingKey;
+            return null;
+        }
     }
 
     /** Public API - {@inheritDoc} */
@@ -1040,21 +1152,36 @@ public class ChannelN extends AMQChannel implements com.rabbitmq.client.Channel
     public void basicAck(long deliveryTag, boolean multiple)
         throws IOException
     {
-        transmit(new Basic.Ack(deliveryTag, multiple));
+        synchronized (_channelMutex) {
+            if (ackTemplate == null) {
+                ackTemplate = new Basic.Ack.Template(getChannelNumber());
+            }
+            transmitMethodFrame(ackTemplate, ackTemplate.frame(deliveryTag, multiple));
+        }
     }
 
     /** Public API - {@inheritDoc} */
     public void basicNack(long deliveryTag, boolean multiple, boolean requeue)
         throws IOException
     {
-        transmit(new Basic.Nack(deliveryTag, multiple, requeue));
+        synchronized (_channelMutex) {
+            if (nackTemplate == null) {
+                nackTemplate = new Basic.Nack.Template(getChannelNumber());
+            }
+            transmitMethodFrame(nackTemplate, nackTemplate.frame(deliveryTag, multiple, requeue));
+        }
     }
 
     /** Public API - {@inheritDoc} */
     public void basicReject(long deliveryTag, boolean requeue)
         throws IOException
     {
-        transmit(new Basic.Reject(deliveryTag, requeue));
+        synchronized (_channelMutex) {
+            if (rejectTemplate == null) {
+                rejectTemplate = new Basic.Reject.Template(getChannelNumber());
+            }
+            transmitMethodFrame(rejectTemplate, rejectTemplate.frame(deliveryTag, requeue));
+        }
     }
 
     /** Public API - {@inheritDoc} */
@@ -1220,10 +1347,18 @@ public class ChannelN extends AMQChannel implements com.rabbitmq.client.Channel
         }
     }
 
+    @Override
+    public void enqueuePipelinedRpc(RpcContinuation k) {
+        synchronized (_channelMutex) {
+            super.enqueuePipelinedRpc(k);
+            dispatcher.setUnlimited(true);
+        }
+    }
+
     @Override
     protected void markRpcFinished() {
         synchronized (_channelMutex) {
-            dispatcher.setUnlimited(false);
+            if (!isOutstandingRpc()) dispatcher.setUnlimited(false);
         }
     }
 
@@ -17,10 +17,11 @@
 package com.rabbitmq.client.impl;
 
 import java.io.IOException;
-import java.util.ArrayList;
-import java.util.List;
+import java.nio.ByteBuffer;
+import java.util.Arrays;
 
 import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.MalformedFrameException;
 import com.rabbitmq.client.UnexpectedFrameError;
 
 /**
@@ -45,18 +46,59 @@ final class CommandAssembler {
     /** The content header for this command */
     private AMQContentHeader contentHeader;
 
-    /** The fragments of this command's content body - a list of byte[] */
-    private final List<byte[]> bodyN;
-    /** sum of the lengths of all fragments */
+    /**
+     * This command's content body: a single fragment holding all of
+     * it, or an array of the size announced by the content header
+     * that fragments are copied into as they arrive
+     */
+    private byte[] body;
+    /** number of bytes of body accumulated so far */
     private int bodyLength;
 
+    /** Receives the fragments of the content body instead of this assembler, or null */
+    private AMQCommand.ContentBodyListener bodyListener;
+
     /** No bytes of content body not yet accumulated */
     private long remainingBodyBytes;
 
+    /** Whether to decode content header properties on first access */
+    private final boolean lazyContentHeader;
+
+    /** Flyweight methods to decode into, or null */
+    private final AMQImpl.ReusableMethods reusableMethods;
+
+    /** Counters to record decoded frames in, or null */
+    private final MethodMetrics metrics;
+
+    /** Cache to decode the content header through, or null */
+    private final ContentHeaderCache contentHeaderCache;
+
     public CommandAssembler(Method method, AMQContentHeader contentHeader, byte[] body) {
+        this(method, contentHeader, body, false, null, null, null);
+    }
+
+    /** Constructs an assembler ready to read a command from frames */
+    public CommandAssembler(boolean lazyContentHeader, AMQImpl.ReusableMethods reusableMethods,
+                            MethodMetrics metrics) {
+        this(lazyContentHeader, reusableMethods, metrics, null);
+    }
+
+    /** Constructs an assembler ready to read a command from frames */
+    public CommandAssembler(boolean lazyContentHeader, AMQImpl.ReusableMethods reusableMethods,
+                            MethodMetrics metrics, ContentHeaderCache contentHeaderCache) {
+        this(null, null, null, lazyContentHeader, reusableMethods, metrics, contentHeaderCache);
+    }
+
+    private CommandAssembler(Method method, AMQContentHeader contentHeader, byte[] body,
+                             boolean lazyContentHeader, AMQImpl.ReusableMethods reusableMethods,
+                             MethodMetrics metrics, ContentHeaderCache contentHeaderCache) {
+        this.lazyContentHeader = lazyContentHeader;
+        this.reusableMethods = reusableMethods;
+        this.metrics = metrics;
+        this.contentHeaderCache = contentHeaderCache;
         this.method = method;
         this.contentHeader = contentHeader;
-        this.bodyN = new ArrayList<byte[]>(2);
+        this.body = null;
         this.bodyLength = 0;
         this.remainingBodyBytes = 0;
         appendBodyFragment(body);
@@ -90,7 +132,7 @@ final class CommandAssembler {
 
     private void consumeMethodFrame(Frame f) throws IOException {
         if (f.type == AMQP.FRAME_METHOD) {
-            this.method = AMQImpl.readMethodFrom(f.getInputStream());
+            this.method = AMQImpl.readMethodFrom(ByteBuffer.wrap(f.getPayload()), this.reusableMethods, this.metrics);
             this.state = this.method.hasContent() ? CAState.EXPECTING_CONTENT_HEADER : CAState.COMPLETE;
         } else {
             throw new UnexpectedFrameError(f, AMQP.FRAME_METHOD);
@@ -99,15 +141,25 @@ final class CommandAssembler {
 
     private void consumeHeaderFrame(Frame f) throws IOException {
         if (f.type == AMQP.FRAME_HEADER) {
-            this.contentHeader = AMQImpl.readContentHeaderFrom(f.getInputStream());
+            if (this.lazyContentHeader) {
+                this.contentHeader = AMQImpl.readLazyContentHeaderFrom(ByteBuffer.wrap(f.getPayload()), this.metrics);
+            } else if (this.contentHeaderCache != null) {
+                this.contentHeader = this.contentHeaderCache.readContentHeaderFrom(f, this.metrics);
+            } else {
+                this.contentHeader = AMQImpl.readContentHeaderFrom(f, this.metrics);
+            }
             this.remainingBodyBytes = this.contentHeader.getBodySize();
+            if (this.remainingBodyBytes > Integer.MAX_VALUE) {
+                throw new MalformedFrameException("content body of " + this.remainingBodyBytes +
+                                                  " bytes is too large for a byte array");
+            }
             updateContentBodyState();
         } else {
             throw new UnexpectedFrameError(f, AMQP.FRAME_HEADER);
         }
     }
 
-    private void consumeBodyFrame(Frame f) {
+    private void consumeBodyFrame(Frame f) throws IOException {
         if (f.type == AMQP.FRAME_BODY) {
             byte[] fragment = f.getPayload();
             this.remainingBodyBytes -= fragment.length;
@@ -115,36 +167,56 @@ final class CommandAssembler {
             if (this.remainingBodyBytes < 0) {
                 throw new UnsupportedOperationException("%%%%%% FIXME unimplemented");
             }
-            appendBodyFragment(fragment);
+            if (this.bodyListener == null) {
+                appendBodyFragment(fragment);
+            } else {
+                this.bodyListener.handleBodyFragment(fragment);
+            }
         } else {
             throw new UnexpectedFrameError(f, AMQP.FRAME_BODY);
         }
     }
 
-    /** Stitches together a fragmented content body into a single byte array */
-    private byte[] coalesceContentBody() {
+    /**
+     * @return the content body accumulated so far; empty if the body
+     * was passed to a {@link AMQCommand.ContentBodyListener}
+     */
+    public synchronized byte[] getContentBody() {
         if (this.bodyLength == 0) return EMPTY_BYTE_ARRAY;
-        if (this.bodyN.size() == 1) return this.bodyN.get(0);
-
-        byte[] body = new byte[bodyLength];
-        int offset = 0;
-        for (byte[] fragment : this.bodyN) {
-            System.arraycopy(fragment, 0, body, offset, fragment.length);
-            offset += fragment.length;
+        if (this.bodyLength < this.body.length) {
+            // still being assembled
+            return Arrays.copyOf(this.body, this.bodyLength);
         }
-        this.bodyN.clear();
-        this.bodyN.add(body);
-        return body;
+        return this.body;
     }
 
-    public synchronized byte[] getContentBody() {
-        return coalesceContentBody();
+    /**
+     * Passes the fragments of the content body still to come to the
+     * given listener as they arrive, instead of accumulating them.
+     */
+    public synchronized void setContentBodyListener(AMQCommand.ContentBodyListener listener) {
+        this.bodyListener = listener;
     }
 
+    /**
+     * Adds a fragment to the content body. A body arriving whole is
+     * kept as it is; otherwise the body is allocated once, at the size
+     * still expected, and each fragment is copied into place.
+     */
     private void appendBodyFragment(byte[] fragment) {
         if (fragment == null || fragment.length == 0) return;
-        bodyN.add(fragment);
-        bodyLength += fragment.length;
+        if (this.bodyLength == 0 && this.remainingBodyBytes <= 0) {
+            this.body = fragment;
+        } else {
+            int size = (int) (this.bodyLength + fragment.length + this.remainingBodyBytes);
+            if (this.body == null) {
+                this.body = new byte[size];
+            } else if (this.body.length < size) {
+                this.body = Arrays.copyOf(this.body, size);
+            }
+            System.arraycopy(fragment, 0, this.body, this.bodyLength, fragment.length);
+        }
+        this.bodyLength += fragment.length;
     }
 
     /**
@@ -0,0 +1,185 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.impl;
+
+import java.io.ByteArrayOutputStream;
+import java.io.DataOutputStream;
+import java.io.IOException;
+
+import com.rabbitmq.client.AMQP;
+
+/**
+ * The frames of a run of commands on one channel, encoded back to
+ * back into a single buffer and written to the connection in one
+ * write. Methods and content headers are encoded straight into the
+ * buffer by their generated writers, without a {@link Frame} or
+ * accumulator of their own; the buffer itself is kept and reused
+ * from one batch to the next.
+ * <p/><b>Concurrency</b><br/>
+ * This class is not thread-safe. Channels use their batch while
+ * holding their channel mutex.
+ * @see com.rabbitmq.client.BatchingChannel#startBatch()
+ */
+public final class CommandBatch {
+    /** Size at which a batch should be written without waiting for its end */
+    public static final int FLUSH_THRESHOLD = 256 * 1024;
+
+    /** Initial size of the buffer, to which it is cut back if a batch outgrows it a lot */
+    private static final int INITIAL_CAPACITY = 4096;
+
+    private final int channelNumber;
+    private final Buffer buffer = new Buffer();
+    private final DataOutputStream out = new DataOutputStream(buffer);
+    private final Frame frames;
+
+    public CommandBatch(int channelNumber) {
+        this.channelNumber = channelNumber;
+        this.frames = new EncodedFrames();
+    }
+
+    /** @return the number of bytes encoded so far */
+    public int size() {
+        return buffer.size();
+    }
+
+    public boolean isEmpty() {
+        return buffer.size() == 0;
+    }
+
+    /** @return whether the batch has reached {@link #FLUSH_THRESHOLD} */
+    public boolean isFull() {
+        return buffer.size() >= FLUSH_THRESHOLD;
+    }
+
+    /** Writes a frame header with a placeholder payload size, returning where the payload starts */
+    private int startFrame(int type) throws IOException {
+        out.writeByte(type);
+        out.writeShort(channelNumber);
+        out.writeInt(0);
+        return buffer.size();
+    }
+
+    /** Patches in the size of the payload started at the given position, and ends the frame */
+    private void endFrame(int payloadStart) throws IOException {
+        buffer.putInt(payloadStart - 4, buffer.size() - payloadStart);
+        out.write(AMQP.FRAME_END);
+    }
+
+    /**
+     * Encodes a method frame, recording it in the given metrics
+     * unless they are null.
+     */
+    public void addMethod(Method m, MethodMetrics metrics) throws IOException {
+        int payloadStart = startFrame(AMQP.FRAME_METHOD);
+        m.writePayloadTo(out, metrics);
+        endFrame(payloadStart);
+    }
+
+    /** Copies a frame encoded elsewhere, such as by a {@link MethodFrameTemplate} */
+    public void addFrame(Frame frame) throws IOException {
+        frame.writeTo(out);
+    }
+
+    /**
+     * Encodes the content header frame and body frames of a command,
+     * splitting the body to fit the given frame size, and recording
+     * the header in the given metrics unless they are null.
+     */
+    public void addContent(AMQContentHeader header, byte[] body, int frameMax,
+                           MethodMetrics metrics) throws IOException {
+        int payloadStart = startFrame(AMQP.FRAME_HEADER);
+        header.writePayloadTo(out, body.length, metrics);
+        endFrame(payloadStart);
+
+        int bodyPayloadMax = (frameMax == 0) ? body.length : frameMax
+                - AMQCommand.EMPTY_FRAME_SIZE;
+        for (int offset = 0; offset < body.length; offset += bodyPayloadMax) {
+            int remaining = body.length - offset;
+            int fragmentLength = (remaining < bodyPayloadMax) ? remaining
+                    : bodyPayloadMax;
+            payloadStart = startFrame(AMQP.FRAME_BODY);
+            out.write(body, offset, fragmentLength);
+            endFrame(payloadStart);
+        }
+    }
+
+    /**
+     * Writes every frame of the batch to the connection in a single
+     * write, flushes the connection, and empties the batch. The batch
+     * is emptied even if writing fails.
+     */
+    public void writeTo(AMQConnection connection) throws IOException {
+        try {
+            connection.writeFrame(frames);
+            connection.flush();
+        } finally {
+            clear();
+        }
+    }
+
+    /** Writes every frame of the batch to the given stream, leaving the batch as it is */
+    public void writeTo(DataOutputStream os) throws IOException {
+        buffer.writeTo(os);
+    }
+
+    /** Discards the frames encoded so far */
+    public void clear() {
+        buffer.clear();
+    }
+
+    /** A byte array stream whose frame sizes can be patched in once known */
+    private static final class Buffer extends ByteArrayOutputStream {
+        Buffer() {
+            super(INITIAL_CAPACITY);
+        }
+
+        void putInt(int pos, int value) {
+            buf[pos]     = (byte) (value >>> 24);
+            buf[pos + 1] = (byte) (value >>> 16);
+            buf[pos + 2] = (byte) (value >>> 8);
+            buf[pos + 3] = (byte) value;
+        }
+
+        void clear() {
+            reset();
+            if (buf.length > 2 * FLUSH_THRESHOLD) {
+                buf = new byte[INITIAL_CAPACITY];
+            }
+        }
+    }
+
+    /** The whole batch, as a frame the connection's frame handler can write */
+    private final class EncodedFrames extends Frame {
+        EncodedFrames() {
+            super(AMQP.FRAME_METHOD, channelNumber, (byte[]) null);
+        }
+
+        @Override public void writeTo(DataOutputStream os) throws IOException {
+            CommandBatch.this.writeTo(os);
+        }
+
+        /** @return the encoded frames, headers and frame-end octets included */
+        @Override public byte[] getPayload() {
+            return buffer.toByteArray();
+        }
+
+        @Override public String toString() {
+            return "Frame(type=" + type + ", channel=" + channel + ", " +
+                buffer.size() + " bytes of batched frames)";
+        }
+    }
+}
@@ -14,6 +14,7 @@ public class ConnectionParams {
     private ExecutorService consumerWorkServiceExecutor;
     private ScheduledExecutorService heartbeatExecutor;
     private ExecutorService shutdownExecutor;
+    private ExecutorService frameDecodingExecutor;
     private String virtualHost;
     private Map<String, Object> clientProperties;
     private int requestedFrameMax;
@@ -24,6 +25,10 @@ public class ConnectionParams {
     private SaslConfig saslConfig;
     private long networkRecoveryInterval;
     private boolean topologyRecovery;
+    private boolean lazyContentHeaderDecoding;
+    private boolean reusableMethodObjects;
+    private boolean methodMetrics;
+    private int contentHeaderCacheSize;
 
     private ExceptionHandler exceptionHandler;
     private ThreadFactory threadFactory;
@@ -90,6 +95,22 @@ public class ConnectionParams {
         return topologyRecovery;
     }
 
+    public boolean isLazyContentHeaderDecodingEnabled() {
+        return lazyContentHeaderDecoding;
+    }
+
+    public boolean isReusableMethodObjectsEnabled() {
+        return reusableMethodObjects;
+    }
+
+    public boolean isMethodMetricsEnabled() {
+        return methodMetrics;
+    }
+
+    public int getContentHeaderCacheSize() {
+        return contentHeaderCacheSize;
+    }
+
     public ThreadFactory getThreadFactory() {
     return threadFactory;
   }
@@ -142,6 +163,22 @@ public class ConnectionParams {
         this.topologyRecovery = topologyRecovery;
     }
 
+    public void setLazyContentHeaderDecoding(boolean lazyContentHeaderDecoding) {
+        this.lazyContentHeaderDecoding = lazyContentHeaderDecoding;
+    }
+
+    public void setReusableMethodObjects(boolean reusableMethodObjects) {
+        this.reusableMethodObjects = reusableMethodObjects;
+    }
+
+    public void setMethodMetrics(boolean methodMetrics) {
+        this.methodMetrics = methodMetrics;
+    }
+
+    public void setContentHeaderCacheSize(int contentHeaderCacheSize) {
+        this.contentHeaderCacheSize = contentHeaderCacheSize;
+    }
+
     public void setExceptionHandler(ExceptionHandler exceptionHandler) {
         this.exceptionHandler = exceptionHandler;
     }
@@ -165,4 +202,12 @@ public class ConnectionParams {
     public void setHeartbeatExecutor(ScheduledExecutorService heartbeatExecutor) {
         this.heartbeatExecutor = heartbeatExecutor;
     }
+
+    public ExecutorService getFrameDecodingExecutor() {
+        return frameDecodingExecutor;
+    }
+
+    public void setFrameDecodingExecutor(ExecutorService frameDecodingExecutor) {
+        this.frameDecodingExecutor = frameDecodingExecutor;
+    }
 }
@@ -20,6 +20,7 @@ import com.rabbitmq.client.Channel;
 import com.rabbitmq.client.Consumer;
 import com.rabbitmq.client.Envelope;
 import com.rabbitmq.client.ShutdownSignalException;
+import com.rabbitmq.client.StreamingConsumer;
 import com.rabbitmq.utility.Utility;
 
 import java.io.IOException;
@@ -157,6 +158,70 @@ final class ConsumerDispatcher {
         });
     }
 
+    public void handleDeliveryStart(final StreamingConsumer delegate,
+                                    final String consumerTag,
+                                    final Envelope envelope,
+                                    final AMQP.BasicProperties properties,
+                                    final long bodySize) throws IOException {
+        executeUnlessShuttingDown(
+        new Runnable() {
+            public void run() {
+                try {
+                    delegate.handleDeliveryStart(consumerTag,
+                            envelope,
+                            properties,
+                            bodySize);
+                } catch (Throwable ex) {
+                    connection.getExceptionHandler().handleConsumerException(
+                            channel,
+                            ex,
+                            delegate,
+                            consumerTag,
+                            "handleDeliveryStart");
+                }
+            }
+        });
+    }
+
+    public void handleDeliveryBody(final StreamingConsumer delegate,
+                                   final String consumerTag,
+                                   final byte[] fragment) throws IOException {
+        executeUnlessShuttingDown(
+        new Runnable() {
+            public void run() {
+                try {
+                    delegate.handleDeliveryBody(consumerTag, fragment);
+                } catch (Throwable ex) {
+                    connection.getExceptionHandler().handleConsumerException(
+                            channel,
+                            ex,
+                            delegate,
+                            consumerTag,
+                            "handleDeliveryBody");
+                }
+            }
+        });
+    }
+
+    public void handleDeliveryEnd(final StreamingConsumer delegate,
+                                  final String consumerTag) throws IOException {
+        executeUnlessShuttingDown(
+        new Runnable() {
+            public void run() {
+                try {
+                    delegate.handleDeliveryEnd(consumerTag);
+                } catch (Throwable ex) {
+                    connection.getExceptionHandler().handleConsumerException(
+                            channel,
+                            ex,
+                            delegate,
+                            consumerTag,
+                            "handleDeliveryEnd");
+                }
+            }
+        });
+    }
+
     public CountDownLatch handleShutdownSignal(final Map<String, Consumer> consumers,
                                      final ShutdownSignalException signal) {
         // ONLY CASE WHERE WE IGNORE shuttingDown
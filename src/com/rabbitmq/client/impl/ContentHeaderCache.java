@@ -0,0 +1,133 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.impl;
+
+import java.io.IOException;
+
+/**
+ * Bounded cache of decoded content headers, keyed by the bytes of
+ * their class id and properties. Messages from one producer usually
+ * carry byte-identical properties; a hit returns the header already
+ * decoded from the same bytes instead of decoding them again, so the
+ * messages share one properties instance and one headers table.
+ * <p/>
+ * The body size is not part of the key. A hit for a message whose body
+ * is of another size returns a shallow copy of the cached header with
+ * that size, which is still far cheaper than decoding. Headers holding
+ * a value that can be changed, such as a byte array in a headers
+ * table, are never cached (see {@link AMQContentHeader#isShareable}).
+ * <p/>
+ * Like {@link ShortstrInternCache}, the cache is direct-mapped, its
+ * entries are immutable and slots are replaced whole, so it may be
+ * used from any number of threads without locking.
+ */
+public final class ContentHeaderCache
+{
+    /** Class id, weight and body size precede the properties */
+    private static final int PROPERTIES_OFFSET = 12;
+
+    private static final class Entry
+    {
+        final int hash;
+        final int classId;
+        final byte[] properties;
+        final AMQContentHeader header;
+
+        Entry(int hash, int classId, byte[] properties, AMQContentHeader header)
+        {
+            this.hash = hash;
+            this.classId = classId;
+            this.properties = properties;
+            this.header = header;
+        }
+    }
+
+    private final Entry[] slots;
+    private final int mask;
+
+    /** Creates a cache of the given number of slots, a power of two. */
+    public ContentHeaderCache(int size)
+    {
+        if (size <= 0 || (size & (size - 1)) != 0) {
+            throw new IllegalArgumentException("cache size must be a power of two: " + size);
+        }
+        this.slots = new Entry[size];
+        this.mask = size - 1;
+    }
+
+    private static int readShort(byte[] payload, int offset)
+    {
+        return ((payload[offset] & 0xff) << 8) | (payload[offset + 1] & 0xff);
+    }
+
+    private static long readLong(byte[] payload, int offset)
+    {
+        long value = 0;
+        for (int i = offset; i < offset + 8; i++) {
+            value = (value << 8) | (payload[i] & 0xff);
+        }
+        return value;
+    }
+
+    /**
+     * Private API - decodes the content header in a frame, or returns
+     * the one cached for the same class and properties, recording it
+     * in <code>metrics</code> unless that is null.
+     */
+    public AMQContentHeader readContentHeaderFrom(Frame frame, MethodMetrics metrics)
+        throws IOException
+    {
+        byte[] payload = frame.getPayload();
+        if (payload.length < PROPERTIES_OFFSET) {
+            // too short to be a content header; let the decoder say so
+            return AMQImpl.readContentHeaderFrom(frame, metrics);
+        }
+        long started = metrics == null ? MethodMetrics.NOT_SAMPLED : metrics.startTiming();
+        int classId = readShort(payload, 0);
+        int length = payload.length - PROPERTIES_OFFSET;
+        int h = classId;
+        for (int i = PROPERTIES_OFFSET; i < payload.length; i++) {
+            h = 31 * h + payload[i];
+        }
+        h ^= h >>> 16;
+        int slot = h & mask;
+        Entry entry = slots[slot];
+        if (entry != null && entry.hash == h && entry.classId == classId
+            && entry.properties.length == length) {
+            byte[] key = entry.properties;
+            int i = 0;
+            while (i < length && key[i] == payload[PROPERTIES_OFFSET + i]) i++;
+            if (i == length) {
+                AMQContentHeader header = entry.header.withBodySize(readLong(payload, 4));
+                if (metrics != null) {
+                    metrics.contentHeaderReceived(classId, payload.length, started);
+                }
+                return header;
+            }
+        }
+        AMQContentHeader header = AMQImpl.readContentHeaderFrom(frame.getInputStream());
+        if (header.isShareable()) {
+            byte[] key = new byte[length];
+            System.arraycopy(payload, PROPERTIES_OFFSET, key, 0, length);
+            slots[slot] = new Entry(h, classId, key, header);
+        }
+        if (metrics != null) {
+            metrics.contentHeaderReceived(classId, payload.length, started);
+        }
+        return header;
+    }
+}
@@ -72,6 +72,16 @@ public class ContentHeaderPropertyReader {
         return (flagWord & (1 << bit)) != 0;
     }
 
+    /**
+     * Reads and returns a whole property flag word, continuation bit
+     * included, in place of a sequence of {@link #readPresence} calls.
+     */
+    public int readFlags() throws IOException {
+        readFlagWord();
+        bitCount = 15;
+        return flagWord;
+    }
+
     public void finishPresence() throws IOException {
         if (isContinuationBitSet()) {
             // FIXME: Proper exception class!
@@ -106,7 +116,7 @@ public class ContentHeaderPropertyReader {
 
     /** Reads and returns an AMQP table content header field. */
     public Map<String, Object> readTable() throws IOException {
-        return in.readTable();
+        return in.readImmutableTable();
     }
 
     /** Reads and returns an AMQP octet content header field. */
@@ -118,4 +128,9 @@ public class ContentHeaderPropertyReader {
     public Date readTimestamp() throws IOException {
         return in.readTimestamp();
     }
+
+    /** Reads and returns an AMQP timestamp content header field, in milliseconds since the epoch. */
+    public long readTimestampMillis() throws IOException {
+        return in.readTimestampMillis();
+    }
 }
@@ -19,6 +19,7 @@ package com.rabbitmq.client.impl;
 
 import java.io.DataOutputStream;
 import java.io.IOException;
+import java.nio.ByteBuffer;
 import java.util.Date;
 import java.util.Map;
 
@@ -39,15 +40,60 @@ public class ContentHeaderPropertyWriter {
     /** Position within current flags word */
     public int bitCount;
 
+    /** Counters to record the headers written in, or null */
+    private final MethodMetrics metrics;
+
+    /** The size of the output when the current properties were started */
+    private int propertiesStart;
+
     /**
      * Constructs a fresh ContentHeaderPropertyWriter.
      */
     public ContentHeaderPropertyWriter(DataOutputStream out) {
-        this.out = new ValueWriter(out);
+        this(out, null);
+    }
+
+    /**
+     * Constructs a fresh ContentHeaderPropertyWriter reusing the
+     * encodings remembered by the given {@link ValueSizer}.
+     */
+    public ContentHeaderPropertyWriter(DataOutputStream out, ValueSizer sizes) {
+        this(out, sizes, null);
+    }
+
+    /**
+     * Constructs a fresh ContentHeaderPropertyWriter that also records
+     * the headers it writes in the given metrics, unless that is null.
+     */
+    public ContentHeaderPropertyWriter(DataOutputStream out, ValueSizer sizes, MethodMetrics metrics) {
+        this.out = new ValueWriter(out, sizes);
+        this.metrics = metrics;
         this.flagWord = 0;
         this.bitCount = 0;
     }
 
+    /**
+     * Private API - called by generated code before writing
+     * properties.
+     * @return the value to pass to {@link #endProperties}
+     */
+    public long startProperties() {
+        if (metrics == null) return MethodMetrics.NOT_SAMPLED;
+        propertiesStart = out.size();
+        return metrics.startTiming();
+    }
+
+    /**
+     * Private API - called by generated code after writing
+     * properties, to record the header in this writer's metrics.
+     */
+    public void endProperties(int classId, long started) {
+        if (metrics != null) {
+            // class id, weight and body size precede the properties
+            metrics.contentHeaderSent(classId, 12 + out.size() - propertiesStart, started);
+        }
+    }
+
     private void emitFlagWord(boolean continuationBit) throws IOException {
         out.writeShort(continuationBit ? (flagWord | 1) : flagWord);
         flagWord = 0;
@@ -70,6 +116,31 @@ public class ContentHeaderPropertyWriter {
         emitFlagWord(false);
     }
 
+    /**
+     * Writes a whole property flag word, continuation bit included,
+     * in place of a sequence of {@link #writePresence} calls.
+     */
+    public void writeFlags(int flagWord) throws IOException {
+        out.writeShort(flagWord);
+    }
+
+    /**
+     * Writes property flags and properties exactly as they were
+     * received, in place of {@link #writePresence} and the typed
+     * writers.
+     */
+    public void writeEncodedProperties(ByteBuffer encoded, int offset, int length) throws IOException {
+        out.writeEncoded(encoded, offset, length);
+    }
+
+    /**
+     * Writes property flags and properties encoded earlier, as by
+     * {@link #writeEncodedProperties(ByteBuffer, int, int)}.
+     */
+    public void writeEncodedProperties(byte[] encoded, int offset, int length) throws IOException {
+        out.writeEncoded(encoded, offset, length);
+    }
+
     public void writeShortstr(String str) throws IOException {
         out.writeShortstr(str);
     }
@@ -86,14 +157,26 @@ public class ContentHeaderPropertyWriter {
         out.writeShort(s);
     }
 
+    public void writeShort(int s) throws IOException {
+        out.writeShort(s);
+    }
+
     public void writeLong(Integer l) throws IOException {
         out.writeLong(l);
     }
 
+    public void writeLong(int l) throws IOException {
+        out.writeLong(l);
+    }
+
     public void writeLonglong(Long ll) throws IOException {
         out.writeLonglong(ll);
     }
 
+    public void writeLonglong(long ll) throws IOException {
+        out.writeLonglong(ll);
+    }
+
     public void writeTable(Map<String, Object> table) throws IOException {
         out.writeTable(table);
     }
@@ -109,4 +192,8 @@ public class ContentHeaderPropertyWriter {
     public void writeTimestamp(Date timestamp) throws IOException {
         out.writeTimestamp(timestamp);
     }
+
+    public void writeTimestampMillis(long millis) throws IOException {
+        out.writeTimestampMillis(millis);
+    }
 }
@@ -61,6 +61,17 @@ public class Frame {
         this.accumulator = new ByteArrayOutputStream();
     }
 
+    /**
+     * Constructs a frame for output with a type and a channel number and a
+     * fresh accumulator presized to hold exactly payloadSize bytes.
+     */
+    public Frame(int type, int channel, int payloadSize) {
+        this.type = type;
+        this.channel = channel;
+        this.payload = null;
+        this.accumulator = new ByteArrayOutputStream(payloadSize);
+    }
+
     /**
      * Constructs a frame for input with a type, a channel number and a
      * payload byte array.
@@ -75,7 +86,7 @@ public class Frame {
     public static Frame fromBodyFragment(int channelNumber, byte[] body, int offset, int length)
         throws IOException
     {
-        Frame frame = new Frame(AMQP.FRAME_BODY, channelNumber);
+        Frame frame = new Frame(AMQP.FRAME_BODY, channelNumber, length);
         DataOutputStream bodyOut = frame.getOutputStream();
         bodyOut.write(body, offset, length);
         return frame;
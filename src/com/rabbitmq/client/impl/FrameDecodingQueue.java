@@ -0,0 +1,153 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.impl;
+
+import java.util.ArrayDeque;
+import java.util.Queue;
+import java.util.concurrent.ExecutorService;
+
+/**
+ * The frames read for one channel, waiting for a worker of the
+ * connection's frame decoding pool to decode and handle them. The
+ * connection's main loop then only reads frames and routes them to
+ * their channel, and the frames of different channels are decoded in
+ * parallel.
+ * <p/>
+ * At most one worker handles the frames of a channel at a time, in
+ * the order they were read, so each channel sees its frames exactly as
+ * it would on the main loop. A worker hands a busy channel back to the
+ * pool after {@link #FRAMES_PER_TURN} frames, letting other channels
+ * run. The main loop waits once {@link #MAX_PENDING_FRAMES} frames are
+ * queued for a channel, so a channel that cannot keep up slows the
+ * connection down, as it would without the pool, rather than
+ * buffering without bound. Before handling a frame for channel zero,
+ * or shutting down, the main loop waits for the queued frames of every
+ * channel to be handled, so that they are ordered before it as if read
+ * on the main loop.
+ * @see com.rabbitmq.client.ConnectionFactory#setFrameDecodingExecutor
+ */
+final class FrameDecodingQueue implements Runnable {
+    /** Frames queued for a channel beyond which the main loop waits */
+    static final int MAX_PENDING_FRAMES = 1024;
+
+    /** Frames a worker handles before letting other channels run */
+    static final int FRAMES_PER_TURN = 64;
+
+    /** The queue whose frames the current thread is handling, if any */
+    private static final ThreadLocal<FrameDecodingQueue> HANDLING =
+        new ThreadLocal<FrameDecodingQueue>();
+
+    private final AMQChannel channel;
+    private final ExecutorService executor;
+    private final Queue<Frame> frames = new ArrayDeque<Frame>();
+
+    /** Whether a worker is handling, or has been asked to handle, the queued frames */
+    private boolean scheduled = false;
+
+    FrameDecodingQueue(AMQChannel channel, ExecutorService executor) {
+        this.channel = channel;
+        this.executor = executor;
+    }
+
+    /** Queues a frame, asking a worker to handle it unless one will already */
+    void add(Frame frame) {
+        boolean schedule;
+        synchronized (this) {
+            boolean waitClearedInterruptStatus = false;
+            while (frames.size() >= MAX_PENDING_FRAMES) {
+                try {
+                    wait();
+                } catch (InterruptedException e) {
+                    waitClearedInterruptStatus = true;
+                }
+            }
+            if (waitClearedInterruptStatus) {
+                Thread.currentThread().interrupt();
+            }
+            frames.add(frame);
+            schedule = !scheduled;
+            scheduled = true;
+        }
+        if (schedule) {
+            try {
+                executor.execute(this);
+            } catch (RuntimeException ex) {
+                clear();
+                throw ex;
+            }
+        }
+    }
+
+    /** Waits until every frame queued so far has been handled, or dropped */
+    synchronized void awaitHandled() {
+        boolean waitClearedInterruptStatus = false;
+        while (scheduled) {
+            try {
+                wait();
+            } catch (InterruptedException e) {
+                waitClearedInterruptStatus = true;
+            }
+        }
+        if (waitClearedInterruptStatus) {
+            Thread.currentThread().interrupt();
+        }
+    }
+
+    private synchronized Frame next() {
+        Frame frame = frames.poll();
+        if (frame == null) {
+            scheduled = false;
+        }
+        notifyAll();
+        return frame;
+    }
+
+    /** Drops the queued frames of a channel whose frames can no longer be handled */
+    private synchronized void clear() {
+        frames.clear();
+        scheduled = false;
+        notifyAll();
+    }
+
+    /**
+     * Whether the current thread is a worker handling frames for the
+     * given connection, which must not wait for a reply read by its
+     * main loop, as the main loop may be waiting for the worker
+     */
+    static boolean isHandlingFramesOf(AMQConnection connection) {
+        FrameDecodingQueue queue = HANDLING.get();
+        return queue != null && queue.channel.getConnection() == connection;
+    }
+
+    public void run() {
+        HANDLING.set(this);
+        try {
+            for (int i = 0; i < FRAMES_PER_TURN; i++) {
+                Frame frame = next();
+                if (frame == null) return;
+                channel.handleFrame(frame);
+            }
+            // still scheduled: come back after the other channels
+            executor.execute(this);
+        } catch (Throwable ex) {
+            clear();
+            channel.getConnection().handleFrameDecodingFailure(ex);
+        } finally {
+            HANDLING.remove();
+        }
+    }
+}
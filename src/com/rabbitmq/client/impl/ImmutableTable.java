@@ -0,0 +1,278 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.impl;
+
+import java.math.BigDecimal;
+import java.util.AbstractMap;
+import java.util.AbstractSet;
+import java.util.Arrays;
+import java.util.Iterator;
+import java.util.Map;
+import java.util.NoSuchElementException;
+import java.util.Set;
+
+import com.rabbitmq.client.LongString;
+
+/**
+ * Compact, immutable AMQP table: keys and values are held in two
+ * arrays, in the order they were added. Tables of up to
+ * {@link #MAX_SCANNED} entries, typical of headers and arguments, are
+ * looked up by a linear scan, which for them is no slower than
+ * hashing; larger ones through an open-addressed index of their keys.
+ * Any attempt to modify the table throws
+ * {@link UnsupportedOperationException}.
+ * <p/>
+ * Generated code stores tables as instances of this class. Because
+ * they are immutable they can be passed from decoders to method and
+ * properties objects, and from properties to their builders and back,
+ * without copying; see {@link #copyOf}.
+ */
+public final class ImmutableTable extends AbstractMap<String, Object>
+{
+    /** The empty table */
+    public static final ImmutableTable EMPTY = new ImmutableTable(new String[0], new Object[0], 0, null);
+
+    /** Entries beyond which a table's keys are indexed rather than scanned */
+    static final int MAX_SCANNED = 8;
+
+    private final String[] keys;
+    private final Object[] values;
+    private final int size;
+    /** Index of the keys, null for tables of up to MAX_SCANNED entries */
+    private final int[] slots;
+
+    private transient Set<Map.Entry<String, Object>> entrySet;
+
+    /**
+     * Takes ownership of the arrays, of which the first size elements
+     * are used, and of the index of their keys, if any.
+     */
+    private ImmutableTable(String[] keys, Object[] values, int size, int[] slots)
+    {
+        this.keys = keys;
+        this.values = values;
+        this.size = size;
+        this.slots = slots;
+    }
+
+    /**
+     * Public API - an immutable table with the same entries as the
+     * given map. A map that is already an {@link ImmutableTable} is
+     * returned as is; any other is copied.
+     */
+    public static ImmutableTable copyOf(Map<String, ?> map)
+    {
+        if (map instanceof ImmutableTable) {
+            return (ImmutableTable) map;
+        }
+        int count = map.size();
+        if (count == 0) {
+            return EMPTY;
+        }
+        String[] keys = new String[count];
+        Object[] values = new Object[count];
+        int i = 0;
+        for (Map.Entry<String, ?> entry : map.entrySet()) {
+            if (i == count) {
+                throw new IllegalArgumentException("table modified while being copied");
+            }
+            keys[i] = entry.getKey();
+            values[i] = entry.getValue();
+            i++;
+        }
+        return new ImmutableTable(keys, values, i, i > MAX_SCANNED ? index(keys, i) : null);
+    }
+
+    /**
+     * Public API - whether a table value can never change once
+     * encoded: null, a string, number or boolean, or an
+     * {@link ImmutableTable} of such values. Dates, byte arrays, lists
+     * and other maps can be modified by whoever holds them, so are not.
+     */
+    public static boolean isImmutableValue(Object value)
+    {
+        if (value == null
+            || value instanceof String
+            || value instanceof LongString
+            || value instanceof Integer
+            || value instanceof Long
+            || value instanceof Short
+            || value instanceof Byte
+            || value instanceof Double
+            || value instanceof Float
+            || value instanceof BigDecimal
+            || value instanceof Boolean) {
+            return true;
+        }
+        if (value instanceof ImmutableTable) {
+            ImmutableTable table = (ImmutableTable) value;
+            for (int i = 0; i < table.size; i++) {
+                if (!isImmutableValue(table.values[i])) return false;
+            }
+            return true;
+        }
+        return false;
+    }
+
+    /**
+     * An open-addressed index of the given keys: each slot holds zero,
+     * or one more than the position of a key, in a power-of-two array
+     * at most half full. Of duplicate keys only the first is indexed.
+     */
+    private static int[] index(String[] keys, int size)
+    {
+        int[] slots = new int[Integer.highestOneBit(size) << 2];
+        for (int i = 0; i < size; i++) {
+            int slot = slot(slots, keys, keys[i]);
+            if (slots[slot] == 0) {
+                slots[slot] = i + 1;
+            }
+        }
+        return slots;
+    }
+
+    /** The slot holding the given key, or the empty slot where it would go */
+    private static int slot(int[] slots, String[] keys, Object key)
+    {
+        int h = key == null ? 0 : key.hashCode();
+        int mask = slots.length - 1;
+        int slot = (h ^ (h >>> 16)) & mask;
+        while (true) {
+            int i = slots[slot] - 1;
+            if (i < 0) return slot;
+            if (key == null ? keys[i] == null : key.equals(keys[i])) return slot;
+            slot = (slot + 1) & mask;
+        }
+    }
+
+    private int indexOf(Object key)
+    {
+        if (slots != null) {
+            return slots[slot(slots, keys, key)] - 1;
+        }
+        if (key == null) {
+            for (int i = 0; i < size; i++) {
+                if (keys[i] == null) return i;
+            }
+        } else {
+            for (int i = 0; i < size; i++) {
+                if (key.equals(keys[i])) return i;
+            }
+        }
+        return -1;
+    }
+
+    @Override public int size()
+    {
+        return size;
+    }
+
+    @Override public boolean isEmpty()
+    {
+        return size == 0;
+    }
+
+    @Override public boolean containsKey(Object key)
+    {
+        return indexOf(key) >= 0;
+    }
+
+    @Override public Object get(Object key)
+    {
+        int i = indexOf(key);
+        return i < 0 ? null : values[i];
+    }
+
+    @Override public Set<Map.Entry<String, Object>> entrySet()
+    {
+        if (entrySet == null) {
+            entrySet = new AbstractSet<Map.Entry<String, Object>>() {
+                @Override public int size() {
+                    return size;
+                }
+
+                @Override public Iterator<Map.Entry<String, Object>> iterator() {
+                    return new Iterator<Map.Entry<String, Object>>() {
+                        private int next = 0;
+
+                        public boolean hasNext() {
+                            return next < size;
+                        }
+
+                        public Map.Entry<String, Object> next() {
+                            if (next >= size) throw new NoSuchElementException();
+                            Map.Entry<String, Object> entry =
+                                new SimpleImmutableEntry<String, Object>(keys[next], values[next]);
+                            next++;
+                            return entry;
+                        }
+
+                        public void remove() {
+                            throw new UnsupportedOperationException();
+                        }
+                    };
+                }
+            };
+        }
+        return entrySet;
+    }
+
+    /**
+     * Package API - collects the entries of a table as it is decoded.
+     * Like the decoders before it, keeps the first of any duplicate
+     * keys.
+     */
+    static final class Builder
+    {
+        private String[] keys = new String[MAX_SCANNED];
+        private Object[] values = new Object[MAX_SCANNED];
+        private int size = 0;
+        /** Index of the keys, kept once there are more than MAX_SCANNED */
+        private int[] slots = null;
+
+        void put(String key, Object value)
+        {
+            int slot = -1;
+            if (slots == null) {
+                for (int i = 0; i < size; i++) {
+                    if (keys[i].equals(key)) return;
+                }
+            } else {
+                slot = slot(slots, keys, key);
+                if (slots[slot] != 0) return;
+            }
+            if (size == keys.length) {
+                keys = Arrays.copyOf(keys, size * 2);
+                values = Arrays.copyOf(values, size * 2);
+            }
+            keys[size] = key;
+            values[size] = value;
+            size++;
+            if (slots != null && size * 2 <= slots.length) {
+                slots[slot] = size;
+            } else if (size > MAX_SCANNED) {
+                slots = index(keys, size);
+            }
+        }
+
+        /** The table; the builder must not be used afterwards. */
+        ImmutableTable build()
+        {
+            return size == 0 ? EMPTY : new ImmutableTable(keys, values, size, slots);
+        }
+    }
+}
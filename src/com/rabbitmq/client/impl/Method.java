@@ -37,6 +37,13 @@ public abstract class Method implements com.rabbitmq.client.Method {
     /** {@inheritDoc} */
     public abstract String protocolMethodName();
 
+    /**
+     * Private API - the dense ordinal of this method among all methods
+     * of the protocol, for use as an array index or switch label.
+     * @return a value between 0 and {@link AMQImpl#METHOD_COUNT} - 1
+     */
+    public abstract int protocolMethodOrdinal();
+
     /**
      * Tell if content is present.
      * @return true if the wire-protocol for this method should involve a content header and body,
@@ -59,6 +66,25 @@ public abstract class Method implements com.rabbitmq.client.Method {
      */
     public abstract void writeArgumentsTo(MethodArgumentWriter writer) throws IOException;
 
+    /**
+     * Private API - Autogenerated computation of the encoded size of this
+     * method's arguments. The sizer remembers the encodings it computes, for
+     * reuse by a {@link ValueWriter} writing the same arguments.
+     * @param sizer the sizer used to measure variable-length arguments
+     * @return the number of bytes {@link #writeArgumentsTo} will write
+     * @throws IOException if an error is encountered
+     */
+    public abstract int encodedSize(ValueSizer sizer) throws IOException;
+
+    /**
+     * Public API - the encoded size of this method's arguments
+     * @return the number of bytes {@link #writeArgumentsTo} will write
+     * @throws IOException if an error is encountered
+     */
+    public int encodedSize() throws IOException {
+        return encodedSize(new ValueSizer());
+    }
+
     /**
      * Public API - debugging utility
      * @param buffer the buffer to append debug data to
@@ -75,13 +101,35 @@ public abstract class Method implements com.rabbitmq.client.Method {
     }
 
     public Frame toFrame(int channelNumber) throws IOException {
-        Frame frame = new Frame(AMQP.FRAME_METHOD, channelNumber);
-        DataOutputStream bodyOut = frame.getOutputStream();
-        bodyOut.writeShort(protocolClassId());
-        bodyOut.writeShort(protocolMethodId());
-        MethodArgumentWriter argWriter = new MethodArgumentWriter(new ValueWriter(bodyOut));
+        return toFrame(channelNumber, null);
+    }
+
+    /**
+     * Private API - encodes this method, recording it in the given
+     * metrics unless they are null
+     */
+    public Frame toFrame(int channelNumber, MethodMetrics metrics) throws IOException {
+        ValueSizer sizer = new ValueSizer();
+        Frame frame = new Frame(AMQP.FRAME_METHOD, channelNumber, 4 + encodedSize(sizer));
+        writePayloadTo(frame.getOutputStream(), sizer, metrics);
+        return frame;
+    }
+
+    /**
+     * Private API - writes the payload of a frame carrying this
+     * method, recording it in the given metrics unless they are null
+     */
+    public void writePayloadTo(DataOutputStream out, MethodMetrics metrics) throws IOException {
+        writePayloadTo(out, null, metrics);
+    }
+
+    private void writePayloadTo(DataOutputStream out, ValueSizer sizer, MethodMetrics metrics)
+        throws IOException
+    {
+        out.writeShort(protocolClassId());
+        out.writeShort(protocolMethodId());
+        MethodArgumentWriter argWriter = new MethodArgumentWriter(new ValueWriter(out, sizer), metrics);
         writeArgumentsTo(argWriter);
         argWriter.flush();
-        return frame;
     }
 }
@@ -65,6 +65,17 @@ public class MethodArgumentReader
         return in.readShortstr();
     }
 
+    /**
+     * Private API - reads a short string argument, sharing the String
+     * with earlier reads of the same value; see {@link ShortstrInternCache}.
+     */
+    public final String readInternedShortstr()
+        throws IOException
+    {
+        clearBits();
+        return in.readInternedShortstr();
+    }
+
     /** Public API - reads a long string argument. */
     public final LongString readLongstr()
         throws IOException
@@ -119,6 +130,17 @@ public class MethodArgumentReader
         return in.readTable();
     }
 
+    /**
+     * Private API - reads a table argument as an {@link ImmutableTable},
+     * which generated method constructors keep without copying.
+     */
+    public final ImmutableTable readImmutableTable()
+        throws IOException
+    {
+        clearBits();
+        return in.readImmutableTable();
+    }
+
     /** Public API - reads an octet argument. */
     public final int readOctet()
         throws IOException
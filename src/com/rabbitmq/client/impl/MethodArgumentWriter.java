@@ -37,13 +37,27 @@ public class MethodArgumentWriter
     private byte bitAccumulator;
     /** The current position within the group of bits */
     private int bitMask;
+    /** Counters to record the methods written in, or null */
+    private final MethodMetrics metrics;
+    /** The size of the output when the current method was started */
+    private int methodStart;
 
     /**
      * Constructs a MethodArgumentWriter targetting the given DataOutputStream.
      */
     public MethodArgumentWriter(ValueWriter out)
+    {
+        this(out, null);
+    }
+
+    /**
+     * Constructs a MethodArgumentWriter that records the methods it
+     * writes in the given metrics, unless that is null.
+     */
+    public MethodArgumentWriter(ValueWriter out, MethodMetrics metrics)
     {
         this.out = out;
+        this.metrics = metrics;
         resetBitAccumulator();
     }
 
@@ -67,6 +81,32 @@ public class MethodArgumentWriter
         }
     }
 
+    /**
+     * Private API - called by generated code before writing a
+     * method's arguments.
+     * @return the value to pass to {@link #endMethod}
+     */
+    public final long startMethod()
+    {
+        if (metrics == null) return MethodMetrics.NOT_SAMPLED;
+        methodStart = out.size();
+        return metrics.startTiming();
+    }
+
+    /**
+     * Private API - called by generated code after writing a method's
+     * arguments, to record the method in this writer's metrics.
+     */
+    public final void endMethod(int ordinal, long started)
+        throws IOException
+    {
+        if (metrics != null) {
+            bitflush();
+            // the class and method ids precede the arguments
+            metrics.methodSent(ordinal, 4 + out.size() - methodStart, started);
+        }
+    }
+
     /** Public API - encodes a short string argument. */
     public final void writeShortstr(String str)
         throws IOException
@@ -131,6 +171,18 @@ public class MethodArgumentWriter
         needBitFlush = true;
     }
 
+    /**
+     * Public API - encodes a group of up to eight consecutive
+     * boolean/bit arguments, already packed into an octet with the
+     * first argument in the least significant bit.
+     */
+    public final void writeBits(int packedBits)
+        throws IOException
+    {
+        bitflush();
+        out.writeOctet(packedBits);
+    }
+
     /** Public API - encodes a table argument. */
     public final void writeTable(Map<String, Object> table)
         throws IOException
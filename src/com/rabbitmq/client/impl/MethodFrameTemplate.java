@@ -0,0 +1,132 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.impl;
+
+import java.io.ByteArrayOutputStream;
+import java.io.DataOutputStream;
+import java.io.IOException;
+import java.util.Arrays;
+
+import com.rabbitmq.client.AMQP;
+
+/**
+ * A complete method frame, encoded once, into which the fixed-width
+ * arguments that vary between uses are patched in place. Subclasses
+ * are generated in AMQImpl for the methods codegen.py lists.
+ * <p/>
+ * Argument positions are given as offsets back from the end of the
+ * arguments, which are fixed even when the template's bound arguments
+ * are of variable length.
+ * <p/><b>Concurrency</b><br/>
+ * Every use of a template rewrites the same frame, so a template must
+ * not be used by more than one thread at a time, and the frame it
+ * hands out must be written before the template is used again.
+ * Channels use their templates while holding their channel mutex.
+ */
+public abstract class MethodFrameTemplate {
+    /** The octets of frame type, channel number and payload size */
+    private static final int FRAME_HEADER_SIZE = 7;
+
+    /** The whole encoded frame, from frame type to frame-end octet */
+    private final byte[] wire;
+
+    /** The index of the frame-end octet in {@link #wire} */
+    private final int argumentsEnd;
+
+    private final Frame frame;
+
+    /** The ordinal of the method the template encodes */
+    private final int methodOrdinal;
+
+    /**
+     * Encodes the template from a method with the template's bound
+     * arguments, and placeholders for the others.
+     */
+    protected MethodFrameTemplate(int channelNumber, Method prototype) throws IOException {
+        int payloadSize = 4 + prototype.encodedSize();
+        ByteArrayOutputStream buffer = new ByteArrayOutputStream(FRAME_HEADER_SIZE + payloadSize + 1);
+        prototype.toFrame(channelNumber).writeTo(new DataOutputStream(buffer));
+        this.wire = buffer.toByteArray();
+        this.argumentsEnd = wire.length - 1;
+        this.frame = new EncodedFrame(channelNumber);
+        this.methodOrdinal = prototype.protocolMethodOrdinal();
+    }
+
+    protected final void putOctet(int offsetFromEnd, int value) {
+        wire[argumentsEnd - offsetFromEnd] = (byte) value;
+    }
+
+    protected final void putShort(int offsetFromEnd, int value) {
+        int pos = argumentsEnd - offsetFromEnd;
+        wire[pos]     = (byte) (value >>> 8);
+        wire[pos + 1] = (byte) value;
+    }
+
+    protected final void putLong(int offsetFromEnd, int value) {
+        int pos = argumentsEnd - offsetFromEnd;
+        wire[pos]     = (byte) (value >>> 24);
+        wire[pos + 1] = (byte) (value >>> 16);
+        wire[pos + 2] = (byte) (value >>> 8);
+        wire[pos + 3] = (byte) value;
+    }
+
+    protected final void putLonglong(int offsetFromEnd, long value) {
+        putLong(offsetFromEnd, (int) (value >>> 32));
+        putLong(offsetFromEnd - 4, (int) value);
+    }
+
+    /** The frame as patched by the latest use of this template */
+    protected final Frame frame() {
+        return frame;
+    }
+
+    /**
+     * Private API - patches the varying arguments of the given method,
+     * whose bound arguments must be those of this template, into the
+     * frame.
+     */
+    public abstract Frame toFrame(Method m);
+
+    /**
+     * Private API - records the sending of the frame in the given
+     * metrics. Patching a template involves no encoding, so the
+     * frame is counted but not timed.
+     */
+    public final void recordSent(MethodMetrics metrics) {
+        metrics.methodSent(methodOrdinal, argumentsEnd - FRAME_HEADER_SIZE, MethodMetrics.NOT_SAMPLED);
+    }
+
+    /** A frame written straight from the template's encoding */
+    private final class EncodedFrame extends Frame {
+        EncodedFrame(int channelNumber) {
+            super(AMQP.FRAME_METHOD, channelNumber, (byte[]) null);
+        }
+
+        @Override public void writeTo(DataOutputStream os) throws IOException {
+            os.write(wire);
+        }
+
+        @Override public byte[] getPayload() {
+            return Arrays.copyOfRange(wire, FRAME_HEADER_SIZE, argumentsEnd);
+        }
+
+        @Override public String toString() {
+            return "Frame(type=" + type + ", channel=" + channel + ", " +
+                (argumentsEnd - FRAME_HEADER_SIZE) + " bytes of template)";
+        }
+    }
+}
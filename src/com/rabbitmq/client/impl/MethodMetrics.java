@@ -0,0 +1,149 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.impl;
+
+import java.util.LinkedHashMap;
+import java.util.Map;
+import java.util.concurrent.atomic.AtomicLongArray;
+
+import com.rabbitmq.client.MethodStatistics;
+
+/**
+ * Per-connection counters of the method and content header frames
+ * sent and received, recorded by hooks in the generated encoders and
+ * decoders. Counters are indexed by method ordinal (see
+ * {@link AMQImpl#methodOrdinal(int, int)}) and content class ordinal,
+ * and are updated without locking.
+ * <p/>
+ * Only one in every <code>sampleInterval</code> frames is timed, so
+ * that reading the clock does not dominate the cost of small frames.
+ * Which frames are timed is decided by a counter that threads update
+ * without synchronisation; lost updates only change which frame is
+ * sampled next.
+ */
+public final class MethodMetrics {
+    /** How often frames are timed unless told otherwise */
+    public static final int DEFAULT_SAMPLE_INTERVAL = 64;
+
+    /** Returned by {@link #startTiming} for frames that are not timed */
+    public static final long NOT_SAMPLED = 0L;
+
+    // offsets of each counter within an entry of the counter arrays
+    private static final int FRAMES = 0;
+    private static final int BYTES = 1;
+    private static final int SAMPLES = 2;
+    private static final int NANOS = 3;
+    private static final int STRIDE = 4;
+
+    private final AtomicLongArray methodsReceived = new AtomicLongArray(AMQImpl.METHOD_COUNT * STRIDE);
+    private final AtomicLongArray methodsSent = new AtomicLongArray(AMQImpl.METHOD_COUNT * STRIDE);
+    private final AtomicLongArray headersReceived = new AtomicLongArray(AMQImpl.CONTENT_CLASS_COUNT * STRIDE);
+    private final AtomicLongArray headersSent = new AtomicLongArray(AMQImpl.CONTENT_CLASS_COUNT * STRIDE);
+
+    private final int sampleMask;
+    private int ticks;
+
+    public MethodMetrics() {
+        this(DEFAULT_SAMPLE_INTERVAL);
+    }
+
+    /**
+     * @param sampleInterval time one in this many frames; a power of two
+     */
+    public MethodMetrics(int sampleInterval) {
+        if (sampleInterval <= 0 || (sampleInterval & (sampleInterval - 1)) != 0) {
+            throw new IllegalArgumentException("sample interval must be a power of two: " + sampleInterval);
+        }
+        this.sampleMask = sampleInterval - 1;
+    }
+
+    /**
+     * Private API - called by generated code before encoding or
+     * decoding a frame.
+     * @return the time to pass to the matching record method, or
+     * {@link #NOT_SAMPLED} if this frame is not timed
+     */
+    public long startTiming() {
+        if ((++ticks & sampleMask) != 0) return NOT_SAMPLED;
+        long now = System.nanoTime();
+        return now == NOT_SAMPLED ? 1 : now;
+    }
+
+    private static void record(AtomicLongArray counters, int index, int bytes, long started) {
+        if (index < 0) return;
+        int base = index * STRIDE;
+        counters.incrementAndGet(base + FRAMES);
+        counters.addAndGet(base + BYTES, bytes);
+        if (started != NOT_SAMPLED) {
+            counters.addAndGet(base + NANOS, System.nanoTime() - started);
+            counters.incrementAndGet(base + SAMPLES);
+        }
+    }
+
+    /** Private API - records a method frame received */
+    public void methodReceived(int ordinal, int payloadSize, long started) {
+        record(methodsReceived, ordinal, payloadSize, started);
+    }
+
+    /** Private API - records a method frame sent */
+    public void methodSent(int ordinal, int payloadSize, long started) {
+        record(methodsSent, ordinal, payloadSize, started);
+    }
+
+    /** Private API - records a content header frame received */
+    public void contentHeaderReceived(int classId, int payloadSize, long started) {
+        record(headersReceived, AMQImpl.contentClassOrdinal(classId), payloadSize, started);
+    }
+
+    /** Private API - records a content header frame sent */
+    public void contentHeaderSent(int classId, int payloadSize, long started) {
+        record(headersSent, AMQImpl.contentClassOrdinal(classId), payloadSize, started);
+    }
+
+    private static void collect(Map<String, MethodStatistics.Counters> acc, String name,
+                                AtomicLongArray counters, int index) {
+        int base = index * STRIDE;
+        long frames = counters.get(base + FRAMES);
+        if (frames == 0) return;
+        acc.put(name, new MethodStatistics.Counters(frames,
+                                                    counters.get(base + BYTES),
+                                                    counters.get(base + SAMPLES),
+                                                    counters.get(base + NANOS)));
+    }
+
+    private static Map<String, MethodStatistics.Counters> collect(AtomicLongArray methods,
+                                                                  AtomicLongArray headers) {
+        Map<String, MethodStatistics.Counters> acc = new LinkedHashMap<String, MethodStatistics.Counters>();
+        for (int i = 0; i < AMQImpl.METHOD_COUNT; i++) {
+            collect(acc, AMQImpl.methodName(i), methods, i);
+        }
+        for (int i = 0; i < AMQImpl.CONTENT_CLASS_COUNT; i++) {
+            collect(acc, AMQImpl.contentClassName(i) + ".properties", headers, i);
+        }
+        return acc;
+    }
+
+    /**
+     * Public API - a snapshot of the counters. Counters are read one
+     * at a time while frames continue to be recorded, so the snapshot
+     * may be slightly inconsistent.
+     */
+    public MethodStatistics snapshot() {
+        return new MethodStatistics(collect(methodsReceived, headersReceived),
+                                    collect(methodsSent, headersSent));
+    }
+}
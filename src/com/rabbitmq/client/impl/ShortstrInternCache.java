@@ -0,0 +1,130 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.impl;
+
+import java.io.IOException;
+import java.nio.ByteBuffer;
+
+/**
+ * Bounded cache of decoded short strings, keyed by their UTF-8 bytes.
+ * Generated decoders read short string arguments that take few
+ * distinct values, such as consumer tags, exchanges and routing keys,
+ * through this cache: a hit returns the String already decoded from
+ * the same bytes, without decoding or allocating.
+ * <p/>
+ * The cache is direct-mapped: each encoding hashes to one slot, and a
+ * miss replaces whatever the slot held. Its size therefore stays
+ * fixed however many distinct strings pass through it; a field with
+ * too many values for the cache merely misses. Entries are immutable
+ * and slots are replaced whole, so the cache may be used from any
+ * number of threads without locking.
+ */
+public final class ShortstrInternCache
+{
+    /** The cache used by generated code */
+    public static final ShortstrInternCache SHARED = new ShortstrInternCache(1024);
+
+    private static final class Entry
+    {
+        final int hash;
+        final byte[] bytes;
+        final String value;
+
+        Entry(int hash, byte[] bytes, String value)
+        {
+            this.hash = hash;
+            this.bytes = bytes;
+            this.value = value;
+        }
+    }
+
+    private final Entry[] slots;
+    private final int mask;
+
+    /** Creates a cache of the given number of slots, a power of two. */
+    public ShortstrInternCache(int size)
+    {
+        if (size <= 0 || (size & (size - 1)) != 0) {
+            throw new IllegalArgumentException("cache size must be a power of two: " + size);
+        }
+        this.slots = new Entry[size];
+        this.mask = size - 1;
+    }
+
+    private static int spread(int h)
+    {
+        return h ^ (h >>> 16);
+    }
+
+    /** Public API - the string encoded in bytes[offset, offset+length). */
+    public String intern(byte[] bytes, int offset, int length)
+        throws IOException
+    {
+        int h = 0;
+        for (int i = offset; i < offset + length; i++) {
+            h = 31 * h + bytes[i];
+        }
+        h = spread(h);
+        int slot = h & mask;
+        Entry entry = slots[slot];
+        if (entry != null && entry.hash == h && entry.bytes.length == length) {
+            byte[] key = entry.bytes;
+            int i = 0;
+            while (i < length && key[i] == bytes[offset + i]) i++;
+            if (i == length) return entry.value;
+        }
+        byte[] key = new byte[length];
+        System.arraycopy(bytes, offset, key, 0, length);
+        String value = new String(key, "utf-8");
+        slots[slot] = new Entry(h, key, value);
+        return value;
+    }
+
+    /**
+     * Public API - the string encoded in length bytes of the buffer
+     * from the given absolute offset.
+     */
+    public String intern(ByteBuffer in, int offset, int length)
+        throws IOException
+    {
+        if (offset + length > in.limit())
+            throw new IndexOutOfBoundsException();
+        if (in.hasArray()) {
+            return intern(in.array(), in.arrayOffset() + offset, length);
+        }
+        int h = 0;
+        for (int i = offset; i < offset + length; i++) {
+            h = 31 * h + in.get(i);
+        }
+        h = spread(h);
+        int slot = h & mask;
+        Entry entry = slots[slot];
+        if (entry != null && entry.hash == h && entry.bytes.length == length) {
+            byte[] key = entry.bytes;
+            int i = 0;
+            while (i < length && key[i] == in.get(offset + i)) i++;
+            if (i == length) return entry.value;
+        }
+        byte[] key = new byte[length];
+        for (int i = 0; i < length; i++) {
+            key[i] = in.get(offset + i);
+        }
+        String value = new String(key, "utf-8");
+        slots[slot] = new Entry(h, key, value);
+        return value;
+    }
+}
@@ -51,6 +51,9 @@ public class ValueReader
     /** The stream we are reading from. */
     private final DataInputStream in;
 
+    /** Holds the encoding of an interned short string while it is looked up. */
+    private byte[] shortstrBuffer;
+
     /**
      * Construct a MethodArgumentReader streaming over the given DataInputStream.
      */
@@ -77,6 +80,22 @@ public class ValueReader
         return readShortstr(this.in);
     }
 
+    /**
+     * Package API - reads a short string through
+     * {@link ShortstrInternCache#SHARED}, which returns the same
+     * String for the same encoding without decoding it again.
+     */
+    final String readInternedShortstr()
+        throws IOException
+    {
+        int length = in.readUnsignedByte();
+        if (shortstrBuffer == null) {
+            shortstrBuffer = new byte[255];
+        }
+        in.readFully(shortstrBuffer, 0, length);
+        return ShortstrInternCache.SHARED.intern(shortstrBuffer, 0, length);
+    }
+
     /** Convenience method - reads a 32-bit-length-prefix
      * byte vector from a DataInputStream.
      */
@@ -136,25 +155,35 @@ public class ValueReader
      * Reads a table argument from a given stream. Also
      * called by {@link ContentHeaderPropertyReader}.
      */
-    private static Map<String, Object> readTable(DataInputStream in)
+    private static Map<String, Object> readTable(DataInputStream in, boolean immutable)
         throws IOException
     {
         long tableLength = unsignedExtend(in.readInt());
-        if (tableLength == 0) return Collections.emptyMap();
-        
-        Map<String, Object> table = new HashMap<String, Object>();
+        if (tableLength == 0) {
+            return immutable ? ImmutableTable.EMPTY : Collections.<String, Object>emptyMap();
+        }
+
         DataInputStream tableIn = new DataInputStream
             (new TruncatedInputStream(in, tableLength));
+        if (immutable) {
+            ImmutableTable.Builder table = new ImmutableTable.Builder();
+            while(tableIn.available() > 0) {
+                String name = readShortstr(tableIn);
+                table.put(name, readFieldValue(tableIn, true));
+            }
+            return table.build();
+        }
+        Map<String, Object> table = new HashMap<String, Object>();
         while(tableIn.available() > 0) {
             String name = readShortstr(tableIn);
-            Object value = readFieldValue(tableIn);
+            Object value = readFieldValue(tableIn, false);
             if(!table.containsKey(name))
                 table.put(name, value);
         }
         return table;
     }
 
-    private static Object readFieldValue(DataInputStream in)
+    private static Object readFieldValue(DataInputStream in, boolean immutable)
         throws IOException {
         Object value = null;
         switch(in.readUnsignedByte()) {
@@ -174,10 +203,10 @@ public class ValueReader
               value = readTimestamp(in);
               break;
           case 'F':
-              value = readTable(in);
+              value = readTable(in, immutable);
               break;
           case 'A':
-              value = readArray(in);
+              value = readArray(in, immutable);
               break;
           case 'b':
               value = in.readByte();
@@ -211,7 +240,7 @@ public class ValueReader
     }
 
     /** Read a field-array */
-    private static List<Object> readArray(DataInputStream in)
+    private static List<Object> readArray(DataInputStream in, boolean immutable)
         throws IOException
     {
         long length = unsignedExtend(in.readInt());
@@ -219,7 +248,7 @@ public class ValueReader
             (new TruncatedInputStream(in, length));
         List<Object> array = new ArrayList<Object>();
         while(arrayIn.available() > 0) {
-            Object value = readFieldValue(arrayIn);
+            Object value = readFieldValue(arrayIn, immutable);
             array.add(value);
         }
         return array;
@@ -229,7 +258,17 @@ public class ValueReader
     public final Map<String, Object> readTable()
         throws IOException
     {
-        return readTable(this.in);
+        return readTable(this.in, false);
+    }
+
+    /**
+     * Package API - reads a table, and any tables nested in it, as
+     * {@link ImmutableTable}s. Used by the generated decoders.
+     */
+    final ImmutableTable readImmutableTable()
+        throws IOException
+    {
+        return (ImmutableTable) readTable(this.in, true);
     }
 
     /** Public API - reads an octet. */
@@ -254,4 +293,11 @@ public class ValueReader
         return readTimestamp(this.in);
     }
 
+    /** Public API - reads a timestamp, in milliseconds since the epoch. */
+    public final long readTimestampMillis()
+        throws IOException
+    {
+        return this.in.readLong()*1000;
+    }
+
 }
@@ -0,0 +1,221 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.impl;
+
+import java.io.IOException;
+import java.math.BigDecimal;
+import java.sql.Timestamp;
+import java.util.ArrayList;
+import java.util.Date;
+import java.util.List;
+import java.util.Map;
+
+import com.rabbitmq.client.LongString;
+
+/**
+ * Computes the AMQP wire-protocol encoded size of values. Every
+ * string measured is UTF-8 encoded once and remembered, together
+ * with the size of every table and array measured, so that a
+ * {@link ValueWriter} constructed with this sizer can write the
+ * same values without encoding or measuring them again. Methods on
+ * this object are usually called from generated code.
+ * <p/>
+ * Values must be written in the order in which they were measured;
+ * a writer that finds a different value from the one it expects
+ * falls back to encoding it afresh.
+ */
+public class ValueSizer
+{
+    /** The measured strings, in measurement order */
+    private final List<String> strings = new ArrayList<String>();
+    /** The UTF-8 encodings of {@link #strings} */
+    private final List<byte[]> encodings = new ArrayList<byte[]>();
+    /** Index of the next encoding to hand to a writer */
+    private int nextEncoding = 0;
+
+    /** The measured tables and arrays, in the order a writer will need them */
+    private final List<Object> containers = new ArrayList<Object>();
+    /** The encoded content sizes of {@link #containers}, excluding length prefixes */
+    private final List<Long> containerSizes = new ArrayList<Long>();
+    /** Index of the next container size to hand to a writer */
+    private int nextContainer = 0;
+
+    private byte[] encode(String str)
+        throws IOException
+    {
+        byte [] bytes = str.getBytes("utf-8");
+        strings.add(str);
+        encodings.add(bytes);
+        return bytes;
+    }
+
+    /** Public API - the encoded size of a short string. */
+    public final int shortstrSize(String str)
+        throws IOException
+    {
+        int length = encode(str).length;
+        if (length > 255) {
+            throw new IllegalArgumentException(
+                    "Short string too long; utf-8 encoded length = " + length +
+                    ", max = 255.");
+        }
+        return 1 + length;
+    }
+
+    /** Public API - the encoded size of a long string from a String. */
+    public final int longstrSize(String str)
+        throws IOException
+    {
+        return 4 + encode(str).length;
+    }
+
+    /** Public API - the encoded size of a long string from a LongString. */
+    public final int longstrSize(LongString str)
+    {
+        return 4 + (int)str.length();
+    }
+
+    /** Public API - the encoded size of a table, including its length prefix. */
+    public final int tableSize(Map<String, Object> table)
+        throws IOException
+    {
+        if (table == null) return 4;
+        return 4 + (int)tableContentSize(table);
+    }
+
+    private long tableContentSize(Map<String, Object> table)
+        throws IOException
+    {
+        int slot = reserve(table);
+        long acc = 0;
+        for(Map.Entry<String, Object> entry: table.entrySet()) {
+            acc += 1 + encode(entry.getKey()).length;
+            acc += fieldValueSize(entry.getValue());
+        }
+        containerSizes.set(slot, acc);
+        return acc;
+    }
+
+    private long arrayContentSize(Object array, Iterable<?> values)
+        throws IOException
+    {
+        int slot = reserve(array);
+        long acc = 0;
+        for (Object value : values) {
+            acc += fieldValueSize(value);
+        }
+        containerSizes.set(slot, acc);
+        return acc;
+    }
+
+    /**
+     * Containers are written before their contents but measured
+     * after them, so claim the container's slot up front.
+     */
+    private int reserve(Object container) {
+        containers.add(container);
+        containerSizes.add(0L);
+        return containers.size() - 1;
+    }
+
+    /** Mirrors the encoding choices of {@link ValueWriter#writeFieldValue}. */
+    private long fieldValueSize(Object value)
+        throws IOException
+    {
+        long acc = 1; // for the type tag
+        if(value instanceof String) {
+            acc += longstrSize((String)value);
+        }
+        else if(value instanceof LongString) {
+            acc += longstrSize((LongString)value);
+        }
+        else if(value instanceof Integer) {
+            acc += 4;
+        }
+        else if(value instanceof BigDecimal) {
+            acc += 5;
+        }
+        else if(value instanceof Date || value instanceof Timestamp) {
+            acc += 8;
+        }
+        else if(value instanceof Map) {
+            @SuppressWarnings("unchecked")
+            Map<String,Object> map = (Map<String,Object>) value;
+            acc += 4 + tableContentSize(map);
+        }
+        else if (value instanceof Byte) {
+            acc += 1;
+        }
+        else if(value instanceof Double) {
+            acc += 8;
+        }
+        else if(value instanceof Float) {
+            acc += 4;
+        }
+        else if(value instanceof Long) {
+            acc += 8;
+        }
+        else if(value instanceof Short) {
+            acc += 2;
+        }
+        else if(value instanceof Boolean) {
+            acc += 1;
+        }
+        else if(value instanceof byte[]) {
+            acc += 4 + ((byte[])value).length;
+        }
+        else if(value instanceof List) {
+            acc += 4 + arrayContentSize(value, (List<?>)value);
+        }
+        else if(value instanceof Object[]) {
+            Object[] array = (Object[])value;
+            List<Object> values = new ArrayList<Object>(array.length);
+            for (Object item : array) values.add(item);
+            acc += 4 + arrayContentSize(value, values);
+        }
+        else if(value == null) {
+        }
+        else {
+            throw new IllegalArgumentException("invalid value in table");
+        }
+        return acc;
+    }
+
+    /**
+     * Package API - the remembered UTF-8 encoding of the given string
+     * if it is the next one measured, or null if it is not.
+     */
+    byte[] encodingOf(String str)
+    {
+        if (nextEncoding < strings.size() && strings.get(nextEncoding) == str) {
+            return encodings.get(nextEncoding++);
+        }
+        return null;
+    }
+
+    /**
+     * Package API - the remembered content size of the given table or
+     * array if it is the next one measured, or -1 if it is not.
+     */
+    long contentSizeOf(Object container)
+    {
+        if (nextContainer < containers.size() && containers.get(nextContainer) == container) {
+            return containerSizes.get(nextContainer++);
+        }
+        return -1;
+    }
+}
@@ -23,6 +23,7 @@ import java.io.InputStream;
 import java.io.OutputStream;
 import java.math.BigDecimal;
 import java.math.BigInteger;
+import java.nio.ByteBuffer;
 import java.util.Date;
 import java.util.Map;
 import java.util.List;
@@ -36,16 +37,45 @@ public class ValueWriter
 {
     private final DataOutputStream out;
 
+    /** Encodings and sizes computed ahead of writing, or null */
+    private final ValueSizer sizes;
+
     public ValueWriter(DataOutputStream out)
+    {
+        this(out, null);
+    }
+
+    /**
+     * Constructs a ValueWriter that reuses the string encodings and
+     * table sizes remembered by the given {@link ValueSizer}.
+     */
+    public ValueWriter(DataOutputStream out, ValueSizer sizes)
     {
         this.out = out;
+        this.sizes = sizes;
+    }
+
+    /** Private API - the number of bytes written to the underlying stream */
+    public final int size()
+    {
+        return out.size();
+    }
+
+    private byte[] utf8(String str)
+        throws IOException
+    {
+        if (sizes != null) {
+            byte [] bytes = sizes.encodingOf(str);
+            if (bytes != null) return bytes;
+        }
+        return str.getBytes("utf-8");
     }
 
     /** Public API - encodes a short string. */
     public final void writeShortstr(String str)
         throws IOException
     {
-        byte [] bytes = str.getBytes("utf-8");
+        byte [] bytes = utf8(str);
         int length = bytes.length;
         if (length > 255) {
             throw new IllegalArgumentException(
@@ -79,11 +109,39 @@ public class ValueWriter
     public final void writeLongstr(String str)
         throws IOException
     {
-        byte [] bytes = str.getBytes("utf-8");
+        byte [] bytes = utf8(str);
         writeLong(bytes.length);
         out.write(bytes);
     }
 
+    /**
+     * Public API - copies length bytes of already-encoded values,
+     * starting at the given offset of the buffer.
+     */
+    public final void writeEncoded(ByteBuffer encoded, int offset, int length)
+        throws IOException
+    {
+        if (encoded.hasArray()) {
+            writeEncoded(encoded.array(), encoded.arrayOffset() + offset, length);
+        } else {
+            byte [] bytes = new byte[length];
+            ByteBuffer src = encoded.duplicate();
+            src.position(offset);
+            src.get(bytes);
+            out.write(bytes);
+        }
+    }
+
+    /**
+     * Public API - copies length bytes of already-encoded values,
+     * starting at the given offset of the array.
+     */
+    public final void writeEncoded(byte[] encoded, int offset, int length)
+        throws IOException
+    {
+        out.write(encoded, offset, length);
+    }
+
     /** Public API - encodes a short integer. */
     public final void writeShort(int s)
         throws IOException
@@ -117,7 +175,8 @@ public class ValueWriter
             // Convenience.
             out.writeInt(0);
         } else {
-            out.writeInt((int)Frame.tableSize(table));
+            long size = (sizes == null) ? -1 : sizes.contentSizeOf(table);
+            out.writeInt((int)(size < 0 ? Frame.tableSize(table) : size));
             for(Map.Entry<String,Object> entry: table.entrySet()) {
                 writeShortstr(entry.getKey());
                 Object value = entry.getValue();
@@ -217,7 +276,8 @@ public class ValueWriter
             out.write(0);
         }
         else {
-            out.writeInt((int)Frame.arraySize(value));
+            long size = (sizes == null) ? -1 : sizes.contentSizeOf(value);
+            out.writeInt((int)(size < 0 ? Frame.arraySize(value) : size));
             for (Object item : value) {
                 writeFieldValue(item);
             }
@@ -231,7 +291,8 @@ public class ValueWriter
             out.write(0);
         }
         else {
-            out.writeInt((int)Frame.arraySize(value));
+            long size = (sizes == null) ? -1 : sizes.contentSizeOf(value);
+            out.writeInt((int)(size < 0 ? Frame.arraySize(value) : size));
             for (Object item : value) {
                 writeFieldValue(item);
             }
@@ -255,9 +316,16 @@ public class ValueWriter
     /** Public API - encodes a timestamp. */
     public final void writeTimestamp(Date timestamp)
         throws IOException
+    {
+        writeTimestampMillis(timestamp.getTime());
+    }
+
+    /** Public API - encodes a timestamp given in milliseconds since the epoch. */
+    public final void writeTimestampMillis(long millis)
+        throws IOException
     {
         // AMQP uses POSIX time_t which is in seconds since the epoch began
-        writeLonglong(timestamp.getTime()/1000);
+        writeLonglong(millis/1000);
     }
 
     /**
@@ -1,6 +1,7 @@
 package com.rabbitmq.client.impl.recovery;
 
 import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.BatchingChannel;
 import com.rabbitmq.client.Channel;
 import com.rabbitmq.client.Command;
 import com.rabbitmq.client.ConfirmListener;
@@ -9,16 +10,19 @@ import com.rabbitmq.client.Consumer;
 import com.rabbitmq.client.FlowListener;
 import com.rabbitmq.client.GetResponse;
 import com.rabbitmq.client.Method;
+import com.rabbitmq.client.PipelinedChannel;
 import com.rabbitmq.client.Recoverable;
 import com.rabbitmq.client.RecoveryListener;
 import com.rabbitmq.client.ReturnListener;
 import com.rabbitmq.client.ShutdownListener;
 import com.rabbitmq.client.ShutdownSignalException;
+import com.rabbitmq.client.impl.AMQChannel;
 
 import java.io.IOException;
 import java.util.ArrayList;
 import java.util.List;
 import java.util.Map;
+import java.util.concurrent.Future;
 import java.util.concurrent.TimeoutException;
 
 /**
@@ -27,7 +31,7 @@ import java.util.concurrent.TimeoutException;
  *
  * @since 3.3.0
  */
-public class AutorecoveringChannel implements Channel, Recoverable {
+public class AutorecoveringChannel implements BatchingChannel, PipelinedChannel, Recoverable {
     private RecoveryAwareChannelN delegate;
     private AutorecoveringConnection connection;
     private final List<ShutdownListener> shutdownHooks  = new ArrayList<ShutdownListener>();
@@ -176,6 +180,14 @@ public class AutorecoveringChannel implements Channel, Recoverable {
         delegate.basicPublish(exchange, routingKey, mandatory, immediate, props, body);
     }
 
+    public void startBatch() {
+        delegate.startBatch();
+    }
+
+    public void endBatch() throws IOException {
+        delegate.endBatch();
+    }
+
     public AMQP.Exchange.DeclareOk exchangeDeclare(String exchange, String type) throws IOException {
         return exchangeDeclare(exchange, type, false, false, null);
     }
@@ -446,6 +458,65 @@ public class AutorecoveringChannel implements Channel, Recoverable {
         return delegate.rpc(method);
     }
 
+    /**
+     * Queues, exchanges and bindings declared with a pipelined method
+     * are recorded for topology recovery once the server has replied,
+     * and deleted ones are forgotten, as with the blocking methods.
+     * @see com.rabbitmq.client.PipelinedChannel#pipelinedRpc(Method, Class)
+     */
+    public <T extends Method> Future<T> pipelinedRpc(final Method method, Class<T> replyType) throws IOException {
+        return delegate.pipelinedRpc(method, new AMQChannel.FutureRpcContinuation<T>(replyType) {
+            @Override protected void handleReply(T reply) {
+                recordPipelinedTopology(method, reply);
+            }
+        });
+    }
+
+    /** Records the topology changed by a pipelined method the server has replied to */
+    private void recordPipelinedTopology(Method method, Method reply) {
+        if (method instanceof AMQP.Queue.Declare) {
+            AMQP.Queue.Declare m = (AMQP.Queue.Declare) method;
+            if (m.getPassive()) return;
+            AMQP.Queue.DeclareOk ok = (AMQP.Queue.DeclareOk) reply;
+            RecordedQueue q = new RecordedQueue(this, ok.getQueue()).
+                durable(m.getDurable()).
+                exclusive(m.getExclusive()).
+                autoDelete(m.getAutoDelete()).
+                arguments(m.getArguments());
+            if (m.getQueue().equals(RecordedQueue.EMPTY_STRING)) {
+                q.serverNamed(true);
+            }
+            recordQueue(ok, q);
+        } else if (method instanceof AMQP.Exchange.Declare) {
+            AMQP.Exchange.Declare m = (AMQP.Exchange.Declare) method;
+            if (m.getPassive()) return;
+            RecordedExchange x = new RecordedExchange(this, m.getExchange()).
+              type(m.getType()).
+              durable(m.getDurable()).
+              autoDelete(m.getAutoDelete()).
+              arguments(m.getArguments());
+            recordExchange(m.getExchange(), x);
+        } else if (method instanceof AMQP.Queue.Bind) {
+            AMQP.Queue.Bind m = (AMQP.Queue.Bind) method;
+            recordQueueBinding(m.getQueue(), m.getExchange(), m.getRoutingKey(), m.getArguments());
+        } else if (method instanceof AMQP.Exchange.Bind) {
+            AMQP.Exchange.Bind m = (AMQP.Exchange.Bind) method;
+            recordExchangeBinding(m.getDestination(), m.getSource(), m.getRoutingKey(), m.getArguments());
+        } else if (method instanceof AMQP.Queue.Delete) {
+            deleteRecordedQueue(((AMQP.Queue.Delete) method).getQueue());
+        } else if (method instanceof AMQP.Exchange.Delete) {
+            deleteRecordedExchange(((AMQP.Exchange.Delete) method).getExchange());
+        } else if (method instanceof AMQP.Queue.Unbind) {
+            AMQP.Queue.Unbind m = (AMQP.Queue.Unbind) method;
+            deleteRecordedQueueBinding(m.getQueue(), m.getExchange(), m.getRoutingKey(), m.getArguments());
+            this.maybeDeleteRecordedAutoDeleteExchange(m.getExchange());
+        } else if (method instanceof AMQP.Exchange.Unbind) {
+            AMQP.Exchange.Unbind m = (AMQP.Exchange.Unbind) method;
+            deleteRecordedExchangeBinding(m.getDestination(), m.getSource(), m.getRoutingKey(), m.getArguments());
+            this.maybeDeleteRecordedAutoDeleteExchange(m.getSource());
+        }
+    }
+
     /**
      * @see Connection#addShutdownListener(com.rabbitmq.client.ShutdownListener)
      */
@@ -5,6 +5,8 @@ import com.rabbitmq.client.Address;
 import com.rabbitmq.client.BlockedListener;
 import com.rabbitmq.client.Channel;
 import com.rabbitmq.client.Connection;
+import com.rabbitmq.client.MethodStatistics;
+import com.rabbitmq.client.MethodStatisticsProvider;
 import com.rabbitmq.client.MissedHeartbeatException;
 import com.rabbitmq.client.Recoverable;
 import com.rabbitmq.client.RecoveryListener;
@@ -50,7 +52,8 @@ import java.util.concurrent.TimeoutException;
  * @see com.rabbitmq.client.ConnectionFactory#setTopologyRecoveryEnabled(boolean)
  * @since 3.3.0
  */
-public class AutorecoveringConnection implements Connection, Recoverable, NetworkConnection {
+public class AutorecoveringConnection
+    implements Connection, Recoverable, NetworkConnection, MethodStatisticsProvider {
     private final RecoveryAwareAMQConnectionFactory cf;
     private final Map<Integer, AutorecoveringChannel> channels;
     private final ConnectionParams params;
@@ -342,6 +345,15 @@ public class AutorecoveringConnection implements Connection, Recoverable, Networ
         return this.delegate.getExceptionHandler();
     }
 
+    /**
+     * Returns the statistics of the current underlying connection,
+     * which start again from zero when the connection is recovered.
+     * @see com.rabbitmq.client.MethodStatisticsProvider#getMethodStatistics()
+     */
+    public MethodStatistics getMethodStatistics() {
+        return this.delegate.getMethodStatistics();
+    }
+
     /**
      * @see com.rabbitmq.client.Connection#getPort()
      */
@@ -0,0 +1,101 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.IOException;
+import java.util.Arrays;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.ContentHeaderPropertyWriter;
+import com.rabbitmq.client.impl.Method;
+import com.rabbitmq.client.impl.MethodArgumentWriter;
+import com.rabbitmq.client.impl.ValueWriter;
+
+public class BitPackingTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("bitPacking");
+        suite.addTestSuite(BitPackingTest.class);
+        return suite;
+    }
+
+    private static byte[] arguments(Method m) throws IOException {
+        byte[] payload = m.toFrame(0).getPayload();
+        return Arrays.copyOfRange(payload, 4, payload.length);
+    }
+
+    public void testPackedBitsMatchBitAccumulator() throws IOException {
+        ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+        MethodArgumentWriter writer = new MethodArgumentWriter(new ValueWriter(new DataOutputStream(buffer)));
+        writer.writeShort(0);
+        writer.writeShortstr("q");
+        writer.writeBit(false);
+        writer.writeBit(true);
+        writer.writeBit(false);
+        writer.writeBit(true);
+        writer.writeBit(true);
+        writer.writeTable(null);
+        writer.flush();
+
+        assertTrue(Arrays.equals(buffer.toByteArray(),
+            arguments(new AMQImpl.Queue.Declare(0, "q", false, true, false, true, true, null))));
+    }
+
+    public void testBitsRoundTrip() throws IOException {
+        for (int i = 0; i < 8; i++) {
+            boolean multiple = (i & 1) != 0, requeue = (i & 2) != 0;
+            AMQImpl.Basic.Nack nack = (AMQImpl.Basic.Nack) AMQImpl.readMethodFrom(new DataInputStream(
+                new ByteArrayInputStream(new AMQImpl.Basic.Nack(i, multiple, requeue).toFrame(0).getPayload())));
+            assertEquals(i, nack.getDeliveryTag());
+            assertEquals(multiple, nack.getMultiple());
+            assertEquals(requeue, nack.getRequeue());
+        }
+    }
+
+    public void testPropertyFlagsMatchPresenceBits() throws IOException {
+        AMQP.BasicProperties props = new AMQP.BasicProperties.Builder()
+            .contentType("text/plain")
+            .priority(1)
+            .clusterId("c")
+            .build();
+
+        ByteArrayOutputStream expected = new ByteArrayOutputStream();
+        ContentHeaderPropertyWriter writer = new ContentHeaderPropertyWriter(new DataOutputStream(expected));
+        for (int i = 0; i < 14; i++) {
+            writer.writePresence(i == 0 || i == 4 || i == 13);
+        }
+        writer.finishPresence();
+        writer.writeShortstr("text/plain");
+        writer.writeOctet(1);
+        writer.writeShortstr("c");
+
+        ByteArrayOutputStream actual = new ByteArrayOutputStream();
+        props.writePropertiesTo(new ContentHeaderPropertyWriter(new DataOutputStream(actual)));
+        assertTrue(Arrays.equals(expected.toByteArray(), actual.toByteArray()));
+
+        AMQP.BasicProperties decoded = (AMQP.BasicProperties) AMQImpl.readContentHeaderFrom(
+            new DataInputStream(new ByteArrayInputStream(props.toFrame(0, 0).getPayload())));
+        assertEquals(props.toString(), decoded.toString());
+    }
+}
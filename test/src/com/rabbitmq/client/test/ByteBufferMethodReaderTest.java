@@ -0,0 +1,141 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.ByteArrayInputStream;
+import java.io.DataInputStream;
+import java.io.IOException;
+import java.math.BigDecimal;
+import java.nio.ByteBuffer;
+import java.util.Arrays;
+import java.util.Date;
+import java.util.HashMap;
+import java.util.Map;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.MalformedFrameException;
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.LongStringHelper;
+import com.rabbitmq.client.impl.Method;
+
+public class ByteBufferMethodReaderTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("byteBufferMethodReader");
+        suite.addTestSuite(ByteBufferMethodReaderTest.class);
+        return suite;
+    }
+
+    private static byte[] encode(Method m) throws IOException {
+        return m.toFrame(0).getPayload();
+    }
+
+    private static Method streamDecode(byte[] payload) throws IOException {
+        return AMQImpl.readMethodFrom(new DataInputStream(new ByteArrayInputStream(payload)));
+    }
+
+    private static Method bufferDecode(byte[] payload) throws IOException {
+        return AMQImpl.readMethodFrom(ByteBuffer.wrap(payload));
+    }
+
+    private void assertSameDecoding(Method m) throws IOException {
+        byte[] payload = encode(m);
+        assertEquals(streamDecode(payload).toString(), bufferDecode(payload).toString());
+    }
+
+    public void testDeliver() throws IOException {
+        AMQImpl.Basic.Deliver deliver = (AMQImpl.Basic.Deliver)
+            bufferDecode(encode(new AMQImpl.Basic.Deliver("ctag-\u00e9", 1234567890123L, true, "ex", "rk")));
+        assertEquals("ctag-\u00e9", deliver.getConsumerTag());
+        assertEquals(1234567890123L, deliver.getDeliveryTag());
+        assertTrue(deliver.getRedelivered());
+        assertEquals("ex", deliver.getExchange());
+        assertEquals("rk", deliver.getRoutingKey());
+    }
+
+    public void testBitsAndFixedWidthFields() throws IOException {
+        assertSameDecoding(new AMQImpl.Basic.Nack(42L, true, false));
+        assertSameDecoding(new AMQImpl.Basic.Qos(1, 2, true));
+        assertSameDecoding(new AMQImpl.Connection.Tune(0, 131072, 60));
+        assertSameDecoding(new AMQImpl.Channel.FlowOk(true));
+        assertSameDecoding(new AMQImpl.Channel.CloseOk());
+    }
+
+    public void testTables() throws IOException {
+        Map<String, Object> nested = new HashMap<String, Object>();
+        nested.put("n", 1);
+        Map<String, Object> args = new HashMap<String, Object>();
+        args.put("int", 1);
+        args.put("long", 2L);
+        args.put("str", LongStringHelper.asLongString("s"));
+        args.put("decimal", new BigDecimal("1.1"));
+        args.put("date", new Date((System.currentTimeMillis()/1000)*1000));
+        args.put("table", nested);
+        args.put("empty", new HashMap<String, Object>());
+        args.put("array", Arrays.asList(1, "two"));
+        args.put("null", null);
+        AMQImpl.Queue.Declare declare = new AMQImpl.Queue.Declare(0, "q", false, true, false, true, false, args);
+
+        byte[] payload = encode(declare);
+        AMQImpl.Queue.Declare viaStream = (AMQImpl.Queue.Declare) streamDecode(payload);
+        AMQImpl.Queue.Declare viaBuffer = (AMQImpl.Queue.Declare) bufferDecode(payload);
+        assertEquals(viaStream.getArguments(), viaBuffer.getArguments());
+        assertEquals(viaStream.toString(), viaBuffer.toString());
+    }
+
+    public void testNonZeroPosition() throws IOException {
+        byte[] payload = encode(new AMQImpl.Basic.Ack(7L, true));
+        byte[] padded = new byte[payload.length + 3];
+        System.arraycopy(payload, 0, padded, 3, payload.length);
+        ByteBuffer buffer = ByteBuffer.wrap(padded);
+        buffer.position(3);
+        AMQImpl.Basic.Ack ack = (AMQImpl.Basic.Ack) AMQImpl.readMethodFrom(buffer);
+        assertEquals(7L, ack.getDeliveryTag());
+        assertTrue(ack.getMultiple());
+    }
+
+    public void testReusableMethods() throws IOException {
+        AMQImpl.ReusableMethods reuse = new AMQImpl.ReusableMethods();
+        AMQImpl.Basic.Deliver first = (AMQImpl.Basic.Deliver) AMQImpl.readMethodFrom(
+            ByteBuffer.wrap(encode(new AMQImpl.Basic.Deliver("ctag", 1L, false, "ex", "rk"))), reuse);
+        assertEquals(1L, first.getDeliveryTag());
+
+        AMQImpl.Basic.Deliver second = (AMQImpl.Basic.Deliver) AMQImpl.readMethodFrom(
+            ByteBuffer.wrap(encode(new AMQImpl.Basic.Deliver("ctag2", 2L, true, "ex2", "rk2"))), reuse);
+        assertSame(first, second);
+        assertEquals("ctag2", second.getConsumerTag());
+        assertEquals(2L, second.getDeliveryTag());
+        assertTrue(second.getRedelivered());
+        assertEquals("ex2", second.getExchange());
+        assertEquals("rk2", second.getRoutingKey());
+
+        byte[] ack = encode(new AMQImpl.Basic.Ack(3L, true));
+        assertSame(AMQImpl.readMethodFrom(ByteBuffer.wrap(ack), reuse),
+                   AMQImpl.readMethodFrom(ByteBuffer.wrap(ack), reuse));
+        assertNotSame(bufferDecode(ack), bufferDecode(ack));
+    }
+
+    public void testTruncatedFrame() throws IOException {
+        byte[] payload = encode(new AMQImpl.Basic.Deliver("ctag", 1L, false, "ex", "rk"));
+        try {
+            bufferDecode(Arrays.copyOf(payload, payload.length - 1));
+            fail("expected MalformedFrameException");
+        } catch (MalformedFrameException expected) {
+        }
+    }
+}
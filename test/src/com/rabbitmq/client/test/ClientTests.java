@@ -31,6 +31,22 @@ public class ClientTests extends TestCase {
         suite.addTest(ValueOrExceptionTest.suite());
         suite.addTest(BrokenFramesTest.suite());
         suite.addTest(ClonePropertiesTest.suite());
+        suite.addTest(ByteBufferMethodReaderTest.suite());
+        suite.addTest(EncodedSizeTest.suite());
+        suite.addTest(LazyPropertiesTest.suite());
+        suite.addTest(MethodOrdinalTest.suite());
+        suite.addTest(BitPackingTest.suite());
+        suite.addTest(FrameTemplateTest.suite());
+        suite.addTest(CodecBenchmarkTest.suite());
+        suite.addTest(ImmutableTableTest.suite());
+        suite.addTest(ShortstrInternTest.suite());
+        suite.addTest(MethodMetricsTest.suite());
+        suite.addTest(PropertiesEncodingCacheTest.suite());
+        suite.addTest(CommandBatchTest.suite());
+        suite.addTest(UnboxedPropertiesTest.suite());
+        suite.addTest(ContentHeaderCacheTest.suite());
+        suite.addTest(FrameDecodingTest.suite());
+        suite.addTest(ContentBodyAssemblyTest.suite());
         suite.addTestSuite(Bug20004Test.class);
         suite.addTestSuite(CloseInMainLoop.class);
         suite.addTestSuite(ChannelNumberAllocationTests.class);
@@ -0,0 +1,65 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.IOException;
+import java.util.HashSet;
+import java.util.List;
+import java.util.Set;
+import java.util.regex.Pattern;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.test.performance.CodecBenchmark;
+import com.rabbitmq.client.test.performance.CodecBenchmarkSuite;
+
+public class CodecBenchmarkTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("codecBenchmark");
+        suite.addTestSuite(CodecBenchmarkTest.class);
+        return suite;
+    }
+
+    public void testEveryMethodAndPropertiesClassCovered() throws IOException {
+        Set<String> names = new HashSet<String>();
+        for (CodecBenchmark.Benchmark benchmark : CodecBenchmarkSuite.benchmarks()) {
+            assertTrue(names.add(benchmark.getName()));
+        }
+        // three benchmarks per method, and per BasicProperties
+        assertEquals(3 * (AMQImpl.METHOD_COUNT + 1), names.size());
+        for (String hot : new String[] { "basic.deliver", "basic.publish", "basic.properties" }) {
+            assertTrue(names.contains(hot + ".encode"));
+            assertTrue(names.contains(hot + ".decode"));
+            assertTrue(names.contains(hot + ".roundtrip"));
+        }
+    }
+
+    public void testEveryBenchmarkRuns() throws IOException {
+        for (CodecBenchmark.Benchmark benchmark : CodecBenchmarkSuite.benchmarks()) {
+            assertNotNull(benchmark.getName(), benchmark.run());
+        }
+    }
+
+    public void testFilter() throws IOException {
+        List<CodecBenchmark.Benchmark> selected =
+            CodecBenchmark.select(Pattern.compile("^basic\\.deliver\\."));
+        assertEquals(3, selected.size());
+        assertTrue(CodecBenchmark.measure(selected.get(0), 1) > 0);
+    }
+}
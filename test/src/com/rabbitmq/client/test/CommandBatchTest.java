@@ -0,0 +1,109 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.IOException;
+import java.util.Arrays;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.MessageProperties;
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.CommandBatch;
+import com.rabbitmq.client.impl.Frame;
+
+public class CommandBatchTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("commandBatch");
+        suite.addTestSuite(CommandBatchTest.class);
+        return suite;
+    }
+
+    private static byte[] wire(CommandBatch batch) throws IOException {
+        ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+        batch.writeTo(new DataOutputStream(buffer));
+        return buffer.toByteArray();
+    }
+
+    private static void writeFrame(Frame frame, ByteArrayOutputStream buffer) throws IOException {
+        frame.writeTo(new DataOutputStream(buffer));
+    }
+
+    public void testSameBytesAsSeparateFrames() throws IOException {
+        AMQImpl.Basic.Ack ack = new AMQImpl.Basic.Ack(42L, true);
+        AMQImpl.Basic.Publish publish = new AMQImpl.Basic.Publish(0, "ex\u00e9", "rk", false, false);
+        AMQImpl.Basic.Ack.Template ackTemplate = new AMQImpl.Basic.Ack.Template(7);
+        AMQP.BasicProperties props = MessageProperties.PERSISTENT_TEXT_PLAIN;
+        byte[] body = "hello".getBytes("utf-8");
+
+        CommandBatch batch = new CommandBatch(7);
+        batch.addMethod(ack, null);
+        batch.addMethod(publish, null);
+        batch.addContent(props, body, 0, null);
+        batch.addFrame(ackTemplate.frame(43L, false));
+
+        ByteArrayOutputStream expected = new ByteArrayOutputStream();
+        writeFrame(ack.toFrame(7), expected);
+        writeFrame(publish.toFrame(7), expected);
+        writeFrame(props.toFrame(7, body.length), expected);
+        writeFrame(Frame.fromBodyFragment(7, body, 0, body.length), expected);
+        writeFrame(new AMQImpl.Basic.Ack(43L, false).toFrame(7), expected);
+
+        assertTrue(Arrays.equals(expected.toByteArray(), wire(batch)));
+        assertEquals(expected.size(), batch.size());
+    }
+
+    public void testBodySplitToFrameMax() throws IOException {
+        byte[] body = new byte[100];
+        for (int i = 0; i < body.length; i++) body[i] = (byte) i;
+        CommandBatch batch = new CommandBatch(1);
+        batch.addContent(MessageProperties.BASIC, body, 30 + 8, null);
+
+        DataInputStream in = new DataInputStream(new ByteArrayInputStream(wire(batch)));
+        assertEquals(AMQP.FRAME_HEADER, Frame.readFrom(in).type);
+        int[] sizes = { 30, 30, 30, 10 };
+        int offset = 0;
+        for (int size : sizes) {
+            Frame frame = Frame.readFrom(in);
+            assertEquals(AMQP.FRAME_BODY, frame.type);
+            assertEquals(1, frame.channel);
+            assertTrue(Arrays.equals(Arrays.copyOfRange(body, offset, offset + size), frame.getPayload()));
+            offset += size;
+        }
+        assertEquals(0, in.available());
+    }
+
+    public void testClearAndThreshold() throws IOException {
+        CommandBatch batch = new CommandBatch(1);
+        assertTrue(batch.isEmpty());
+        batch.addContent(MessageProperties.BASIC, new byte[CommandBatch.FLUSH_THRESHOLD], 0, null);
+        assertTrue(batch.isFull());
+        batch.clear();
+        assertTrue(batch.isEmpty());
+        assertFalse(batch.isFull());
+
+        batch.addMethod(new AMQImpl.Basic.Ack(1L, false), null);
+        assertTrue(Arrays.equals(wire(batch), wire(batch)));
+        assertFalse(batch.isEmpty());
+    }
+}
@@ -0,0 +1,104 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.IOException;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.impl.AMQCommand;
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.Frame;
+
+public class ContentBodyAssemblyTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("contentBodyAssembly");
+        suite.addTestSuite(ContentBodyAssemblyTest.class);
+        return suite;
+    }
+
+    private static final int CHANNEL = 1;
+
+    private static byte[] body(int size) {
+        byte[] body = new byte[size];
+        for (int i = 0; i < size; i++) {
+            body[i] = (byte) (i * 31);
+        }
+        return body;
+    }
+
+    /** Reads a basic.deliver and the content header for a body of the given size */
+    private static AMQCommand startDelivery(int bodySize) throws IOException {
+        AMQCommand command = new AMQCommand();
+        assertFalse(command.handleFrame(new AMQImpl.Basic.Deliver("ctag", 1L, false, "", "q")
+                                        .toFrame(CHANNEL)));
+        boolean complete = command.handleFrame(new AMQP.BasicProperties().toFrame(CHANNEL, bodySize));
+        assertEquals(bodySize == 0, complete);
+        return command;
+    }
+
+    private static Frame bodyFrame(byte[] body, int offset, int length) {
+        return new Frame(AMQP.FRAME_BODY, CHANNEL, Arrays.copyOfRange(body, offset, offset + length));
+    }
+
+    public void testEmptyBody() throws IOException {
+        assertEquals(0, startDelivery(0).getContentBody().length);
+    }
+
+    public void testSingleFragmentKeptAsIs() throws IOException {
+        byte[] body = body(1000);
+        AMQCommand command = startDelivery(body.length);
+        assertTrue(command.handleFrame(new Frame(AMQP.FRAME_BODY, CHANNEL, body)));
+        assertSame(body, command.getContentBody());
+    }
+
+    public void testFragmentsCopiedIntoPlace() throws IOException {
+        byte[] body = body(10000);
+        AMQCommand command = startDelivery(body.length);
+        int fragmentSize = 4088;
+        for (int offset = 0; offset < body.length; offset += fragmentSize) {
+            int length = Math.min(fragmentSize, body.length - offset);
+            assertEquals(offset, command.getContentBody().length);
+            boolean complete = command.handleFrame(bodyFrame(body, offset, length));
+            assertEquals(offset + length == body.length, complete);
+        }
+        assertTrue(Arrays.equals(body, command.getContentBody()));
+        assertSame(command.getContentBody(), command.getContentBody());
+    }
+
+    public void testStreamedFragments() throws IOException {
+        byte[] body = body(10000);
+        AMQCommand command = startDelivery(body.length);
+        final List<byte[]> fragments = new ArrayList<byte[]>();
+        command.streamContentBody(new AMQCommand.ContentBodyListener() {
+            public void handleBodyFragment(byte[] fragment) {
+                fragments.add(fragment);
+            }
+        });
+        assertFalse(command.handleFrame(bodyFrame(body, 0, 6000)));
+        assertTrue(command.handleFrame(bodyFrame(body, 6000, 4000)));
+        assertEquals(2, fragments.size());
+        assertTrue(Arrays.equals(Arrays.copyOfRange(body, 0, 6000), fragments.get(0)));
+        assertTrue(Arrays.equals(Arrays.copyOfRange(body, 6000, 10000), fragments.get(1)));
+        assertEquals(0, command.getContentBody().length);
+    }
+}
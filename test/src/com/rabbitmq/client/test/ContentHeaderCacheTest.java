@@ -0,0 +1,102 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.IOException;
+import java.util.HashMap;
+import java.util.Map;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.MethodStatistics;
+import com.rabbitmq.client.impl.AMQContentHeader;
+import com.rabbitmq.client.impl.ContentHeaderCache;
+import com.rabbitmq.client.impl.Frame;
+import com.rabbitmq.client.impl.MethodMetrics;
+
+public class ContentHeaderCacheTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("contentHeaderCache");
+        suite.addTestSuite(ContentHeaderCacheTest.class);
+        return suite;
+    }
+
+    private final ContentHeaderCache cache = new ContentHeaderCache(16);
+
+    private AMQP.BasicProperties read(AMQP.BasicProperties props, long bodySize) throws IOException {
+        Frame frame = props.toFrame(1, bodySize);
+        return (AMQP.BasicProperties) cache.readContentHeaderFrom(frame, null);
+    }
+
+    private static AMQP.BasicProperties withHeaders(Map<String, Object> headers) {
+        return new AMQP.BasicProperties.Builder()
+            .contentType("application/json")
+            .headers(headers)
+            .deliveryMode(2)
+            .build();
+    }
+
+    public void testSamePropertiesShared() throws IOException {
+        Map<String, Object> headers = new HashMap<String, Object>();
+        headers.put("trace", "abc");
+        AMQP.BasicProperties first = read(withHeaders(headers), 10);
+        AMQP.BasicProperties second = read(withHeaders(headers), 10);
+        assertSame(first, second);
+        assertEquals("abc", second.getHeaders().get("trace").toString());
+    }
+
+    public void testBodySizeNotShared() throws IOException {
+        AMQP.BasicProperties props = withHeaders(null);
+        AMQP.BasicProperties small = read(props, 10);
+        AMQP.BasicProperties large = read(props, 100000);
+        assertNotSame(small, large);
+        assertEquals(10L, ((AMQContentHeader) small).getBodySize());
+        assertEquals(100000L, ((AMQContentHeader) large).getBodySize());
+        assertEquals("application/json", large.getContentType());
+        assertSame(small.getContentType(), large.getContentType());
+        assertEquals(Integer.valueOf(2), large.getDeliveryMode());
+    }
+
+    public void testDifferentPropertiesNotShared() throws IOException {
+        AMQP.BasicProperties first = read(withHeaders(null), 10);
+        AMQP.BasicProperties other = read(new AMQP.BasicProperties.Builder()
+                                          .contentType("text/plain").deliveryMode(2).build(), 10);
+        assertEquals("text/plain", other.getContentType());
+        assertSame(first, read(withHeaders(null), 10));
+    }
+
+    public void testMutableHeadersNotShared() throws IOException {
+        Map<String, Object> headers = new HashMap<String, Object>();
+        headers.put("bytes", new byte[] { 1, 2, 3 });
+        AMQP.BasicProperties first = read(withHeaders(headers), 10);
+        AMQP.BasicProperties second = read(withHeaders(headers), 10);
+        assertNotSame(first, second);
+        assertNotSame(first.getHeaders().get("bytes"), second.getHeaders().get("bytes"));
+    }
+
+    public void testHitsCounted() throws IOException {
+        MethodMetrics metrics = new MethodMetrics(1);
+        Frame frame = withHeaders(null).toFrame(1, 10);
+        cache.readContentHeaderFrom(frame, metrics);
+        cache.readContentHeaderFrom(frame, metrics);
+        MethodStatistics.Counters headers = metrics.snapshot().getReceived().get("basic.properties");
+        assertEquals(2, headers.getFrames());
+        assertEquals(2 * frame.getPayload().length, headers.getBytes());
+    }
+}
@@ -0,0 +1,131 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.ByteArrayOutputStream;
+import java.io.DataOutputStream;
+import java.io.IOException;
+import java.math.BigDecimal;
+import java.util.Arrays;
+import java.util.Date;
+import java.util.HashMap;
+import java.util.Map;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.ContentHeaderPropertyWriter;
+import com.rabbitmq.client.impl.Frame;
+import com.rabbitmq.client.impl.LongStringHelper;
+import com.rabbitmq.client.impl.Method;
+import com.rabbitmq.client.impl.MethodArgumentWriter;
+import com.rabbitmq.client.impl.ValueSizer;
+import com.rabbitmq.client.impl.ValueWriter;
+
+public class EncodedSizeTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("encodedSize");
+        suite.addTestSuite(EncodedSizeTest.class);
+        return suite;
+    }
+
+    private static Map<String, Object> headers() {
+        Map<String, Object> nested = new HashMap<String, Object>();
+        nested.put("n\u00e9sted", "v\u00e4lue");
+        Map<String, Object> table = new HashMap<String, Object>();
+        table.put("int", 1);
+        table.put("str", "a string");
+        table.put("longstr", LongStringHelper.asLongString("long"));
+        table.put("decimal", new BigDecimal("1.1"));
+        table.put("date", new Date());
+        table.put("table", nested);
+        table.put("list", Arrays.asList("x", nested, 2L));
+        table.put("array", new Object[] { "y", 3 });
+        table.put("null", null);
+        return table;
+    }
+
+    /** Encodes arguments the way toFrame did before sizes were precomputed. */
+    private static byte[] streamEncode(Method m) throws IOException {
+        ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+        DataOutputStream out = new DataOutputStream(buffer);
+        out.writeShort(m.protocolClassId());
+        out.writeShort(m.protocolMethodId());
+        MethodArgumentWriter writer = new MethodArgumentWriter(new ValueWriter(out));
+        m.writeArgumentsTo(writer);
+        writer.flush();
+        return buffer.toByteArray();
+    }
+
+    private void assertExactEncoding(Method m) throws IOException {
+        byte[] payload = m.toFrame(1).getPayload();
+        assertEquals(4 + m.encodedSize(), payload.length);
+        assertTrue(Arrays.equals(streamEncode(m), payload));
+    }
+
+    public void testMethodSizes() throws IOException {
+        assertExactEncoding(new AMQImpl.Basic.Publish(0, "ex\u00e9", "rk", true, false));
+        assertExactEncoding(new AMQImpl.Basic.Ack(1L, true));
+        assertExactEncoding(new AMQImpl.Channel.CloseOk());
+        assertExactEncoding(new AMQImpl.Connection.StartOk(headers(), "PLAIN",
+                LongStringHelper.asLongString("\0guest\0guest"), "en_US"));
+        assertExactEncoding(new AMQImpl.Queue.Declare(0, "q", false, true, false, true, false, headers()));
+        assertExactEncoding(new AMQImpl.Exchange.Declare(0, "e", "topic", false, true, false, false, false, null));
+    }
+
+    public void testPropertiesSize() throws IOException {
+        AMQP.BasicProperties props = new AMQP.BasicProperties.Builder()
+            .contentType("text/plain")
+            .headers(headers())
+            .deliveryMode(2)
+            .timestamp(new Date())
+            .appId("app")
+            .build();
+
+        ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+        props.writePropertiesTo(new ContentHeaderPropertyWriter(new DataOutputStream(buffer)));
+        assertEquals(buffer.size(), props.encodedSize());
+
+        Frame frame = props.toFrame(1, 10);
+        assertEquals(12 + props.encodedSize(), frame.getPayload().length);
+
+        assertEquals(2, new AMQP.BasicProperties().encodedSize());
+    }
+
+    public void testSizerEncodingsReused() throws IOException {
+        Map<String, Object> table = headers();
+        ValueSizer sizer = new ValueSizer();
+        assertEquals(Frame.tableSize(table) + 4, sizer.tableSize(table));
+
+        ByteArrayOutputStream reused = new ByteArrayOutputStream();
+        new ValueWriter(new DataOutputStream(reused), sizer).writeTable(table);
+        ByteArrayOutputStream fresh = new ByteArrayOutputStream();
+        new ValueWriter(new DataOutputStream(fresh)).writeTable(table);
+        assertTrue(Arrays.equals(fresh.toByteArray(), reused.toByteArray()));
+    }
+
+    public void testSizerMismatchFallsBack() throws IOException {
+        ValueSizer sizer = new ValueSizer();
+        sizer.shortstrSize("measured");
+
+        ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+        new ValueWriter(new DataOutputStream(buffer), sizer).writeShortstr("other");
+        assertEquals(1 + "other".length(), buffer.size());
+    }
+}
@@ -0,0 +1,267 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.EOFException;
+import java.io.IOException;
+import java.net.InetAddress;
+import java.nio.ByteBuffer;
+import java.util.ArrayList;
+import java.util.Collections;
+import java.util.HashMap;
+import java.util.List;
+import java.util.concurrent.BlockingQueue;
+import java.util.concurrent.Callable;
+import java.util.concurrent.CountDownLatch;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+import java.util.concurrent.LinkedBlockingQueue;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.atomic.AtomicInteger;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.Channel;
+import com.rabbitmq.client.Command;
+import com.rabbitmq.client.ConfirmListener;
+import com.rabbitmq.client.ConnectionFactory;
+import com.rabbitmq.client.ShutdownListener;
+import com.rabbitmq.client.ShutdownSignalException;
+import com.rabbitmq.client.impl.AMQChannel;
+import com.rabbitmq.client.impl.AMQConnection;
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.Frame;
+import com.rabbitmq.client.impl.FrameHandler;
+import com.rabbitmq.client.impl.LongStringHelper;
+import com.rabbitmq.client.impl.Method;
+
+public class FrameDecodingTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("frameDecoding");
+        suite.addTestSuite(FrameDecodingTest.class);
+        return suite;
+    }
+
+    private static final int DELIVERIES = 1000;
+
+    private ExecutorService executor;
+    private ExecutorService frameDecodingExecutor;
+
+    @Override protected void setUp() throws Exception {
+        super.setUp();
+        executor = Executors.newFixedThreadPool(4);
+        frameDecodingExecutor = Executors.newFixedThreadPool(4);
+    }
+
+    @Override protected void tearDown() throws Exception {
+        executor.shutdownNow();
+        frameDecodingExecutor.shutdownNow();
+        super.tearDown();
+    }
+
+    /** A channel recording the commands it is handed, and the threads handling them */
+    private static class RecordingChannel extends AMQChannel {
+        final List<Long> deliveryTags = Collections.synchronizedList(new ArrayList<Long>());
+        final List<String> bodies = Collections.synchronizedList(new ArrayList<String>());
+        final List<Thread> threads = Collections.synchronizedList(new ArrayList<Thread>());
+        final CountDownLatch handled;
+
+        RecordingChannel(AMQConnection connection, int channelNumber, int commands) {
+            super(connection, channelNumber);
+            handled = new CountDownLatch(commands);
+        }
+
+        @Override public boolean processAsync(Command command) throws IOException {
+            deliveryTags.add(((AMQP.Basic.Deliver) command.getMethod()).getDeliveryTag());
+            bodies.add(new String(command.getContentBody(), "utf-8"));
+            threads.add(Thread.currentThread());
+            handled.countDown();
+            return true;
+        }
+    }
+
+    /**
+     * A frame handler playing the broker's part: it answers the
+     * client's handshake and synchronous methods, and otherwise reads
+     * the frames a test feeds it, until the client sends close-ok
+     */
+    private static class ScriptedFrameHandler implements FrameHandler {
+        private static final Frame EOF = new Frame(AMQP.FRAME_HEARTBEAT, 0);
+
+        private final BlockingQueue<Frame> incoming = new LinkedBlockingQueue<Frame>();
+
+        void feed(Method method, int channelNumber) throws IOException {
+            incoming.add(method.toFrame(channelNumber));
+        }
+
+        public Frame readFrame() throws IOException {
+            Frame frame;
+            try {
+                frame = incoming.take();
+            } catch (InterruptedException e) {
+                Thread.currentThread().interrupt();
+                throw new IOException("interrupted reading a frame");
+            }
+            if (frame == EOF) throw new EOFException();
+            return frame;
+        }
+
+        public void sendHeader() throws IOException {
+            feed(new AMQImpl.Connection.Start(0, 9, new HashMap<String, Object>(),
+                                              LongStringHelper.asLongString("PLAIN"),
+                                              LongStringHelper.asLongString("en_US")), 0);
+        }
+
+        public void writeFrame(Frame frame) throws IOException {
+            if (frame.type != AMQP.FRAME_METHOD) return;
+            Method method = AMQImpl.readMethodFrom(ByteBuffer.wrap(frame.getPayload()));
+            if (method instanceof AMQP.Connection.StartOk) {
+                feed(new AMQImpl.Connection.Tune(0, 0, 0), 0);
+            } else if (method instanceof AMQP.Connection.Open) {
+                feed(new AMQImpl.Connection.OpenOk(""), 0);
+            } else if (method instanceof AMQP.Channel.Open) {
+                feed(new AMQImpl.Channel.OpenOk(LongStringHelper.asLongString("")), frame.channel);
+            } else if (method instanceof AMQP.Confirm.Select) {
+                feed(new AMQImpl.Confirm.SelectOk(), frame.channel);
+            } else if (method instanceof AMQP.Connection.CloseOk) {
+                incoming.add(EOF);
+            }
+        }
+
+        public void flush() {}
+        public void close() {}
+        public void setTimeout(int timeoutMs) {}
+        public int getTimeout() { return 0; }
+        public InetAddress getAddress() { return null; }
+        public int getPort() { return -1; }
+        public InetAddress getLocalAddress() { return null; }
+        public int getLocalPort() { return -1; }
+    }
+
+    private AMQConnection connection(ExecutorService frameDecodingExecutor) {
+        ConnectionFactory factory = new ConnectionFactory();
+        factory.setFrameDecodingExecutor(frameDecodingExecutor);
+        return new AMQConnection(factory.params(executor), (FrameHandler) null);
+    }
+
+    private static void dispatchDelivery(AMQChannel channel, long tag) throws IOException {
+        int number = channel.getChannelNumber();
+        byte[] body = ("message " + tag).getBytes("utf-8");
+        channel.dispatchFrame(new AMQImpl.Basic.Deliver("ctag", tag, false, "", "q").toFrame(number));
+        channel.dispatchFrame(new AMQP.BasicProperties().toFrame(number, body.length));
+        channel.dispatchFrame(Frame.fromBodyFragment(number, body, 0, body.length));
+    }
+
+    public void testFramesHandledInOrderOffTheReadingThread()
+        throws IOException, InterruptedException
+    {
+        AMQConnection connection = connection(frameDecodingExecutor);
+        RecordingChannel[] channels = new RecordingChannel[3];
+        for (int i = 0; i < channels.length; i++) {
+            channels[i] = new RecordingChannel(connection, i + 1, DELIVERIES);
+        }
+        for (long tag = 0; tag < DELIVERIES; tag++) {
+            for (RecordingChannel channel : channels) {
+                dispatchDelivery(channel, tag);
+            }
+        }
+        for (RecordingChannel channel : channels) {
+            assertTrue(channel.handled.await(10, TimeUnit.SECONDS));
+            for (int tag = 0; tag < DELIVERIES; tag++) {
+                assertEquals(Long.valueOf(tag), channel.deliveryTags.get(tag));
+                assertEquals("message " + tag, channel.bodies.get(tag));
+            }
+            assertFalse(channel.threads.contains(Thread.currentThread()));
+        }
+    }
+
+    public void testConfirmsQueuedBeforeConnectionCloseHandledFirst() throws Exception {
+        ConnectionFactory factory = new ConnectionFactory();
+        factory.setFrameDecodingExecutor(frameDecodingExecutor);
+        ScriptedFrameHandler frameHandler = new ScriptedFrameHandler();
+        AMQConnection connection = new AMQConnection(factory.params(executor), frameHandler);
+        connection.start();
+
+        Channel channel = connection.createChannel();
+        channel.confirmSelect();
+        final int confirms = 100;
+        for (int i = 0; i < confirms; i++) {
+            channel.basicPublish("", "q", null, "message".getBytes("utf-8"));
+        }
+        final AtomicInteger acked = new AtomicInteger();
+        final AtomicInteger ackedAtShutdown = new AtomicInteger(-1);
+        final CountDownLatch shutdown = new CountDownLatch(1);
+        channel.addConfirmListener(new ConfirmListener() {
+            public void handleAck(long deliveryTag, boolean multiple) {
+                try {
+                    Thread.sleep(1); // slower than reading the frames
+                } catch (InterruptedException e) {
+                    Thread.currentThread().interrupt();
+                }
+                acked.incrementAndGet();
+            }
+
+            public void handleNack(long deliveryTag, boolean multiple) {}
+        });
+        channel.addShutdownListener(new ShutdownListener() {
+            public void shutdownCompleted(ShutdownSignalException cause) {
+                ackedAtShutdown.set(acked.get());
+                shutdown.countDown();
+            }
+        });
+
+        int number = channel.getChannelNumber();
+        for (long tag = 1; tag <= confirms; tag++) {
+            frameHandler.feed(new AMQImpl.Basic.Ack(tag, false), number);
+        }
+        frameHandler.feed(new AMQImpl.Connection.Close(AMQP.CONNECTION_FORCED, "closed", 0, 0), 0);
+
+        assertTrue(shutdown.await(10, TimeUnit.SECONDS));
+        assertEquals(confirms, ackedAtShutdown.get());
+    }
+
+    public void testFramesHandledAtOnceWithoutExecutor() throws IOException {
+        RecordingChannel channel = new RecordingChannel(connection(null), 1, 1);
+        dispatchDelivery(channel, 7);
+        assertEquals(Collections.singletonList(7L), channel.deliveryTags);
+        assertEquals(Collections.singletonList(Thread.currentThread()), channel.threads);
+    }
+
+    public void testConcurrentDecoding() throws Exception {
+        final byte[] payload = new AMQImpl.Basic.Deliver("ctag", 42L, true, "exchange", "key")
+            .toFrame(1).getPayload();
+        List<Callable<String>> decoders = new ArrayList<Callable<String>>();
+        for (int i = 0; i < 8; i++) {
+            decoders.add(new Callable<String>() {
+                public String call() throws IOException {
+                    String decoded = null;
+                    for (int j = 0; j < 1000; j++) {
+                        decoded = AMQImpl.readMethodFrom(ByteBuffer.wrap(payload)).toString();
+                    }
+                    return decoded;
+                }
+            });
+        }
+        String expected = AMQImpl.readMethodFrom(ByteBuffer.wrap(payload)).toString();
+        for (Future<String> decoded : executor.invokeAll(decoders)) {
+            assertEquals(expected, decoded.get());
+        }
+    }
+}
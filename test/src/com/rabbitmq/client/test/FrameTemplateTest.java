@@ -0,0 +1,81 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.ByteArrayOutputStream;
+import java.io.DataOutputStream;
+import java.io.IOException;
+import java.util.Arrays;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.Frame;
+import com.rabbitmq.client.impl.Method;
+
+public class FrameTemplateTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("frameTemplate");
+        suite.addTestSuite(FrameTemplateTest.class);
+        return suite;
+    }
+
+    private static byte[] wire(Frame frame) throws IOException {
+        ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+        frame.writeTo(new DataOutputStream(buffer));
+        return buffer.toByteArray();
+    }
+
+    private static void assertSameFrame(Method expected, Frame actual) throws IOException {
+        Frame encoded = expected.toFrame(actual.channel);
+        assertTrue(Arrays.equals(wire(encoded), wire(actual)));
+        assertTrue(Arrays.equals(encoded.getPayload(), actual.getPayload()));
+    }
+
+    public void testAckNackReject() throws IOException {
+        AMQImpl.Basic.Ack.Template ack = new AMQImpl.Basic.Ack.Template(3);
+        AMQImpl.Basic.Nack.Template nack = new AMQImpl.Basic.Nack.Template(3);
+        AMQImpl.Basic.Reject.Template reject = new AMQImpl.Basic.Reject.Template(3);
+        long[] tags = { 1L, 255L, 256L, 0x0102030405060708L, -1L };
+        for (long tag : tags) {
+            assertSameFrame(new AMQImpl.Basic.Ack(tag, true), ack.frame(tag, true));
+            assertSameFrame(new AMQImpl.Basic.Ack(tag, false), ack.frame(tag, false));
+            assertSameFrame(new AMQImpl.Basic.Nack(tag, true, false), nack.frame(tag, true, false));
+            assertSameFrame(new AMQImpl.Basic.Nack(tag, false, true), nack.frame(tag, false, true));
+            assertSameFrame(new AMQImpl.Basic.Reject(tag, true), reject.frame(tag, true));
+        }
+    }
+
+    public void testFlowOk() throws IOException {
+        AMQImpl.Channel.FlowOk.Template flowOk = new AMQImpl.Channel.FlowOk.Template(65535);
+        assertSameFrame(new AMQImpl.Channel.FlowOk(true), flowOk.frame(true));
+        assertSameFrame(new AMQImpl.Channel.FlowOk(false), flowOk.frame(false));
+    }
+
+    public void testPublishWithBoundExchangeAndRoutingKey() throws IOException {
+        AMQImpl.Basic.Publish.Template publish =
+            new AMQImpl.Basic.Publish.Template(1, 0, "ex\u00e9", "rk");
+        assertTrue(publish.matches(0, "ex\u00e9", "rk"));
+        assertFalse(publish.matches(0, "ex", "rk"));
+
+        AMQImpl.Basic.Publish method = new AMQImpl.Basic.Publish(0, "ex\u00e9", "rk", true, false);
+        assertSameFrame(method, publish.toFrame(method));
+        method = new AMQImpl.Basic.Publish(0, "ex\u00e9", "rk", false, true);
+        assertSameFrame(method, publish.toFrame(method));
+    }
+}
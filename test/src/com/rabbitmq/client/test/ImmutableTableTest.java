@@ -0,0 +1,175 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.IOException;
+import java.nio.ByteBuffer;
+import java.util.ArrayList;
+import java.util.HashMap;
+import java.util.Iterator;
+import java.util.List;
+import java.util.Map;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.ImmutableTable;
+import com.rabbitmq.client.impl.LongStringHelper;
+
+public class ImmutableTableTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("immutableTable");
+        suite.addTestSuite(ImmutableTableTest.class);
+        return suite;
+    }
+
+    private static Map<String, Object> headers() {
+        Map<String, Object> nested = new HashMap<String, Object>();
+        nested.put("n", 1);
+        Map<String, Object> headers = new HashMap<String, Object>();
+        headers.put("int", 1);
+        headers.put("str", LongStringHelper.asLongString("s"));
+        headers.put("nested", nested);
+        headers.put("null", null);
+        return headers;
+    }
+
+    private static void assertImmutable(Map<String, Object> table) {
+        try {
+            table.put("x", 1);
+            fail("expected UnsupportedOperationException");
+        } catch (UnsupportedOperationException expected) {
+        }
+        if (!table.isEmpty()) {
+            Iterator<Map.Entry<String, Object>> entries = table.entrySet().iterator();
+            entries.next();
+            try {
+                entries.remove();
+                fail("expected UnsupportedOperationException");
+            } catch (UnsupportedOperationException expected) {
+            }
+        }
+    }
+
+    public void testCopyOf() {
+        Map<String, Object> source = headers();
+        ImmutableTable table = ImmutableTable.copyOf(source);
+        assertEquals(source, table);
+        assertEquals(source.hashCode(), table.hashCode());
+        assertTrue(table.containsKey("null"));
+        assertNull(table.get("missing"));
+        assertImmutable(table);
+
+        source.put("later", 2);
+        assertFalse(table.containsKey("later"));
+        assertSame(table, ImmutableTable.copyOf(table));
+        assertSame(ImmutableTable.EMPTY, ImmutableTable.copyOf(new HashMap<String, Object>()));
+    }
+
+    public void testBuilderAndPropertiesShareTable() {
+        AMQP.BasicProperties props = new AMQP.BasicProperties.Builder().headers(headers()).build();
+        Map<String, Object> built = props.getHeaders();
+        assertTrue(built instanceof ImmutableTable);
+        assertSame(built, props.builder().build().getHeaders());
+        assertSame(built, new AMQP.BasicProperties.Builder().headers(built).build().getHeaders());
+    }
+
+    public void testDecodedTablesNotCopied() throws IOException {
+        AMQP.BasicProperties props = new AMQP.BasicProperties.Builder().headers(headers()).build();
+        byte[] payload = props.toFrame(1, 0L).getPayload();
+        AMQP.BasicProperties decoded = (AMQP.BasicProperties) AMQImpl.readContentHeaderFrom(
+                new DataInputStream(new ByteArrayInputStream(payload)));
+        Map<String, Object> decodedHeaders = decoded.getHeaders();
+        assertEquals(headers(), decodedHeaders);
+        assertImmutable(decodedHeaders);
+        @SuppressWarnings("unchecked")
+        Map<String, Object> nested = (Map<String, Object>) decodedHeaders.get("nested");
+        assertImmutable(nested);
+        assertSame(decodedHeaders, decoded.builder().build().getHeaders());
+
+        AMQImpl.Queue.Declare declare =
+            new AMQImpl.Queue.Declare(0, "q", false, true, false, true, false, headers());
+        byte[] methodPayload = declare.toFrame(0).getPayload();
+        AMQImpl.Queue.Declare viaBuffer = (AMQImpl.Queue.Declare)
+            AMQImpl.readMethodFrom(ByteBuffer.wrap(methodPayload));
+        AMQImpl.Queue.Declare viaStream = (AMQImpl.Queue.Declare)
+            AMQImpl.readMethodFrom(new DataInputStream(new ByteArrayInputStream(methodPayload)));
+        assertTrue(viaBuffer.getArguments() instanceof ImmutableTable);
+        assertTrue(viaStream.getArguments() instanceof ImmutableTable);
+        assertEquals(viaStream.getArguments(), viaBuffer.getArguments());
+    }
+
+    public void testLargeDecodedTable() throws IOException {
+        int entries = 5000;
+        ByteArrayOutputStream table = new ByteArrayOutputStream();
+        DataOutputStream out = new DataOutputStream(table);
+        for (int i = 0; i < entries; i++) {
+            writeIntEntry(out, "key" + i, i);
+        }
+        // a repeated key: the first value is kept
+        writeIntEntry(out, "key42", -1);
+        writeIntEntry(out, "key4999", -1);
+
+        // a queue.declare with no arguments ends with their empty table
+        byte[] declare = new AMQImpl.Queue.Declare(0, "q", false, true, false, true, false, null)
+            .toFrame(0).getPayload();
+        ByteArrayOutputStream payload = new ByteArrayOutputStream();
+        DataOutputStream payloadOut = new DataOutputStream(payload);
+        payloadOut.write(declare, 0, declare.length - 4);
+        payloadOut.writeInt(table.size());
+        table.writeTo(payloadOut);
+        byte[] methodPayload = payload.toByteArray();
+
+        List<Map<String, Object>> decoded = new ArrayList<Map<String, Object>>();
+        decoded.add(((AMQImpl.Queue.Declare) AMQImpl.readMethodFrom(
+            ByteBuffer.wrap(methodPayload))).getArguments());
+        decoded.add(((AMQImpl.Queue.Declare) AMQImpl.readMethodFrom(
+            new DataInputStream(new ByteArrayInputStream(methodPayload)))).getArguments());
+        for (Map<String, Object> arguments : decoded) {
+            assertTrue(arguments instanceof ImmutableTable);
+            assertEquals(entries, arguments.size());
+            for (int i = 0; i < entries; i++) {
+                assertEquals(i, arguments.get("key" + i));
+            }
+            assertFalse(arguments.containsKey("key" + entries));
+            assertNull(arguments.get("missing"));
+            int i = 0;
+            for (String key : arguments.keySet()) {
+                assertEquals("key" + i++, key);
+            }
+            Map<String, Object> copy = new HashMap<String, Object>(arguments);
+            assertEquals(copy, arguments);
+            assertEquals(copy, ImmutableTable.copyOf(copy));
+        }
+    }
+
+    private static void writeIntEntry(DataOutputStream out, String key, int value)
+        throws IOException
+    {
+        byte[] keyBytes = key.getBytes("utf-8");
+        out.writeByte(keyBytes.length);
+        out.write(keyBytes);
+        out.writeByte('I');
+        out.writeInt(value);
+    }
+}
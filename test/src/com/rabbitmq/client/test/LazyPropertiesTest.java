@@ -0,0 +1,111 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.ByteArrayInputStream;
+import java.io.DataInputStream;
+import java.io.IOException;
+import java.nio.ByteBuffer;
+import java.util.Arrays;
+import java.util.Date;
+import java.util.HashMap;
+import java.util.Map;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.MalformedFrameException;
+import com.rabbitmq.client.impl.AMQContentHeader;
+import com.rabbitmq.client.impl.AMQImpl;
+
+public class LazyPropertiesTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("lazyProperties");
+        suite.addTestSuite(LazyPropertiesTest.class);
+        return suite;
+    }
+
+    private static AMQP.BasicProperties properties() {
+        Map<String, Object> headers = new HashMap<String, Object>();
+        headers.put("h\u00e9", 1);
+        headers.put("nested", new HashMap<String, Object>());
+        return new AMQP.BasicProperties.Builder()
+            .contentType("application/json")
+            .headers(headers)
+            .deliveryMode(2)
+            .correlationId("corr")
+            .timestamp(new Date((System.currentTimeMillis()/1000)*1000))
+            .appId("app")
+            .build();
+    }
+
+    private static byte[] encode(AMQP.BasicProperties props, long bodySize) throws IOException {
+        return props.toFrame(1, bodySize).getPayload();
+    }
+
+    private static AMQContentHeader lazyDecode(byte[] payload) throws IOException {
+        return AMQImpl.readLazyContentHeaderFrom(ByteBuffer.wrap(payload));
+    }
+
+    public void testSameAsEagerDecoding() throws IOException {
+        byte[] payload = encode(properties(), 1234L);
+        AMQContentHeader eager = AMQImpl.readContentHeaderFrom(
+                new DataInputStream(new ByteArrayInputStream(payload)));
+        AMQContentHeader lazy = lazyDecode(payload);
+
+        assertTrue(lazy instanceof AMQP.BasicProperties);
+        assertEquals(1234L, lazy.getBodySize());
+        assertEquals(eager.toString(), lazy.toString());
+        assertEquals(((AMQP.BasicProperties) eager).getHeaders(),
+                     ((AMQP.BasicProperties) lazy).getHeaders());
+    }
+
+    public void testIndividualGetters() throws IOException {
+        AMQP.BasicProperties lazy = (AMQP.BasicProperties) lazyDecode(encode(properties(), 0L));
+        assertEquals("app", lazy.getAppId());
+        assertEquals(Integer.valueOf(2), lazy.getDeliveryMode());
+        assertNull(lazy.getPriority());
+        assertNull(lazy.getClusterId());
+        assertEquals("corr", lazy.getCorrelationId());
+        assertSame(lazy.getHeaders(), lazy.getHeaders());
+    }
+
+    public void testReencodedUnchanged() throws IOException {
+        byte[] payload = encode(properties(), 99L);
+        AMQContentHeader lazy = lazyDecode(payload);
+        assertEquals(payload.length - 12, lazy.encodedSize());
+        assertTrue(Arrays.equals(payload, lazy.toFrame(1, 99L).getPayload()));
+    }
+
+    public void testBuilderCopiesDecodedValues() throws IOException {
+        AMQP.BasicProperties lazy = (AMQP.BasicProperties) lazyDecode(encode(properties(), 0L));
+        AMQP.BasicProperties copy = lazy.builder().priority(5).build();
+        assertEquals("application/json", copy.getContentType());
+        assertEquals(lazy.getTimestamp(), copy.getTimestamp());
+        assertEquals(Integer.valueOf(5), copy.getPriority());
+    }
+
+    public void testTruncatedHeader() throws IOException {
+        byte[] payload = encode(properties(), 0L);
+        try {
+            lazyDecode(Arrays.copyOf(payload, payload.length - 1));
+            fail("expected MalformedFrameException");
+        } catch (MalformedFrameException expected) {
+        }
+    }
+}
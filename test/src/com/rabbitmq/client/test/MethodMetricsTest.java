@@ -0,0 +1,107 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.IOException;
+import java.nio.ByteBuffer;
+import java.util.HashMap;
+import java.util.Map;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.MethodStatistics;
+import com.rabbitmq.client.impl.AMQCommand;
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.Frame;
+import com.rabbitmq.client.impl.MethodMetrics;
+
+public class MethodMetricsTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("methodMetrics");
+        suite.addTestSuite(MethodMetricsTest.class);
+        return suite;
+    }
+
+    public void testSentFramesCounted() throws IOException {
+        MethodMetrics metrics = new MethodMetrics(1);
+        Frame ack = new AMQImpl.Basic.Ack(1L, true).toFrame(1, metrics);
+        new AMQImpl.Basic.Ack(2L, false).toFrame(1, metrics);
+        Frame header = new AMQP.BasicProperties.Builder().contentType("text/plain").build()
+            .toFrame(1, 10, metrics);
+
+        MethodStatistics stats = metrics.snapshot();
+        assertTrue(stats.getReceived().isEmpty());
+        assertEquals(2, stats.getSent().size());
+        MethodStatistics.Counters acks = stats.getSent().get("basic.ack");
+        assertEquals(2, acks.getFrames());
+        assertEquals(2 * ack.getPayload().length, acks.getBytes());
+        assertEquals(2, acks.getSamples());
+        MethodStatistics.Counters headers = stats.getSent().get("basic.properties");
+        assertEquals(1, headers.getFrames());
+        assertEquals(header.getPayload().length, headers.getBytes());
+    }
+
+    public void testReceivedFramesCounted() throws IOException {
+        MethodMetrics metrics = new MethodMetrics(1);
+        AMQCommand command = new AMQCommand(false, null, metrics);
+        Frame deliver = new AMQImpl.Basic.Deliver("ctag", 1L, false, "ex", "rk").toFrame(1);
+        Frame header = new AMQP.BasicProperties().toFrame(1, 0);
+        command.handleFrame(deliver);
+        assertTrue(command.handleFrame(header));
+
+        MethodStatistics stats = metrics.snapshot();
+        assertEquals(deliver.getPayload().length, stats.getReceived().get("basic.deliver").getBytes());
+        assertEquals(header.getPayload().length, stats.getReceived().get("basic.properties").getBytes());
+        assertTrue(stats.getSent().isEmpty());
+    }
+
+    public void testSampling() throws IOException {
+        MethodMetrics metrics = new MethodMetrics(4);
+        byte[] payload = new AMQImpl.Channel.FlowOk(true).toFrame(1).getPayload();
+        for (int i = 0; i < 16; i++) {
+            AMQImpl.readMethodFrom(ByteBuffer.wrap(payload), null, metrics);
+        }
+        MethodStatistics.Counters flowOks = metrics.snapshot().getReceived().get("channel.flow-ok");
+        assertEquals(16, flowOks.getFrames());
+        assertEquals(4, flowOks.getSamples());
+    }
+
+    public void testNullMetricsRecordNothing() throws IOException {
+        byte[] payload = new AMQImpl.Basic.Ack(1L, true).toFrame(1, null).getPayload();
+        assertNotNull(AMQImpl.readMethodFrom(ByteBuffer.wrap(payload), null, null));
+    }
+
+    public void testWriteProfile() throws IOException {
+        Map<String, MethodStatistics.Counters> received = new HashMap<String, MethodStatistics.Counters>();
+        Map<String, MethodStatistics.Counters> sent = new HashMap<String, MethodStatistics.Counters>();
+        received.put("basic.deliver", new MethodStatistics.Counters(5, 0, 0, 0));
+        received.put("basic.properties", new MethodStatistics.Counters(5, 0, 0, 0));
+        received.put("channel.flow", new MethodStatistics.Counters(1, 0, 0, 0));
+        sent.put("basic.ack", new MethodStatistics.Counters(4, 0, 0, 0));
+        sent.put("channel.flow", new MethodStatistics.Counters(1, 0, 0, 0));
+        sent.put("basic.qos", new MethodStatistics.Counters(2, 0, 0, 0));
+
+        StringBuilder profile = new StringBuilder();
+        new MethodStatistics(received, sent).writeProfile(profile);
+        assertEquals("basic.deliver 5\n" +
+                     "basic.ack 4\n" +
+                     "basic.qos 2\n" +
+                     "channel.flow 2\n", profile.toString());
+    }
+}
@@ -0,0 +1,73 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.util.HashSet;
+import java.util.Set;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.Method;
+
+public class MethodOrdinalTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("methodOrdinal");
+        suite.addTestSuite(MethodOrdinalTest.class);
+        return suite;
+    }
+
+    private static final Method[] METHODS = {
+        new AMQImpl.Connection.CloseOk(),
+        new AMQImpl.Channel.Flow(true),
+        new AMQImpl.Channel.CloseOk(),
+        new AMQImpl.Basic.Ack(1L, false),
+        new AMQImpl.Basic.Nack(1L, false, true),
+        new AMQImpl.Basic.Deliver("ctag", 1L, false, "ex", "rk"),
+        new AMQImpl.Basic.Return(312, "NO_ROUTE", "ex", "rk"),
+        new AMQImpl.Confirm.SelectOk(),
+        new AMQImpl.Tx.Commit()
+    };
+
+    public void testOrdinalsAreDenseAndDistinct() {
+        Set<Integer> seen = new HashSet<Integer>();
+        for (Method m : METHODS) {
+            int ordinal = m.protocolMethodOrdinal();
+            assertTrue(ordinal >= 0 && ordinal < AMQImpl.METHOD_COUNT);
+            assertTrue(seen.add(ordinal));
+        }
+    }
+
+    public void testLookupByIds() {
+        for (Method m : METHODS) {
+            assertEquals(m.protocolMethodOrdinal(),
+                         AMQImpl.methodOrdinal(m.protocolClassId(), m.protocolMethodId()));
+            assertEquals(m.protocolMethodOrdinal(), AMQImpl.methodOrdinal(m));
+        }
+        assertEquals(AMQImpl.Basic.Deliver.ORDINAL,
+                     AMQImpl.methodOrdinal(AMQImpl.Basic.INDEX, AMQImpl.Basic.Deliver.INDEX));
+    }
+
+    public void testUnknownIds() {
+        assertEquals(-1, AMQImpl.methodOrdinal(-1, 10));
+        assertEquals(-1, AMQImpl.methodOrdinal(11, 10));
+        assertEquals(-1, AMQImpl.methodOrdinal(60, 12));
+        assertEquals(-1, AMQImpl.methodOrdinal(60, 1000));
+        assertEquals(-1, AMQImpl.methodOrdinal(65535, 10));
+    }
+}
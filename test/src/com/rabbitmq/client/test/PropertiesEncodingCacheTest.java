@@ -0,0 +1,121 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.ByteArrayInputStream;
+import java.io.DataInputStream;
+import java.io.IOException;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.Date;
+import java.util.HashMap;
+import java.util.Map;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.MessageProperties;
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.ImmutableTable;
+import com.rabbitmq.client.impl.LongStringHelper;
+
+public class PropertiesEncodingCacheTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("propertiesEncodingCache");
+        suite.addTestSuite(PropertiesEncodingCacheTest.class);
+        return suite;
+    }
+
+    private static byte[] encode(AMQP.BasicProperties props, long bodySize) throws IOException {
+        return props.toFrame(1, bodySize).getPayload();
+    }
+
+    private static AMQP.BasicProperties decode(byte[] payload) throws IOException {
+        return (AMQP.BasicProperties) AMQImpl.readContentHeaderFrom(
+                new DataInputStream(new ByteArrayInputStream(payload)));
+    }
+
+    private static AMQP.BasicProperties withHeaders(Map<String, Object> headers, Date timestamp) {
+        return new AMQP.BasicProperties.Builder()
+            .contentType("text/plain")
+            .headers(headers)
+            .deliveryMode(2)
+            .timestamp(timestamp)
+            .appId("app")
+            .build();
+    }
+
+    public void testRepeatedFramesIdentical() throws IOException {
+        Map<String, Object> headers = new HashMap<String, Object>();
+        headers.put("h\u00e9", 1);
+        headers.put("s", LongStringHelper.asLongString("value"));
+        AMQP.BasicProperties props = withHeaders(headers, new Date(1400000000000L));
+
+        byte[] first = encode(props, 10L);
+        byte[] second = encode(props, 10L);
+        assertTrue(Arrays.equals(first, second));
+        assertTrue(Arrays.equals(first, encode(props.builder().build(), 10L)));
+    }
+
+    public void testBodySizeNotCached() throws IOException {
+        AMQP.BasicProperties props = MessageProperties.PERSISTENT_TEXT_PLAIN;
+        assertEquals(1L, decode(encode(props, 1L)).getBodySize());
+        AMQP.BasicProperties decoded = decode(encode(props, 2L));
+        assertEquals(2L, decoded.getBodySize());
+        assertEquals("text/plain", decoded.getContentType());
+        assertEquals(Integer.valueOf(2), decoded.getDeliveryMode());
+    }
+
+    public void testTimestampCopiedOnConstruction() throws IOException {
+        Date timestamp = new Date(1400000000000L);
+        AMQP.BasicProperties props = withHeaders(null, timestamp);
+        assertEquals(timestamp, decode(encode(props, 0L)).getTimestamp());
+
+        timestamp.setTime(1500000000000L);
+        assertEquals(new Date(1400000000000L), props.getTimestamp());
+        assertEquals(new Date(1400000000000L), decode(encode(props, 0L)).getTimestamp());
+    }
+
+    public void testMutableHeaderValueReencoded() throws IOException {
+        Map<String, Object> nested = new HashMap<String, Object>();
+        Map<String, Object> headers = new HashMap<String, Object>();
+        headers.put("nested", nested);
+        AMQP.BasicProperties props = withHeaders(headers, null);
+        encode(props, 0L);
+
+        nested.put("added", 1);
+        Map<?, ?> decoded = (Map<?, ?>) decode(encode(props, 0L)).getHeaders().get("nested");
+        assertEquals(Integer.valueOf(1), decoded.get("added"));
+    }
+
+    public void testImmutableValues() {
+        Map<String, Object> inner = new HashMap<String, Object>();
+        inner.put("i", 1);
+        Map<String, Object> outer = new HashMap<String, Object>();
+        outer.put("table", ImmutableTable.copyOf(inner));
+        outer.put("str", "s");
+
+        assertTrue(ImmutableTable.isImmutableValue(null));
+        assertTrue(ImmutableTable.isImmutableValue(ImmutableTable.copyOf(outer)));
+        assertFalse(ImmutableTable.isImmutableValue(new Date()));
+        assertFalse(ImmutableTable.isImmutableValue(new byte[0]));
+        assertFalse(ImmutableTable.isImmutableValue(new ArrayList<Object>()));
+        outer.put("map", inner);
+        assertFalse(ImmutableTable.isImmutableValue(ImmutableTable.copyOf(outer)));
+    }
+}
@@ -0,0 +1,94 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.ByteArrayInputStream;
+import java.io.DataInputStream;
+import java.io.IOException;
+import java.nio.ByteBuffer;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.ShortstrInternCache;
+
+public class ShortstrInternTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("shortstrIntern");
+        suite.addTestSuite(ShortstrInternTest.class);
+        return suite;
+    }
+
+    private static byte[] deliver(String consumerTag, long deliveryTag, String routingKey)
+        throws IOException
+    {
+        return new AMQImpl.Basic.Deliver(consumerTag, deliveryTag, false, "ex", routingKey)
+            .toFrame(1).getPayload();
+    }
+
+    public void testRepeatedDeliveriesShareStrings() throws IOException {
+        AMQImpl.Basic.Deliver first = (AMQImpl.Basic.Deliver)
+            AMQImpl.readMethodFrom(ByteBuffer.wrap(deliver("ctag-\u00e9", 1L, "rk")));
+        AMQImpl.Basic.Deliver second = (AMQImpl.Basic.Deliver)
+            AMQImpl.readMethodFrom(ByteBuffer.wrap(deliver("ctag-\u00e9", 2L, "rk")));
+        assertEquals("ctag-\u00e9", first.getConsumerTag());
+        assertSame(first.getConsumerTag(), second.getConsumerTag());
+        assertSame(first.getExchange(), second.getExchange());
+        assertSame(first.getRoutingKey(), second.getRoutingKey());
+        assertEquals(2L, second.getDeliveryTag());
+    }
+
+    public void testStreamAndBufferDecodersShareCache() throws IOException {
+        byte[] payload = deliver("ctag-stream", 1L, "rk-stream");
+        AMQImpl.Basic.Deliver viaBuffer = (AMQImpl.Basic.Deliver)
+            AMQImpl.readMethodFrom(ByteBuffer.wrap(payload));
+        AMQImpl.Basic.Deliver viaStream = (AMQImpl.Basic.Deliver)
+            AMQImpl.readMethodFrom(new DataInputStream(new ByteArrayInputStream(payload)));
+        assertSame(viaBuffer.getConsumerTag(), viaStream.getConsumerTag());
+        assertSame(viaBuffer.getRoutingKey(), viaStream.getRoutingKey());
+    }
+
+    public void testDirectBuffer() throws IOException {
+        byte[] encoded = "amq.direct".getBytes("utf-8");
+        ByteBuffer direct = ByteBuffer.allocateDirect(encoded.length + 2);
+        direct.put((byte) 0).put(encoded);
+        ShortstrInternCache cache = new ShortstrInternCache(16);
+        String s = cache.intern(direct, 1, encoded.length);
+        assertEquals("amq.direct", s);
+        assertSame(s, cache.intern(encoded, 0, encoded.length));
+        assertSame(s, cache.intern(direct, 1, encoded.length));
+    }
+
+    public void testHighCardinalityStaysCorrect() throws IOException {
+        ShortstrInternCache cache = new ShortstrInternCache(4);
+        for (int round = 0; round < 3; round++) {
+            for (int i = 0; i < 1000; i++) {
+                byte[] encoded = ("key-" + i).getBytes("utf-8");
+                assertEquals("key-" + i, cache.intern(encoded, 0, encoded.length));
+            }
+        }
+    }
+
+    public void testSizeMustBePowerOfTwo() {
+        try {
+            new ShortstrInternCache(1000);
+            fail("expected IllegalArgumentException");
+        } catch (IllegalArgumentException expected) {
+        }
+    }
+}
@@ -0,0 +1,108 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test;
+
+import java.io.ByteArrayInputStream;
+import java.io.DataInputStream;
+import java.io.IOException;
+import java.nio.ByteBuffer;
+import java.util.Date;
+
+import junit.framework.TestCase;
+import junit.framework.TestSuite;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.impl.AMQImpl;
+
+public class UnboxedPropertiesTest extends TestCase {
+    public static TestSuite suite() {
+        TestSuite suite = new TestSuite("unboxedProperties");
+        suite.addTestSuite(UnboxedPropertiesTest.class);
+        return suite;
+    }
+
+    private static final long MILLIS = 1400000000000L;
+
+    private static AMQP.BasicProperties full() {
+        return new AMQP.BasicProperties.Builder()
+            .deliveryMode(2)
+            .priority(0)
+            .timestamp(new Date(MILLIS))
+            .build();
+    }
+
+    private static AMQP.BasicProperties decode(AMQP.BasicProperties props) throws IOException {
+        byte[] payload = props.toFrame(1, 0L).getPayload();
+        return (AMQP.BasicProperties) AMQImpl.readContentHeaderFrom(
+                new DataInputStream(new ByteArrayInputStream(payload)));
+    }
+
+    private static AMQP.BasicProperties lazyDecode(AMQP.BasicProperties props) throws IOException {
+        byte[] payload = props.toFrame(1, 0L).getPayload();
+        return (AMQP.BasicProperties) AMQImpl.readLazyContentHeaderFrom(ByteBuffer.wrap(payload));
+    }
+
+    private static void assertFull(AMQP.BasicProperties props) {
+        assertTrue(props.hasDeliveryMode());
+        assertEquals(2, props.getDeliveryModeValue());
+        assertEquals(Integer.valueOf(2), props.getDeliveryMode());
+        // zero is a value like any other, not absence
+        assertTrue(props.hasPriority());
+        assertEquals(0, props.getPriorityValue());
+        assertEquals(Integer.valueOf(0), props.getPriority());
+        assertTrue(props.hasTimestamp());
+        assertEquals(MILLIS, props.getTimestampMillis());
+        assertEquals(new Date(MILLIS), props.getTimestamp());
+    }
+
+    private static void assertEmpty(AMQP.BasicProperties props) {
+        assertFalse(props.hasDeliveryMode());
+        assertEquals(0, props.getDeliveryModeValue());
+        assertNull(props.getDeliveryMode());
+        assertFalse(props.hasPriority());
+        assertNull(props.getPriority());
+        assertFalse(props.hasTimestamp());
+        assertEquals(0L, props.getTimestampMillis());
+        assertNull(props.getTimestamp());
+    }
+
+    public void testConstructed() {
+        assertFull(full());
+        assertEmpty(new AMQP.BasicProperties());
+        assertEmpty(new AMQP.BasicProperties.Builder().build());
+    }
+
+    public void testDecoded() throws IOException {
+        assertFull(decode(full()));
+        assertEmpty(decode(new AMQP.BasicProperties()));
+    }
+
+    public void testLazilyDecoded() throws IOException {
+        assertFull(lazyDecode(full()));
+        assertEmpty(lazyDecode(new AMQP.BasicProperties()));
+    }
+
+    public void testBuilderRoundTrip() {
+        assertFull(full().builder().build());
+    }
+
+    public void testTimestampNotShared() {
+        AMQP.BasicProperties props = full();
+        props.getTimestamp().setTime(0L);
+        assertEquals(MILLIS, props.getTimestampMillis());
+    }
+}
@@ -15,6 +15,8 @@ import java.util.List;
 import java.util.ArrayList;
 import java.util.UUID;
 import java.util.concurrent.CountDownLatch;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.Future;
 import java.util.concurrent.TimeUnit;
 import java.util.concurrent.TimeoutException;
 import java.util.concurrent.atomic.AtomicInteger;
@@ -380,6 +382,37 @@ public class ConnectionRecovery extends BrokerTestCase {
         channel.queueDelete(q);
     }
 
+    public void testPipelinedTopologyRecovery()
+            throws IOException, InterruptedException, ExecutionException {
+        AMQP.PipelinedRpc rpc = new AMQP.PipelinedRpc((PipelinedChannel) channel);
+        String x = generateExchangeName();
+        Future<AMQP.Exchange.DeclareOk> declaredX =
+            rpc.exchangeDeclare(new AMQP.Exchange.Declare.Builder().exchange(x).type("fanout").build());
+        Future<AMQP.Queue.DeclareOk> declaredQ =
+            rpc.queueDeclare(new AMQP.Queue.Declare.Builder().queue("").build());
+        declaredX.get();
+        String q = declaredQ.get().getQueue();
+        rpc.queueBind(new AMQP.Queue.Bind.Builder().queue(q).exchange(x).routingKey("").build()).get();
+
+        final AtomicReference<String> nameAfter = new AtomicReference<String>();
+        final CountDownLatch listenerLatch = new CountDownLatch(1);
+        ((AutorecoveringConnection)connection).addQueueRecoveryListener(new QueueRecoveryListener() {
+            @Override
+            public void queueRecovered(String oldName, String newName) {
+                nameAfter.set(newName);
+                listenerLatch.countDown();
+            }
+        });
+
+        closeAndWaitForRecovery();
+        wait(listenerLatch);
+        expectChannelRecovery(channel);
+        channel.basicPublish(x, "", null, "msg".getBytes());
+        assertDelivered(nameAfter.get(), 1);
+        channel.queueDelete(nameAfter.get());
+        channel.exchangeDelete(x);
+    }
+
     public void testExchangeToExchangeBindingRecovery() throws IOException, InterruptedException {
         String q = channel.queueDeclare("", false, false, false, null).getQueue();
         String x1 = "amq.fanout";
@@ -79,5 +79,7 @@ public class FunctionalTests extends TestCase {
         suite.addTestSuite(ExceptionHandling.class);
         suite.addTestSuite(PerConsumerPrefetch.class);
         suite.addTestSuite(DirectReplyTo.class);
+        suite.addTestSuite(PipelinedTopology.class);
+        suite.addTestSuite(StreamingDelivery.class);
     }
 }
@@ -0,0 +1,108 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+
+package com.rabbitmq.client.test.functional;
+
+import java.io.IOException;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.Future;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.PipelinedChannel;
+import com.rabbitmq.client.ShutdownSignalException;
+import com.rabbitmq.client.test.BrokerTestCase;
+
+/**
+ * Test declaring topology with pipelined RPCs.
+ */
+public class PipelinedTopology extends BrokerTestCase {
+    private static final int QUEUES = 100;
+
+    private AMQP.PipelinedRpc pipelinedRpc() {
+        return new AMQP.PipelinedRpc((PipelinedChannel) channel);
+    }
+
+    public void testRepliesMatchedInOrder()
+        throws IOException, InterruptedException, ExecutionException
+    {
+        AMQP.PipelinedRpc rpc = pipelinedRpc();
+        List<String> queues = new ArrayList<String>();
+        List<Future<AMQP.Queue.DeclareOk>> declared = new ArrayList<Future<AMQP.Queue.DeclareOk>>();
+        List<Future<AMQP.Queue.BindOk>> bound = new ArrayList<Future<AMQP.Queue.BindOk>>();
+        for (int i = 0; i < QUEUES; i++) {
+            String q = generateQueueName();
+            queues.add(q);
+            declared.add(rpc.queueDeclare(new AMQP.Queue.Declare.Builder()
+                                          .queue(q).exclusive().autoDelete().build()));
+            bound.add(rpc.queueBind(new AMQP.Queue.Bind.Builder()
+                                    .queue(q).exchange("amq.fanout").routingKey("").build()));
+        }
+        for (int i = 0; i < QUEUES; i++) {
+            assertEquals(queues.get(i), declared.get(i).get().getQueue());
+            assertNotNull(bound.get(i).get());
+        }
+        basicPublishVolatile("amq.fanout", "");
+        for (String q : queues) {
+            assertDelivered(q, 1);
+        }
+    }
+
+    public void testPipelinedWithBlockingRpc()
+        throws IOException, InterruptedException, ExecutionException
+    {
+        AMQP.PipelinedRpc rpc = pipelinedRpc();
+        String q = generateQueueName();
+        Future<AMQP.Queue.DeclareOk> declared =
+            rpc.queueDeclare(new AMQP.Queue.Declare.Builder().queue(q).exclusive().build());
+        assertEquals(0, channel.queueDeclarePassive(q).getMessageCount());
+        assertTrue(declared.isDone());
+        assertEquals(q, declared.get().getQueue());
+    }
+
+    public void testChannelErrorFailsOutstandingRpcs()
+        throws IOException, InterruptedException
+    {
+        AMQP.PipelinedRpc rpc = pipelinedRpc();
+        Future<AMQP.Queue.DeclareOk> missing = rpc.queueDeclare(
+            new AMQP.Queue.Declare.Builder().queue(generateQueueName()).passive().build());
+        Future<AMQP.Queue.DeclareOk> unanswered = rpc.queueDeclare(
+            new AMQP.Queue.Declare.Builder().queue(generateQueueName()).exclusive().build());
+        assertNotFound(missing);
+        assertNotFound(unanswered);
+    }
+
+    private void assertNotFound(Future<?> future) throws InterruptedException {
+        try {
+            future.get();
+            fail("Expected the channel to be closed");
+        } catch (ExecutionException ee) {
+            checkShutdownSignal(AMQP.NOT_FOUND, (ShutdownSignalException) ee.getCause());
+        }
+    }
+
+    public void testNowaitRejected() throws IOException {
+        try {
+            pipelinedRpc().queueDeclare(
+                new AMQP.Queue.Declare.Builder().queue(generateQueueName()).nowait().build());
+            fail("Expected nowait to be rejected");
+        } catch (IllegalArgumentException expected) {
+        }
+        channel.basicQos(0);
+    }
+}
@@ -0,0 +1,115 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test.functional;
+
+import java.io.ByteArrayOutputStream;
+import java.io.IOException;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.Collections;
+import java.util.List;
+import java.util.concurrent.BlockingQueue;
+import java.util.concurrent.LinkedBlockingQueue;
+import java.util.concurrent.TimeUnit;
+
+import com.rabbitmq.client.AMQP;
+import com.rabbitmq.client.Channel;
+import com.rabbitmq.client.DefaultConsumer;
+import com.rabbitmq.client.Envelope;
+import com.rabbitmq.client.StreamingConsumer;
+import com.rabbitmq.client.test.BrokerTestCase;
+
+/**
+ * Test receiving message bodies a frame at a time with a
+ * {@link StreamingConsumer}.
+ */
+public class StreamingDelivery extends BrokerTestCase {
+    private static final int FRAME_MAX = 8192;
+    private static final int BODY_SIZE = 100000;
+
+    public StreamingDelivery() {
+        connectionFactory.setRequestedFrameMax(FRAME_MAX);
+    }
+
+    /** Records the deliveries streamed to it */
+    private static class RecordingConsumer extends DefaultConsumer implements StreamingConsumer {
+        final BlockingQueue<byte[]> bodies = new LinkedBlockingQueue<byte[]>();
+        final List<Long> announcedBodySizes = Collections.synchronizedList(new ArrayList<Long>());
+        volatile int fragments = 0;
+        volatile int largestFragment = 0;
+        volatile boolean handleDeliveryCalled = false;
+        private ByteArrayOutputStream body;
+
+        RecordingConsumer(Channel channel) {
+            super(channel);
+        }
+
+        public void handleDeliveryStart(String consumerTag, Envelope envelope,
+                                        AMQP.BasicProperties properties, long bodySize) {
+            announcedBodySizes.add(bodySize);
+            body = new ByteArrayOutputStream();
+        }
+
+        public void handleDeliveryBody(String consumerTag, byte[] fragment) {
+            fragments++;
+            largestFragment = Math.max(largestFragment, fragment.length);
+            body.write(fragment, 0, fragment.length);
+        }
+
+        public void handleDeliveryEnd(String consumerTag) {
+            bodies.add(body.toByteArray());
+        }
+
+        @Override public void handleDelivery(String consumerTag, Envelope envelope,
+                                             AMQP.BasicProperties properties, byte[] body) {
+            handleDeliveryCalled = true;
+        }
+
+        byte[] nextBody() throws InterruptedException {
+            byte[] body = bodies.poll(10, TimeUnit.SECONDS);
+            assertNotNull("delivery not streamed", body);
+            return body;
+        }
+    }
+
+    private RecordingConsumer consume() throws IOException {
+        String q = channel.queueDeclare().getQueue();
+        RecordingConsumer consumer = new RecordingConsumer(channel);
+        channel.basicConsume(q, true, consumer);
+        channel.basicPublish("", q, null, body(BODY_SIZE));
+        channel.basicPublish("", q, null, new byte[0]);
+        return consumer;
+    }
+
+    private static byte[] body(int size) {
+        byte[] body = new byte[size];
+        for (int i = 0; i < size; i++) {
+            body[i] = (byte) i;
+        }
+        return body;
+    }
+
+    public void testBodyStreamedInFrames() throws IOException, InterruptedException {
+        RecordingConsumer consumer = consume();
+        assertTrue(Arrays.equals(body(BODY_SIZE), consumer.nextBody()));
+        assertEquals(0, consumer.nextBody().length);
+        assertEquals(Arrays.asList((long) BODY_SIZE, 0L), consumer.announcedBodySizes);
+        assertTrue(consumer.fragments > 1);
+        assertTrue(consumer.largestFragment <= FRAME_MAX - 8);
+        assertFalse(consumer.handleDeliveryCalled);
+    }
+}
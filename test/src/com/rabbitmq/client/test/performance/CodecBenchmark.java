@@ -0,0 +1,227 @@
+//  The contents of this file are subject to the Mozilla Public License
+//  Version 1.1 (the "License"); you may not use this file except in
+//  compliance with the License. You may obtain a copy of the License
+//  at http://www.mozilla.org/MPL/
+//
+//  Software distributed under the License is distributed on an "AS IS"
+//  basis, WITHOUT WARRANTY OF ANY KIND, either express or implied. See
+//  the License for the specific language governing rights and
+//  limitations under the License.
+//
+//  The Original Code is RabbitMQ.
+//
+//  The Initial Developer of the Original Code is GoPivotal, Inc.
+//  Copyright (c) 2007-2015 Pivotal Software, Inc.  All rights reserved.
+//
+
+package com.rabbitmq.client.test.performance;
+
+import java.io.ByteArrayInputStream;
+import java.io.DataInputStream;
+import java.io.IOException;
+import java.math.BigDecimal;
+import java.nio.ByteBuffer;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.Date;
+import java.util.HashMap;
+import java.util.List;
+import java.util.Map;
+import java.util.regex.Pattern;
+
+import org.apache.commons.cli.CommandLine;
+import org.apache.commons.cli.Option;
+import org.apache.commons.cli.Options;
+
+import com.rabbitmq.client.LongString;
+import com.rabbitmq.client.impl.AMQContentHeader;
+import com.rabbitmq.client.impl.AMQImpl;
+import com.rabbitmq.client.impl.LongStringHelper;
+import com.rabbitmq.client.impl.Method;
+
+/**
+ * Measures encoding and decoding of every method and content
+ * properties class in the AMQP spec, without a broker. The
+ * benchmarks themselves are listed by {@link CodecBenchmarkSuite},
+ * which codegen.py generates from the spec; this class provides the
+ * argument values they use and times them.
+ * <p/>
+ * Benchmarks are named <code>class.method.kind</code> and
+ * <code>class.properties.kind</code>, where kind is one of
+ * <code>encode</code>, <code>decode</code> and <code>roundtrip</code>.
+ * Run with <code>-f 'basic\.(deliver|publish|properties)'</code> to
+ * measure only the hottest paths.
+ */
+public class CodecBenchmark {
+
+    /** Value of every shortstr argument and property */
+    public static final String SHORTSTR =
+        "amq.gen-JzTY20BRgKO-HjmUJj0wLg.consumer-tag.0123456789abcdef";
+    /** Value of every longstr argument, 16KiB */
+    public static final LongString LONGSTR =
+        LongStringHelper.asLongString(repeat('x', 16 * 1024));
+    /** Value of every table argument and property */
+    public static final Map<String, Object> TABLE = largeTable(64);
+    /** Value of every timestamp property */
+    public static final Date TIMESTAMP = new Date(1400000000000L);
+    /** Body size written to content headers */
+    public static final long BODY_SIZE = 4096;
+
+    /** Results are folded in here so that they cannot be optimised away */
+    private static volatile int sink;
+
+    public abstract static class Benchmark {
+        private final String name;
+
+        protected Benchmark(String name) {
+            this.name = name;
+        }
+
+        public String getName() {
+            return name;
+        }
+
+        /** Runs one iteration, returning what it produced. */
+        public abstract Object run() throws IOException;
+    }
+
+    private static String repeat(char c, int count) {
+        char[] chars = new char[count];
+        Arrays.fill(chars, c);
+        return new String(chars);
+    }
+
+    /**
+     * A header table of the given number of entries, cycling through
+     * the field value types a client typically sends.
+     */
+    private static Map<String, Object> largeTable(int entries) {
+        Map<String, Object> nested = new HashMap<String, Object>();
+        nested.put("nested-int", 1);
+        nested.put("nested-str", LongStringHelper.asLongString("nested value"));
+        Map<String, Object> table = new HashMap<String, Object>();
+        for (int i = 0; i < entries; i++) {
+            String key = "x-header-" + i;
+            switch (i % 8) {
+              case 0: table.put(key, LongStringHelper.asLongString(repeat('v', 256))); break;
+              case 1: table.put(key, i); break;
+              case 2: table.put(key, (long) i << 32); break;
+              case 3: table.put(key, i % 2 == 0); break;
+              case 4: table.put(key, new BigDecimal("123.45")); break;
+              case 5: table.put(key, TIMESTAMP); break;
+              case 6: table.put(key, nested); break;
+              default: table.put(key, Arrays.<Object>asList("a", 2, nested)); break;
+            }
+        }
+        return table;
+    }
+
+    /** Adds encode, decode and round-trip benchmarks of a method. */
+    public static void addMethod(List<Benchmark> benchmarks, String name, final Method m)
+        throws IOException
+    {
+        final byte[] payload = m.toFrame(1).getPayload();
+        benchmarks.add(new Benchmark(name + ".encode") {
+            public Object run() throws IOException {
+                return m.toFrame(1);
+            }
+        });
+        benchmarks.add(new Benchmark(name + ".decode") {
+            public Object run() throws IOException {
+                return AMQImpl.readMethodFrom(ByteBuffer.wrap(payload));
+            }
+        });
+        benchmarks.add(new Benchmark(name + ".roundtrip") {
+            public Object run() throws IOException {
+                return AMQImpl.readMethodFrom(ByteBuffer.wrap(m.toFrame(1).getPayload()));
+            }
+        });
+    }
+
+    /** Adds encode, decode and round-trip benchmarks of a content header. */
+    public static void addProperties(List<Benchmark> benchmarks, String name,
+                                     final AMQContentHeader properties)
+        throws IOException
+    {
+        final byte[] payload = properties.toFrame(1, BODY_SIZE).getPayload();
+        benchmarks.add(new Benchmark(name + ".encode") {
+            public Object run() throws IOException {
+                return properties.toFrame(1, BODY_SIZE);
+            }
+        });
+        benchmarks.add(new Benchmark(name + ".decode") {
+            public Object run() throws IOException {
+                return readContentHeader(payload);
+            }
+        });
+        benchmarks.add(new Benchmark(name + ".roundtrip") {
+            public Object run() throws IOException {
+                return readContentHeader(properties.toFrame(1, BODY_SIZE).getPayload());
+            }
+        });
+    }
+
+    private static AMQContentHeader readContentHeader(byte[] payload)
+        throws IOException
+    {
+        return AMQImpl.readContentHeaderFrom(
+            new DataInputStream(new ByteArrayInputStream(payload)));
+    }
+
+    /**
+     * Runs the benchmark for at least the given time, in batches
+     * doubling in size, and returns the mean time per iteration in
+     * nanoseconds.
+     */
+    public static double measure(Benchmark benchmark, long millis)
+        throws IOException
+    {
+        long deadline = System.nanoTime() + millis * 1000000L;
+        long start = System.nanoTime();
+        long iterations = 0;
+        long now;
+        int batch = 1;
+        do {
+            for (int i = 0; i < batch; i++) {
+                sink += System.identityHashCode(benchmark.run());
+            }
+            iterations += batch;
+            if (batch < (1 << 20)) batch <<= 1;
+            now = System.nanoTime();
+        } while (now < deadline);
+        return (now - start) / (double) iterations;
+    }
+
+    public static List<Benchmark> select(Pattern filter) throws IOException {
+        List<Benchmark> selected = new ArrayList<Benchmark>();
+        for (Benchmark benchmark : CodecBenchmarkSuite.benchmarks()) {
+            if (filter.matcher(benchmark.getName()).find()) {
+                selected.add(benchmark);
+            }
+        }
+        return selected;
+    }
+
+    public static void main(String[] args) throws Exception {
+        Options options = new Options();
+        options.addOption(new Option("help", "print this message"));
+        options.addOption(new Option("f", "filter", true, "regular expression selecting benchmarks"));
+        options.addOption(new Option("w", "warmup", true, "warm-up time per benchmark (ms)"));
+        options.addOption(new Option("t", "time",   true, "measurement time per benchmark (ms)"));
+        CommandLine cmd = new CLIHelper(options).parseCommandLine(args);
+        if (cmd == null) return;
+
+        Pattern filter = Pattern.compile(cmd.getOptionValue("f", ""));
+        int warmup     = CLIHelper.getOptionValue(cmd, "w", 500);
+        int time       = CLIHelper.getOptionValue(cmd, "t", 1000);
+
+        System.out.println("benchmark, ns/op, ops/s");
+        for (Benchmark benchmark : select(filter)) {
+            measure(benchmark, warmup);
+            double nanos = measure(benchmark, time);
+            System.out.println(benchmark.getName() + ", " +
+                               String.format("%.1f", nanos) + ", " +
+                               String.format("%.0f", 1e9 / nanos));
+        }
+    }
+}